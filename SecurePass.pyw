@@ -10,17 +10,6 @@ import json
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
-def set_window_icon(window):
-    """设置窗口图标"""
-    try:
-        icon_path = os.path.join(current_dir, "images", "Main icon.png")
-        if os.path.exists(icon_path):
-            from PySide6 import QtGui
-            icon = QtGui.QIcon(icon_path)
-            window.setWindowIcon(icon)
-    except Exception as e:
-        print(f"设置窗口图标失败: {e}")
-
 def check_remembered_user():
     """检查是否有记住的用户"""
     try:
@@ -39,7 +28,6 @@ def check_remembered_user():
                         app = QtWidgets.QApplication(sys.argv)
                     
                     window = PasswordManagerWindow(username)
-                    set_window_icon(window)
                     window.show()
                     return app.exec()
         return None
@@ -60,6 +48,5 @@ if __name__ == "__main__":
             app = QtWidgets.QApplication(sys.argv)
             
         win = WelcomeWindow()
-        set_window_icon(win)
         win.show()
         app.exec()
\ No newline at end of file
@@ -0,0 +1,134 @@
+# auth/avatar.py
+# 用户头像：上传时缩小为缩略图，渲染结果按 (用户, 尺寸, 文件修改时间) 缓存，解码在后台线程进行
+
+import os
+from collections import OrderedDict
+
+from PySide6 import QtCore, QtGui
+
+from .images import read_image
+
+# 头像支持的扩展名（按查找顺序）
+AVATAR_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+# 上传头像缩略图的短边长度（资料页显示 120px，留出高分屏余量）
+THUMBNAIL_SIZE = 256
+# 最多缓存的头像数量
+CACHE_LIMIT = 16
+
+_pixmap_cache = OrderedDict()
+
+
+def find_avatar(user_dir):
+    """返回用户目录中的头像文件路径，没有则返回 None"""
+    for ext in AVATAR_EXTENSIONS:
+        avatar_path = os.path.join(user_dir, f"avatar{ext}")
+        if os.path.exists(avatar_path):
+            return avatar_path
+    return None
+
+
+def save_thumbnail(file_path, user_dir):
+    """把上传的图片缩小为缩略图（短边不超过 THUMBNAIL_SIZE）保存为 avatar.png，替换原有头像
+
+    只使用 QImage，可在后台线程调用。返回保存路径。
+    """
+    image = read_image(file_path, THUMBNAIL_SIZE, QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding)
+    if image.isNull():
+        raise ValueError("无法读取图片文件")
+
+    new_avatar_path = os.path.join(user_dir, "avatar.png")
+    temp_path = new_avatar_path + ".tmp"
+    if not image.save(temp_path, "PNG"):
+        raise OSError("无法保存头像文件")
+
+    old_avatar = find_avatar(user_dir)
+    if old_avatar and old_avatar != new_avatar_path:
+        os.remove(old_avatar)
+    os.replace(temp_path, new_avatar_path)
+    return new_avatar_path
+
+
+def create_default_avatar(username, size, font_size):
+    """创建默认灰色头像（用户名首字母）"""
+    image = QtGui.QImage(size, size, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(QtGui.QColor("#9CA3AF"))
+
+    painter = QtGui.QPainter(image)
+    painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+    painter.setPen(QtGui.QColor("white"))
+    painter.setFont(QtGui.QFont("Arial", font_size, QtGui.QFont.Weight.Bold))
+
+    first_char = username[0].upper() if username else "?"
+    painter.drawText(image.rect(), QtCore.Qt.AlignmentFlag.AlignCenter, first_char)
+    painter.end()
+
+    return image
+
+
+def create_round_avatar(image, size):
+    """把图片裁剪为 size x size 的圆形头像（只使用 QImage，可在后台线程调用）"""
+    rounded = QtGui.QImage(size, size, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+    rounded.fill(QtCore.Qt.GlobalColor.transparent)
+
+    painter = QtGui.QPainter(rounded)
+    painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+
+    path = QtGui.QPainterPath()
+    path.addEllipse(0, 0, size, size)
+    painter.setClipPath(path)
+
+    scaled = image.scaled(size, size, QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                          QtCore.Qt.TransformationMode.SmoothTransformation)
+    painter.drawImage(0, 0, scaled)
+    painter.end()
+
+    return rounded
+
+
+def _cached(key):
+    pixmap = _pixmap_cache.get(key)
+    if pixmap is not None:
+        _pixmap_cache.move_to_end(key)
+    return pixmap
+
+
+def _store(key, pixmap):
+    _pixmap_cache[key] = pixmap
+    while len(_pixmap_cache) > CACHE_LIMIT:
+        _pixmap_cache.popitem(last=False)
+
+
+def show_avatar(loader, username, avatar_path, size, font_size, callback):
+    """显示圆形头像：命中缓存时立即回调；否则先以默认头像占位回调，后台解码完成后再次回调
+
+    loader 为调用方窗口的 ImageLoader；头像文件不存在或无法读取时保持默认头像。
+    """
+    mtime = None
+    if avatar_path:
+        try:
+            mtime = os.stat(avatar_path).st_mtime_ns
+        except OSError:
+            avatar_path = None
+
+    key = (username, size, mtime)
+    pixmap = _cached(key)
+    if pixmap is not None:
+        callback(pixmap)
+        return
+
+    default_key = (username, size, None)
+    placeholder = _cached(default_key)
+    if placeholder is None:
+        image = create_round_avatar(create_default_avatar(username, size, font_size), size)
+        placeholder = QtGui.QPixmap.fromImage(image)
+        _store(default_key, placeholder)
+    callback(placeholder)
+    if avatar_path is None:
+        return
+
+    def loaded(pixmap):
+        _store(key, pixmap)
+        callback(pixmap)
+
+    loader.load(avatar_path, size, loaded, mode=QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                transform=lambda image: create_round_avatar(image, size), tag=("avatar", size))
@@ -0,0 +1,388 @@
+# auth/binformat.py
+# 紧凑二进制密码库格式（.spv），可与 JSON 格式互相转换
+#
+# 文件布局：
+#   文件头   b"SPV1" + u16 格式版本 + u16 保留
+#   记录区   逐条记录，字段为 varint 长度前缀的 UTF-8 字符串；
+#            verification / registration_type / name.type 存为枚举表下标，
+#            timestamp 存为整数时间戳（zigzag varint）
+#   枚举表   varint 个数 + 各字符串
+#   偏移表   每条记录的起始偏移（u64），用于随机访问
+#   文件尾   u64 枚举表偏移 + u64 偏移表偏移 + u32 记录数 + u64 存储版本号
+#            + sha256(校验和之前的全部内容，包括文件尾的前四项) + b"SPVE"
+#
+# 格式版本 1 的校验和不包括文件尾的前四项（记录数、偏移等被改动时无法发现），仍可读取，写入时使用版本 2。
+
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+
+from .storage import StorageCorruptedError, atomic_write_bytes, atomic_write_json, load_checked, read_json_checked
+
+BINARY_SUFFIX = ".spv"
+MAGIC = b"SPV1"
+END_MAGIC = b"SPVE"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHH")
+FOOTER = struct.Struct("<QQIQ32s4s")
+FOOTER_FIELDS = struct.Struct("<QQIQ")
+OFFSET = struct.Struct("<Q")
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 字段类型
+STR, ENUM, NAME, TIME = range(4)
+
+# 记录字段（顺序即存储顺序，下标即存在位掩码中的位）
+FIELDS = (
+    ('id', STR),
+    ('website', STR),
+    ('site_name', STR),
+    ('name', NAME),
+    ('password', STR),
+    ('email', STR),
+    ('verification', ENUM),
+    ('registration_type', ENUM),
+    ('notes', STR),
+    ('timestamp', TIME),
+)
+FIELD_KEYS = frozenset(key for key, _ in FIELDS)
+EXTRAS_BIT = 1 << 15
+NAME_KEYS = ('username', 'first_name', 'last_name')
+
+
+# ---------- 基础编码 ----------
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos):
+    byte = buf[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    result = byte & 0x7F
+    shift = 7
+    pos += 1
+    while True:
+        byte = buf[pos]
+        result |= (byte & 0x7F) << shift
+        pos += 1
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _write_str(out, text):
+    data = text.encode('utf-8')
+    _write_varint(out, len(data))
+    out += data
+
+
+def _read_str(buf, pos):
+    length, pos = _read_varint(buf, pos)
+    end = pos + length
+    return str(buf[pos:end], 'utf-8'), end
+
+
+def parse_timestamp(text):
+    """记录时间字符串（本地时间）转整数时间戳，无法解析返回 None"""
+    try:
+        if len(text) != 19 or text[4] != '-' or text[7] != '-' or text[10] != ' ':
+            return None
+        fields = (int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                  int(text[11:13]), int(text[14:16]), int(text[17:19]), 0, 0, -1)
+        return int(time.mktime(fields))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def format_timestamp(epoch):
+    """整数时间戳转记录时间字符串（本地时间）"""
+    return time.strftime(TIME_FORMAT, time.localtime(epoch))
+
+
+# ---------- 单条记录 ----------
+
+def _compact_value(kind, value):
+    """字段的紧凑存储值；无法紧凑存储（需放入扩展字段原样保存）时返回 None"""
+    if kind == NAME:
+        if (isinstance(value, dict) and isinstance(value.get('type'), str)
+                and all(k == 'type' or (k in NAME_KEYS and isinstance(v, str)) for k, v in value.items())):
+            return value
+        return None
+    if kind == TIME:
+        epoch = parse_timestamp(value)
+        # 无法无损往返（如夏令时重复的时刻）的时间原样保存
+        if epoch is None or format_timestamp(epoch) != value:
+            return None
+        return epoch
+    return value if isinstance(value, str) else None
+
+
+def _encode_record(out, record, intern):
+    mask = 0
+    extras = {}
+    values = []
+    for bit, (key, kind) in enumerate(FIELDS):
+        if key in record:
+            value = _compact_value(kind, record[key])
+            if value is not None:
+                mask |= 1 << bit
+                values.append(value)
+            else:
+                extras[key] = record[key]
+    for key, value in record.items():
+        if key not in FIELD_KEYS:
+            extras[key] = value
+    if extras:
+        mask |= EXTRAS_BIT
+    _write_varint(out, mask)
+
+    values = iter(values)
+    for bit, (key, kind) in enumerate(FIELDS):
+        if not mask & (1 << bit):
+            continue
+        value = next(values)
+        if kind == STR:
+            _write_str(out, value)
+        elif kind == ENUM:
+            _write_varint(out, intern(value))
+        elif kind == TIME:
+            _write_varint(out, (value << 1) ^ (value >> 63))
+        else:
+            _write_varint(out, intern(value['type']))
+            name_mask = 0
+            for i, name_key in enumerate(NAME_KEYS):
+                if name_key in value:
+                    name_mask |= 1 << i
+            out.append(name_mask)
+            for i, name_key in enumerate(NAME_KEYS):
+                if name_mask & (1 << i):
+                    _write_str(out, value[name_key])
+
+    if extras:
+        _write_str(out, json.dumps(extras, ensure_ascii=False, separators=(',', ':')))
+
+
+def _decode_record(buf, pos, pool):
+    """从 pos 解码一条记录，返回 (记录, 下一条记录的位置)"""
+    mask, pos = _read_varint(buf, pos)
+    record = {}
+    for bit, (key, kind) in enumerate(FIELDS):
+        if not mask & (1 << bit):
+            continue
+        if kind == STR:
+            record[key], pos = _read_str(buf, pos)
+        elif kind == ENUM:
+            code, pos = _read_varint(buf, pos)
+            record[key] = pool[code]
+        elif kind == TIME:
+            value, pos = _read_varint(buf, pos)
+            record[key] = format_timestamp((value >> 1) ^ -(value & 1))
+        else:
+            code, pos = _read_varint(buf, pos)
+            name = {'type': pool[code]}
+            name_mask = buf[pos]
+            pos += 1
+            for i, name_key in enumerate(NAME_KEYS):
+                if name_mask & (1 << i):
+                    name[name_key], pos = _read_str(buf, pos)
+            record[key] = name
+
+    if mask & EXTRAS_BIT:
+        raw, pos = _read_str(buf, pos)
+        record.update(json.loads(raw))
+    return record, pos
+
+
+# ---------- 整个文件 ----------
+
+def encode_records(records, version=0):
+    """将记录列表编码为二进制文件内容"""
+    pool = []
+    pool_index = {}
+
+    def intern(text):
+        code = pool_index.get(text)
+        if code is None:
+            code = pool_index[text] = len(pool)
+            pool.append(text)
+        return code
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, 0))
+    offsets = []
+    for record in records:
+        offsets.append(len(out))
+        _encode_record(out, record, intern)
+
+    pool_offset = len(out)
+    _write_varint(out, len(pool))
+    for text in pool:
+        _write_str(out, text)
+
+    offsets_offset = len(out)
+    for offset in offsets:
+        out += OFFSET.pack(offset)
+
+    out += FOOTER_FIELDS.pack(pool_offset, offsets_offset, len(records), version)
+    out += hashlib.sha256(out).digest() + END_MAGIC
+    return bytes(out)
+
+
+def _read_footer(buf):
+    if len(buf) < HEADER.size + FOOTER.size:
+        raise StorageCorruptedError("文件过短")
+    magic, format_version, _ = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or format_version not in (1, FORMAT_VERSION):
+        raise StorageCorruptedError("不是有效的二进制密码库文件")
+    footer = FOOTER.unpack_from(buf, len(buf) - FOOTER.size)
+    if footer[5] != END_MAGIC:
+        raise StorageCorruptedError("文件尾缺失")
+    return footer
+
+
+def _read_pool(buf, pos):
+    count, pos = _read_varint(buf, pos)
+    pool = []
+    for _ in range(count):
+        text, pos = _read_str(buf, pos)
+        pool.append(text)
+    return pool
+
+
+def _verify(buf):
+    footer = _read_footer(buf)
+    checked = len(buf) - FOOTER.size
+    if HEADER.unpack_from(buf, 0)[1] != 1:
+        checked += FOOTER_FIELDS.size
+    if hashlib.sha256(memoryview(buf)[:checked]).digest() != footer[4]:
+        raise StorageCorruptedError("校验和不匹配")
+    return footer
+
+
+def open_record_stream(content):
+    """校验文件内容后返回 (版本号, 逐条解码记录的迭代器)"""
+    version = _verify(content)[3]
+    return version, iter_records(content)
+
+
+def iter_records(content):
+    """校验后逐条解码记录（生成器）"""
+    pool_offset, _, count, _, _, _ = _verify(content)
+    try:
+        pool = _read_pool(content, pool_offset)
+        pos = HEADER.size
+        for _ in range(count):
+            record, pos = _decode_record(content, pos, pool)
+            yield record
+    except (IndexError, UnicodeDecodeError, ValueError) as e:
+        raise StorageCorruptedError(f"无法解析数据: {e}")
+
+
+def decode_records(content):
+    """解码二进制文件内容，返回 (记录列表, 版本号)"""
+    records = list(iter_records(content))
+    return records, FOOTER.unpack_from(content, len(content) - FOOTER.size)[3]
+
+
+def is_binary(content):
+    """内容是否为二进制密码库格式"""
+    return content[:len(MAGIC)] == MAGIC
+
+
+def read_version(path):
+    """只读取文件尾获取版本号（文件不存在或无效返回0）"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < FOOTER.size:
+                return 0
+            f.seek(-FOOTER.size, os.SEEK_END)
+            footer = FOOTER.unpack(f.read(FOOTER.size))
+    except OSError:
+        return 0
+    return footer[3] if footer[5] == END_MAGIC else 0
+
+
+def atomic_write_records(path, records, version=0):
+    """原子写入二进制密码库，并保留上一代文件"""
+    atomic_write_bytes(path, encode_records(records, version))
+
+
+def load_records(path, default):
+    """加载二进制密码库，返回 (记录列表, 版本号)；损坏时自动从上一代文件恢复"""
+    return load_checked(path, decode_records, default)
+
+
+class BinaryVaultReader:
+    """基于内存映射的随机访问读取器：按下标解码单条记录，不加载整个文件"""
+
+    def __init__(self, path, verify=False):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise StorageCorruptedError("文件为空")
+        footer = _verify(self._map) if verify else _read_footer(self._map)
+        pool_offset, self._offsets_offset, self._count, self.version, _, _ = footer
+        self._pool = _read_pool(self._map, pool_offset)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        offset, = OFFSET.unpack_from(self._map, self._offsets_offset + index * OFFSET.size)
+        return _decode_record(self._map, offset, self._pool)[0]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------- 格式转换 ----------
+
+def json_to_binary(json_path, binary_path):
+    """将 JSON 密码库转换为二进制格式（保留版本号）"""
+    records, version = read_json_checked(json_path)
+    atomic_write_records(binary_path, records, version)
+    return len(records)
+
+
+def binary_to_json(binary_path, json_path):
+    """将二进制密码库转换回 JSON 格式（保留版本号）"""
+    with open(binary_path, 'rb') as f:
+        records, version = decode_records(f.read())
+    atomic_write_json(json_path, records, version)
+    return len(records)
+
+
+if __name__ == "__main__":
+    # 用法：python -m auth.binformat 输入文件 输出文件（按扩展名判断转换方向）
+    if len(sys.argv) != 3:
+        print("用法: python -m auth.binformat <passwords.json|passwords.spv> <输出文件>")
+        sys.exit(1)
+    src, dst = sys.argv[1], sys.argv[2]
+    if src.endswith(BINARY_SUFFIX):
+        count = binary_to_json(src, dst)
+    else:
+        count = json_to_binary(src, dst)
+    print(f"已转换 {count} 条记录: {src} -> {dst}")
@@ -0,0 +1,341 @@
+# auth/breach.py
+# 离线泄露密码检查：把下载到本地的 HIBP（Have I Been Pwned）SHA-1 列表转换为按哈希排序的定长二进制文件，
+# 查询时内存映射后二分查找，前面加一个布隆过滤器，不联网、不把整个文件读入内存
+#
+# 转换（只需一次，输入为 "SHA1十六进制:次数" 每行一条，已排序的列表直接流式转换，未排序的先分块外部排序）：
+#   python -m auth.breach pwned-passwords-sha1-ordered-by-hash-v8.txt
+#
+# 文件布局（pwned_passwords.bin）：
+#   文件头   b"SPPW" + u16 格式版本 + u16 分段位数 + u64 条目数
+#   分段表   (1 << 分段位数) + 1 个 u64：以哈希前若干位分段，每段第一个条目的下标
+#   条目区   按哈希排序的定长条目：20 字节 SHA-1 + u32 出现次数（大端）
+# 布隆过滤器（pwned_passwords.bin.bloom）：
+#   文件头   b"SPBF" + u16 格式版本 + u16 每个哈希置位数 + u64 块数
+#   块区     u64 位块；哈希前 8 字节决定块号（与排序顺序一致，转换时可顺序写出），其后各字节决定块内的位
+
+import os
+import sys
+import heapq
+import mmap
+import struct
+import hashlib
+import binascii
+import tempfile
+
+from .storage import StorageCorruptedError
+
+BREACH_FILE = "pwned_passwords.bin"
+BLOOM_SUFFIX = ".bloom"
+MAGIC = b"SPPW"
+BLOOM_MAGIC = b"SPBF"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+OFFSET = struct.Struct("<Q")
+ENTRY = struct.Struct(">20sI")
+DIGEST_SIZE = 20
+FANOUT_BITS = 16
+# 每个条目占布隆过滤器的位数和置位数：误判率约 1%，误判只多一次二分查找
+BLOOM_BITS_PER_ENTRY = 12
+BLOOM_HASHES = 5
+# 外部排序时每块在内存中排序的条目数
+SORT_CHUNK = 2_000_000
+_MAX_COUNT = 0xFFFFFFFF
+
+
+def password_digest(password):
+    """密码的 SHA-1 摘要（HIBP 列表使用的哈希）"""
+    return hashlib.sha1(password.encode('utf-8', 'surrogatepass')).digest()
+
+
+def _bloom_block(digest, blocks):
+    return (int.from_bytes(digest[:8], 'big') * blocks) >> 64
+
+
+def _bloom_mask(digest, hashes):
+    mask = 0
+    for byte in digest[8:8 + hashes]:
+        mask |= 1 << (byte & 63)
+    return mask
+
+
+class BreachDatabase:
+    """泄露密码库：内存映射的排序哈希文件 + 布隆过滤器（没有过滤器文件时直接二分查找）"""
+
+    def __init__(self, path=BREACH_FILE):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise StorageCorruptedError("泄露密码文件为空")
+        self._bloom_file = self._bloom = None
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise StorageCorruptedError(f"泄露密码文件不完整: {path}")
+        magic, version, self._fanout_bits, self._count = HEADER.unpack_from(self._map)
+        self._fanout_offset = HEADER.size
+        self._entries_offset = HEADER.size + ((1 << self._fanout_bits) + 1) * OFFSET.size
+        if (magic != MAGIC or version != FORMAT_VERSION
+                or len(self._map) != self._entries_offset + self._count * ENTRY.size):
+            self.close()
+            raise StorageCorruptedError(f"无法识别的泄露密码文件: {path}")
+        self._open_bloom(path + BLOOM_SUFFIX)
+
+    def _open_bloom(self, path):
+        try:
+            self._bloom_file = open(path, 'rb')
+        except FileNotFoundError:
+            return
+        try:
+            bloom = mmap.mmap(self._bloom_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self._bloom_hashes, self._bloom_blocks = HEADER.unpack_from(bloom)
+        except (ValueError, struct.error):
+            bloom = None
+            magic = None
+        if (magic != BLOOM_MAGIC or version != FORMAT_VERSION
+                or len(bloom) != HEADER.size + self._bloom_blocks * OFFSET.size):
+            print(f"布隆过滤器文件无效，已忽略: {path}")
+            if bloom is not None:
+                bloom.close()
+            self._bloom_file.close()
+            self._bloom_file = None
+            return
+        self._bloom = bloom
+
+    def __len__(self):
+        return self._count
+
+    def might_contain(self, digest):
+        """布隆过滤器判断：False 表示一定不在列表中"""
+        if self._bloom is None:
+            return True
+        block = _bloom_block(digest, self._bloom_blocks)
+        bits, = OFFSET.unpack_from(self._bloom, HEADER.size + block * OFFSET.size)
+        mask = _bloom_mask(digest, self._bloom_hashes)
+        return bits & mask == mask
+
+    def lookup(self, digest):
+        """SHA-1 摘要在泄露列表中的出现次数，不在列表中返回 0"""
+        if not self.might_contain(digest):
+            return 0
+        data = self._map
+        prefix = int.from_bytes(digest[:4], 'big') >> (32 - self._fanout_bits)
+        lo, hi = struct.unpack_from("<QQ", data, self._fanout_offset + prefix * OFFSET.size)
+        base = self._entries_offset
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = base + mid * ENTRY.size
+            current = data[offset:offset + DIGEST_SIZE]
+            if current < digest:
+                lo = mid + 1
+            elif current > digest:
+                hi = mid
+            else:
+                return ENTRY.unpack_from(data, offset)[1] or 1
+        return 0
+
+    def password_count(self, password):
+        """密码在泄露列表中的出现次数"""
+        return self.lookup(password_digest(password)) if password else 0
+
+    def check_records(self, records):
+        """检查一批记录，返回 {记录ID: 泄露次数}（只包含已泄露的记录，相同密码只查一次）"""
+        counts = {}
+        breached = {}
+        for record in records:
+            password = record.get('password')
+            if not password:
+                continue
+            count = counts.get(password)
+            if count is None:
+                count = counts[password] = self.password_count(password)
+            if count:
+                breached[record.get('id')] = count
+        return breached
+
+    def close(self):
+        if self._bloom is not None:
+            self._bloom.close()
+            self._bloom = None
+        if self._bloom_file is not None:
+            self._bloom_file.close()
+            self._bloom_file = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------- 格式转换 ----------
+
+class _UnsortedInput(Exception):
+    """输入列表没有按哈希排序"""
+
+
+def _parse_lines(source):
+    """逐行读取 "SHA1十六进制[:次数]"，产生 (摘要, 次数)"""
+    with open(source, 'rb') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            text, _, count = line.partition(b':')
+            try:
+                if len(text) != DIGEST_SIZE * 2:
+                    raise ValueError
+                yield binascii.unhexlify(text), int(count) if count else 0
+            except (ValueError, binascii.Error):
+                raise ValueError(f"第 {number} 行无法识别: {line[:80]!r}") from None
+
+
+def _checked_sorted(entries):
+    previous = b""
+    for digest, count in entries:
+        if digest < previous:
+            raise _UnsortedInput()
+        previous = digest
+        yield digest, count
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(ENTRY.size * 4096)
+            if not chunk:
+                return
+            yield from ENTRY.iter_unpack(chunk)
+
+
+def _external_sort(source, directory):
+    """未排序的输入：每 SORT_CHUNK 条在内存中排序后写入临时文件，再多路归并"""
+    runs = []
+    chunk = []
+
+    def flush():
+        chunk.sort()
+        fd, run_path = tempfile.mkstemp(prefix=".pwned.", suffix=".run", dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b"".join(ENTRY.pack(digest, min(count, _MAX_COUNT)) for digest, count in chunk))
+        runs.append(run_path)
+        chunk.clear()
+
+    try:
+        for entry in _parse_lines(source):
+            chunk.append(entry)
+            if len(chunk) >= SORT_CHUNK:
+                flush()
+        if chunk:
+            flush()
+        yield from heapq.merge(*(_read_run(path) for path in runs))
+    finally:
+        for path in runs:
+            os.remove(path)
+
+
+def _count_lines(source):
+    """输入的行数（条目数上限），用于确定布隆过滤器大小"""
+    lines = 0
+    last = b"\n"
+    with open(source, 'rb') as f:
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return lines + (last != b"\n")
+
+
+def _write_database(entries, output, capacity):
+    """把排序后的 (摘要, 次数) 写为泄露密码文件和布隆过滤器，相同摘要的次数合并；返回条目数"""
+    fanout_size = 1 << FANOUT_BITS
+    fanout = [0] * (fanout_size + 1)
+    blocks = max(1, -(-capacity * BLOOM_BITS_PER_ENTRY // 64))
+    shift = 32 - FANOUT_BITS
+    count = 0
+
+    with open(output, 'wb') as out, open(output + BLOOM_SUFFIX, 'wb') as bloom:
+        out.write(b"\0" * (HEADER.size + (fanout_size + 1) * OFFSET.size))
+        bloom.write(HEADER.pack(BLOOM_MAGIC, FORMAT_VERSION, BLOOM_HASHES, blocks))
+        buffer = []
+        bloom_buffer = []
+        block, mask = 0, 0         # 当前块及其位（之前的块已写入缓冲）
+        previous, previous_count = None, 0
+
+        def emit(digest, times):
+            nonlocal count, block, mask
+            buffer.append(ENTRY.pack(digest, min(times, _MAX_COUNT)))
+            fanout[(int.from_bytes(digest[:4], 'big') >> shift) + 1] += 1
+            count += 1
+            current = _bloom_block(digest, blocks)
+            if current != block:
+                bloom_buffer.append(OFFSET.pack(mask))
+                bloom_buffer.append(bytes(OFFSET.size * (current - block - 1)))
+                block, mask = current, 0
+            mask |= _bloom_mask(digest, BLOOM_HASHES)
+            if len(buffer) >= 65536:
+                out.write(b"".join(buffer))
+                bloom.write(b"".join(bloom_buffer))
+                buffer.clear()
+                bloom_buffer.clear()
+
+        for digest, times in entries:
+            if digest == previous:
+                previous_count += times
+                continue
+            if previous is not None:
+                emit(previous, previous_count)
+            previous, previous_count = digest, times
+        if previous is not None:
+            emit(previous, previous_count)
+        if count > capacity:
+            raise ValueError("条目数超过预计数量")
+        bloom_buffer.append(OFFSET.pack(mask))
+        bloom_buffer.append(bytes(OFFSET.size * (blocks - block - 1)))
+        out.write(b"".join(buffer))
+        bloom.write(b"".join(bloom_buffer))
+
+        # 每段的条目数累加为每段第一个条目的下标
+        for prefix in range(fanout_size):
+            fanout[prefix + 1] += fanout[prefix]
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, FORMAT_VERSION, FANOUT_BITS, count))
+        out.write(b"".join(OFFSET.pack(start) for start in fanout))
+        out.flush()
+        os.fsync(out.fileno())
+        bloom.flush()
+        os.fsync(bloom.fileno())
+    return count
+
+
+def build_database(source, output=BREACH_FILE):
+    """由下载的 HIBP SHA-1 列表生成泄露密码文件（先写临时文件，完成后替换），返回条目数"""
+    capacity = _count_lines(source)
+    directory = os.path.dirname(os.path.abspath(output))
+    temp_path = os.path.join(directory, f".{os.path.basename(output)}.tmp")
+    try:
+        try:
+            count = _write_database(_checked_sorted(_parse_lines(source)), temp_path, capacity)
+        except _UnsortedInput:
+            print("输入列表未按哈希排序，改为外部排序")
+            count = _write_database(_external_sort(source, directory), temp_path, capacity)
+        os.replace(temp_path + BLOOM_SUFFIX, output + BLOOM_SUFFIX)
+        os.replace(temp_path, output)
+    finally:
+        for path in (temp_path, temp_path + BLOOM_SUFFIX):
+            if os.path.exists(path):
+                os.remove(path)
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("用法: python -m auth.breach <HIBP SHA-1 列表> [输出文件]")
+        sys.exit(1)
+    output = sys.argv[2] if len(sys.argv) == 3 else BREACH_FILE
+    print(f"已生成泄露密码文件（{build_database(sys.argv[1], output)} 条）: {output}")
@@ -0,0 +1,222 @@
+# auth/domain.py
+# 网址规范化：从自由填写的网址中提取可注册域名（如 "https://www.github.com/login" -> "github.com"），
+# 以及按域名分组记录的索引
+#
+# 公共后缀使用随程序附带的离线公共后缀列表（auth/public_suffix_list.dat，来自 publicsuffix.org，
+# MPL-2.0）。更新时下载新的列表后运行 `python -m auth.domain 下载的文件` 重新生成精简版。
+
+import ipaddress
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+SUFFIX_LIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "public_suffix_list.dat")
+
+# [协议://][用户名@]主机名[:端口][/路径]，主机名之后必须是端口、路径或结尾
+_SCHEME = re.compile(r'[a-z][a-z0-9+.\-]*://')
+_HOST = re.compile(r'(?:[^@/?#\s]*@)?(\[[^\]/]*\]|[^:/?#\s]+)(?=[:/?#]|$)')
+_HOST_NAME = re.compile(r'[\w\-]+(?:\.[\w\-]+)*')
+
+_rules = None
+
+
+def _load_rules():
+    """读取公共后缀列表：(普通规则, 通配规则 "*.x" 中的 x, 例外规则 "!x" 中的 x)"""
+    global _rules
+    if _rules is None:
+        normal, wildcard, exception = set(), set(), set()
+        try:
+            with open(SUFFIX_LIST_FILE, encoding='utf-8') as f:
+                for line in f:
+                    rule = line.strip()
+                    if not rule or rule.startswith('//'):
+                        continue
+                    if rule.startswith('!'):
+                        exception.add(rule[1:])
+                    elif rule.startswith('*.'):
+                        wildcard.add(rule[2:])
+                    else:
+                        normal.add(rule)
+        except OSError as e:
+            # 缺少列表时只按最后一级域名作为公共后缀
+            print(f"读取公共后缀列表错误: {e}")
+        _rules = (normal, wildcard, exception)
+    return _rules
+
+
+def public_suffix(host):
+    """主机名的公共后缀（如 "www.example.com.cn" -> "com.cn"），按公共后缀列表的最长匹配规则"""
+    normal, wildcard, exception = _load_rules()
+    labels = host.split('.')
+    for i in range(len(labels)):
+        suffix = '.'.join(labels[i:])
+        if suffix in exception:
+            return '.'.join(labels[i + 1:])
+        if suffix in normal or (i + 1 < len(labels) and '.'.join(labels[i + 1:]) in wildcard):
+            return suffix
+    return labels[-1]
+
+
+def _decode_idna(host):
+    """把 punycode 形式的国际化域名（"xn--fsqu00a.xn--fiqs8s"）逐级转为 Unicode 形式（"例子.中国"），无效的部分原样保留"""
+    labels = host.split('.')
+    for i, label in enumerate(labels):
+        if label.startswith('xn--'):
+            try:
+                labels[i] = label.encode('ascii').decode('idna')
+            except UnicodeError:
+                pass
+    return '.'.join(labels)
+
+
+def extract_host(website):
+    """从自由填写的网址中取出主机名（小写，去掉协议、用户名、端口、路径和结尾的点），取不到返回 None
+
+    国际化域名统一为 Unicode 形式，句号 "。" 也作为分隔符。
+    """
+    text = website.strip()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text).replace('\u3002', '.')
+    text = text.lower()
+    scheme = _SCHEME.match(text)
+    match = _HOST.match(text, scheme.end() if scheme else 0)
+    if match is None:
+        return None
+    host = match.group(1).rstrip('.')
+    if 'xn--' in host:
+        host = _decode_idna(host)
+    return host or None
+
+
+@lru_cache(maxsize=65536)
+def canonical_domain(website):
+    """网址的规范域名（可注册域名），同一网站的不同写法得到同一结果
+
+    "https://www.github.com/login"、"github.com"、"GitHub.com:443" -> "github.com"；
+    IP 地址和单级主机名（如 "localhost"、"GitHub"）原样返回小写形式；无法识别时返回 None。
+    """
+    host = extract_host(website)
+    if host is None:
+        return None
+    if host[0].isdigit() or host[0] == '[':
+        try:
+            return str(ipaddress.ip_address(host.strip('[]')))
+        except ValueError:
+            pass
+    if not _HOST_NAME.fullmatch(host):
+        return None
+    labels = host.split('.')
+    if len(labels) == 1:
+        return host
+    suffix = public_suffix(host)
+    if suffix == host:
+        # 主机名本身就是公共后缀（如 "github.io"）
+        return host
+    return '.'.join(labels[-(suffix.count('.') + 2):])
+
+
+def domain_label(domain):
+    """规范域名去掉公共后缀后的部分（"github.com" -> "github"），用于匹配只写了名称的网址"""
+    suffix = public_suffix(domain) if '.' in domain else ''
+    if not suffix or suffix == domain:
+        return domain
+    return domain[:-len(suffix) - 1]
+
+
+def same_site(domain, other):
+    """两个规范域名是否属于同一网站（一方只写了名称时按名称比较）"""
+    if domain is None or other is None:
+        return False
+    if domain == other:
+        return True
+    if domain_label(domain) == domain:
+        return domain_label(other) == domain
+    return domain_label(domain) == other
+
+
+class DomainIndex:
+    """规范域名 -> 记录ID集合的索引（由调用方在记录变化时增量维护）
+
+    只写了名称的网址（如 "GitHub"）另外按名称归入同名域名（如 "github.com"）的分组。
+    """
+
+    def __init__(self):
+        self._ids = {}           # 规范域名 -> 记录ID集合
+        self._labels = {}        # 名称 -> 以它为名称的规范域名集合
+
+    def add(self, record_id, domain):
+        if domain is None:
+            return
+        holders = self._ids.get(domain)
+        if holders is None:
+            self._ids[domain] = {record_id}
+            self._labels.setdefault(domain_label(domain), set()).add(domain)
+        else:
+            holders.add(record_id)
+
+    def remove(self, record_id, domain):
+        holders = self._ids.get(domain)
+        if holders is None:
+            return
+        holders.discard(record_id)
+        if not holders:
+            del self._ids[domain]
+            label = domain_label(domain)
+            domains = self._labels[label]
+            domains.discard(domain)
+            if not domains:
+                del self._labels[label]
+
+    def domains_for(self, website):
+        """与网址属于同一网站的规范域名集合"""
+        domain = canonical_domain(website)
+        if domain is None:
+            return set()
+        domains = {domain}
+        label = domain_label(domain)
+        if label == domain:
+            # 只写了名称：找所有同名的域名
+            domains |= self._labels.get(label, set())
+        elif label in self._ids:
+            domains.add(label)
+        return domains
+
+    def lookup(self, website):
+        """与网址属于同一网站的记录ID集合"""
+        found = set()
+        for domain in self.domains_for(website):
+            found |= self._ids.get(domain, set())
+        return found
+
+    def groups(self):
+        """有多条记录的网站：规范域名 -> 记录ID集合（只写了名称的记录并入唯一的同名域名）"""
+        groups = {domain: set(ids) for domain, ids in self._ids.items() if '.' in domain}
+        for domain, ids in self._ids.items():
+            if '.' in domain:
+                continue
+            domains = self._labels.get(domain, set()) - {domain}
+            if len(domains) == 1:
+                groups[domains.pop()] |= ids
+            else:
+                groups[domain] = set(ids)
+        return {domain: ids for domain, ids in groups.items() if len(ids) > 1}
+
+
+def build_suffix_list(source, output=SUFFIX_LIST_FILE):
+    """由 publicsuffix.org 下载的完整列表生成精简版（保留许可证和版本说明，去掉其他注释）"""
+    with open(source, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    header = [line for line in lines[:12] if line.startswith('//')]
+    rules = [line.strip() for line in lines if line.strip() and not line.startswith('//')]
+    with open(output, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(header + rules) + '\n')
+    return output
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 2:
+        print("用法: python -m auth.domain public_suffix_list.dat")
+        sys.exit(1)
+    print(f"已生成公共后缀列表: {build_suffix_list(sys.argv[1])}")
@@ -0,0 +1,269 @@
+# auth/generator.py
+# 密码生成：按规则生成随机字符密码、易读密码（辅音元音交替）和多个单词组成的口令（diceware）
+#
+# 随机数全部来自 secrets（操作系统的安全随机源），一次读取一大块字节再逐个使用。把随机值映射到
+# 0..n-1 时丢弃落在 n 的整数倍之外的值（拒绝采样），每个字符、单词被选中的概率完全相同，没有取模偏差。
+# 单字节的映射用 bytes.translate 一次完成（查表并删除被拒绝的字节），批量生成（generate_many）时
+# 整批密码共用随机字节块，每秒可生成数十万个，供批量更换密码使用。
+#
+# 单词口令默认使用随程序附带的 EFF 长单词表（auth/eff_large_wordlist.txt，7776 个词，CC BY 3.0），
+# 也可以指定其他 diceware 格式（"11111 单词" 或每行一个词）的单词表。
+
+import math
+import os
+import secrets
+from array import array
+
+WORDLIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eff_large_wordlist.txt")
+
+LOWERCASE = "abcdefghijklmnopqrstuvwxyz"
+UPPERCASE = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+DIGITS = "0123456789"
+SYMBOLS = "!@#$%^&*()-_=+[]{};:,.?/~"
+# 容易看错的字符（排除后便于抄写）
+AMBIGUOUS = "Il1|O0o`'\""
+# 易读密码的音节：辅音 + 元音
+CONSONANTS = "bcdfghjkmnprstvwz"
+VOWELS = "aeiu"
+
+# 每次从随机源读取的字节数
+RANDOM_CHUNK = 4096
+
+_wordlists = {}
+
+
+class GeneratorPolicyError(ValueError):
+    """生成规则无法满足（如排除了某类字符的全部字符、长度小于要求的字符类数）"""
+
+
+def load_wordlist(path=WORDLIST_FILE):
+    """读取单词表（diceware 格式 "11111 单词" 或每行一个词，# 开头的行为注释），结果会被缓存"""
+    words = _wordlists.get(path)
+    if words is None:
+        words = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if not parts or parts[0].startswith('#'):
+                    continue
+                words.append(parts[-1])
+        words = list(dict.fromkeys(words))
+        if len(words) < 2:
+            raise GeneratorPolicyError(f"单词表中的词太少: {path}")
+        _wordlists[path] = words
+    return words
+
+
+class RandomSource:
+    """批量读取安全随机字节，以拒绝采样生成均匀的随机字符和下标（只在一个线程中使用）"""
+
+    def __init__(self, chunk_size=RANDOM_CHUNK, token_bytes=secrets.token_bytes):
+        self.chunk_size = chunk_size
+        self._token_bytes = token_bytes
+        self._buffer = b''
+        self._position = 0
+        self._tables = {}
+
+    def take(self, size):
+        """取 size 个随机字节"""
+        if size >= self.chunk_size:
+            return self._token_bytes(size)
+        if self._position + size > len(self._buffer):
+            self._buffer = self._buffer[self._position:] + self._token_bytes(self.chunk_size)
+            self._position = 0
+        start = self._position
+        self._position += size
+        return self._buffer[start:self._position]
+
+    def choices(self, alphabet, count):
+        """从 alphabet（不超过 256 个不同的 ASCII 字符）中均匀地随机取 count 个字符，返回字符串"""
+        tables = self._tables.get(alphabet)
+        if tables is None:
+            n = len(alphabet)
+            limit = 256 - 256 % n
+            # 字节 b < limit 映射为 alphabet[b % n]，其余字节删除
+            table = bytes(ord(alphabet[b % n]) if b < limit else 0 for b in range(256))
+            tables = self._tables[alphabet] = (table, bytes(range(limit, 256)), limit)
+        table, rejected, limit = tables
+        parts = []
+        found = 0
+        while found < count:
+            need = count - found
+            part = self.take(need + need * (256 - limit) // limit + 8).translate(table, rejected)
+            parts.append(part)
+            found += len(part)
+        return b''.join(parts)[:count].decode('ascii')
+
+    def indices(self, n, count):
+        """count 个 0..n-1 的均匀随机整数（n 不超过 65536）"""
+        if not 0 < n <= 0x10000:
+            raise ValueError(f"取值范围超出支持: {n}")
+        code, space = ('B', 0x100) if n <= 0x100 else ('H', 0x10000)
+        limit = space - space % n
+        values = []
+        while len(values) < count:
+            need = count - len(values)
+            raw = array(code)
+            raw.frombytes(self.take((need + need * (space - limit) // limit + 4) * raw.itemsize))
+            values.extend(value % n for value in raw if value < limit)
+        del values[count:]
+        return values
+
+    def below(self, n):
+        """一个 0..n-1 的均匀随机整数"""
+        return self.indices(n, 1)[0]
+
+
+class PasswordPolicy:
+    """密码生成规则
+
+    kind 为 RANDOM（随机字符，每类选中的字符至少出现一次）、PRONOUNCEABLE（辅音元音交替的易读密码，
+    按规则在末尾加数字和符号、首字母大写）或 PASSPHRASE（从单词表中随机取 words 个词，用 separator 连接）。
+    exclude 为不使用的字符，exclude_ambiguous 排除容易看错的字符（见 AMBIGUOUS）。
+    """
+
+    RANDOM = "random"
+    PRONOUNCEABLE = "pronounceable"
+    PASSPHRASE = "passphrase"
+
+    def __init__(self, kind=RANDOM, length=16, lowercase=True, uppercase=True, digits=True, symbols=True,
+                 exclude="", exclude_ambiguous=False, words=6, separator="-", capitalize=False,
+                 wordlist=WORDLIST_FILE):
+        self.kind = kind
+        self.length = length
+        self.lowercase = lowercase
+        self.uppercase = uppercase
+        self.digits = digits
+        self.symbols = symbols
+        self.exclude = exclude
+        self.exclude_ambiguous = exclude_ambiguous
+        self.words = words
+        self.separator = separator
+        self.capitalize = capitalize
+        self.wordlist = wordlist
+
+    def _allowed(self, characters):
+        excluded = set(self.exclude) | (set(AMBIGUOUS) if self.exclude_ambiguous else set())
+        return ''.join(c for c in characters if c not in excluded)
+
+    def character_classes(self):
+        """随机字符密码使用的各类字符（已去掉排除的字符），每类至少出现一次"""
+        classes = []
+        for enabled, name, characters in ((self.lowercase, "小写字母", LOWERCASE),
+                                          (self.uppercase, "大写字母", UPPERCASE),
+                                          (self.digits, "数字", DIGITS),
+                                          (self.symbols, "符号", SYMBOLS)):
+            if not enabled:
+                continue
+            allowed = self._allowed(characters)
+            if not allowed:
+                raise GeneratorPolicyError(f"{name}已被全部排除")
+            classes.append(allowed)
+        if not classes:
+            raise GeneratorPolicyError("至少需要选择一类字符")
+        if self.length < len(classes):
+            raise GeneratorPolicyError(f"长度至少为 {len(classes)}（每类字符至少出现一次）")
+        return classes
+
+    def _pronounceable_parts(self):
+        """易读密码的组成：(辅音, 元音, 字母部分长度, 数字字符集或 None, 符号字符集或 None)"""
+        consonants, vowels = self._allowed(CONSONANTS), self._allowed(VOWELS)
+        if not consonants or not vowels:
+            raise GeneratorPolicyError("辅音或元音已被全部排除")
+        digits = self._allowed(DIGITS) if self.digits else None
+        symbols = self._allowed(SYMBOLS) if self.symbols else None
+        if digits == "" or symbols == "":
+            raise GeneratorPolicyError("数字或符号已被全部排除")
+        letters = self.length - (2 if digits else 0) - (1 if symbols else 0)
+        if letters < 2:
+            raise GeneratorPolicyError("长度太短")
+        return consonants, vowels, letters, digits, symbols
+
+    def entropy(self):
+        """按该规则生成的密码的熵（比特）：所有可能结果数的以 2 为底的对数"""
+        if self.kind == self.PASSPHRASE:
+            return self.words * math.log2(len(load_wordlist(self.wordlist)))
+        if self.kind == self.PRONOUNCEABLE:
+            consonants, vowels, letters, digits, symbols = self._pronounceable_parts()
+            bits = (letters + 1) // 2 * math.log2(len(consonants)) + letters // 2 * math.log2(len(vowels))
+            if digits:
+                bits += 2 * math.log2(len(digits))
+            if symbols:
+                bits += math.log2(len(symbols))
+            return bits
+        # 每类至少出现一次：按容斥原理计算满足要求的字符串个数
+        classes = self.character_classes()
+        total = sum(len(c) for c in classes)
+        count = 0
+        for mask in range(1 << len(classes)):
+            missing = sum(len(c) for bit, c in enumerate(classes) if mask >> bit & 1)
+            count += (-1) ** bin(mask).count('1') * (total - missing) ** self.length
+        return math.log2(count)
+
+    def generate(self, source=None):
+        """生成一个密码"""
+        return self.generate_many(1, source)[0]
+
+    def generate_many(self, count, source=None):
+        """批量生成 count 个密码（共用随机字节块）"""
+        source = source or RandomSource()
+        if self.kind == self.PASSPHRASE:
+            return self._passphrases(count, source)
+        if self.kind == self.PRONOUNCEABLE:
+            return self._pronounceable(count, source)
+        return self._random(count, source)
+
+    def _random(self, count, source):
+        classes = self.character_classes()
+        alphabet = ''.join(classes)
+        required = [frozenset(c) for c in classes] if len(classes) > 1 else []
+        length = self.length
+        passwords = []
+        while len(passwords) < count:
+            # 缺少某类字符的密码整个丢弃重取，保证在满足要求的密码中均匀分布
+            need = count - len(passwords)
+            text = source.choices(alphabet, need * length)
+            for start in range(0, need * length, length):
+                password = text[start:start + length]
+                if all(not c.isdisjoint(password) for c in required):
+                    passwords.append(password)
+        return passwords
+
+    def _pronounceable(self, count, source):
+        consonants, vowels, letters, digits, symbols = self._pronounceable_parts()
+        consonant_count, vowel_count = (letters + 1) // 2, letters // 2
+        consonant_text = source.choices(consonants, count * consonant_count)
+        vowel_text = source.choices(vowels, count * vowel_count)
+        digit_text = source.choices(digits, count * 2) if digits else ""
+        symbol_text = source.choices(symbols, count) if symbols else ""
+        passwords = []
+        for number in range(count):
+            chars = [None] * letters
+            chars[::2] = consonant_text[number * consonant_count:(number + 1) * consonant_count]
+            chars[1::2] = vowel_text[number * vowel_count:(number + 1) * vowel_count]
+            if self.uppercase:
+                chars[0] = chars[0].upper()
+            password = ''.join(chars) + digit_text[number * 2:number * 2 + 2] + symbol_text[number:number + 1]
+            passwords.append(password)
+        return passwords
+
+    def _passphrases(self, count, source):
+        if self.words < 1:
+            raise GeneratorPolicyError("单词数至少为 1")
+        words = load_wordlist(self.wordlist)
+        if self.capitalize:
+            words = [word[:1].upper() + word[1:] for word in words]
+        picks = source.indices(len(words), count * self.words)
+        size = self.words
+        join = self.separator.join
+        return [join([words[i] for i in picks[start:start + size]]) for start in range(0, count * size, size)]
+
+
+def generate_password(policy=None):
+    """按规则（默认 16 位随机字符）生成一个密码"""
+    return (policy or PasswordPolicy()).generate()
+
+
+def generate_passwords(count, policy=None):
+    """按规则批量生成 count 个密码"""
+    return (policy or PasswordPolicy()).generate_many(count)
@@ -0,0 +1,218 @@
+# auth/history.py
+# 记录的修改历史：密码库文件旁的 "<文件名>.history" 中逐行追加的变更
+#
+# 每行一个 JSON 对象 {"id": 记录ID, "time": 整数时间戳, "reason": 原因, "old": {字段: 修改前的值}}，
+# 只保存有变化的字段的旧值（差量，新版本中删除的字段旧值为 None）。写入时只追加新的行，不重写整个文件，
+# 由密码库在保存记录的同一次提交中、写入记录文件之前追加。
+#
+# 每条记录最多保留 MAX_ENTRIES 条、MAX_AGE 秒之内的历史：读取时按此过滤，保存时在需要时重写文件，
+# 丢弃超出范围的行和已删除记录的历史（重写不保留上一代文件，旧密码不会残留在 .bak 中）。
+# 重写需要读出整个文件，不在每次保存时进行：距上次重写（或打开密码库）超过 COMPACT_INTERVAL 秒、
+# 或文件比上次重写（或打开）时增长了一倍以上时才检查并重写。
+# 加载密码库时不读取历史文件；第一次查看某条记录的历史时
+# 才扫描一遍文件，建立 记录ID -> 行偏移 的索引（只取出每行开头的 ID，不解析整行），之后只解析
+# 该记录的那几行，文件追加后只为新增的部分补充索引。
+
+import os
+import re
+import json
+import time
+
+from .storage import atomic_write_bytes, backup_path
+
+HISTORY_SUFFIX = ".history"
+
+# 每条记录保留的历史条数和时长
+MAX_ENTRIES = 20
+MAX_AGE = 365 * 24 * 3600
+# 文件超过该大小、且是上次重写后（或打开时）大小的两倍时，即使没有需要丢弃的历史也重写（合并追加的碎片）
+COMPACT_SIZE = 256 * 1024
+# 两次按保留范围检查并重写之间的最短间隔（秒）
+COMPACT_INTERVAL = 3600
+
+# 修改原因
+REASON_EDIT = "edit"
+REASON_ROTATION = "rotation"
+REASON_UNDO = "undo"
+REASON_REDO = "redo"
+
+_LINE_ID = re.compile(rb'\{"id": "((?:[^"\\]|\\.)*)"')
+
+
+def history_path(path):
+    """密码库文件对应的历史文件路径"""
+    return path + HISTORY_SUFFIX
+
+
+def field_changes(old, new, ignore=('timestamp',)):
+    """两个版本的记录之间变化的字段：字段 -> 旧值（旧版本没有的字段为 None）"""
+    changes = {}
+    for key in dict.fromkeys([*old.keys(), *new.keys()]):
+        if key in ignore:
+            continue
+        value = old.get(key)
+        if value != new.get(key):
+            changes[key] = value
+    return changes
+
+
+def make_entry(record_id, changes, reason, when):
+    """一条历史：记录 record_id 在时间 when 因 reason 被修改，changes 为变化字段的旧值"""
+    return {'id': record_id, 'time': when, 'reason': reason, 'old': changes}
+
+
+def _encode(entries):
+    return ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries).encode('utf-8')
+
+
+class HistoryLog:
+    """追加写入的修改历史文件
+
+    append / compact 由保存线程在文件锁内调用；read 在界面线程中调用，不加锁
+    （文件只追加或整体替换，正在追加的不完整行会被跳过，整体替换后索引自动重建）。
+    """
+
+    def __init__(self, path, max_entries=MAX_ENTRIES, max_age=MAX_AGE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._offsets = None       # 记录ID -> 行偏移列表，第一次读取时建立
+        self._indexed = 0          # 已建立索引的文件长度
+        self._identity = None      # 建立索引时文件的 (设备, inode)，文件被替换后重建
+        self._compacted_size = None  # 上次重写后的文件大小，第一次检查时取当时的大小
+        self._compacted_at = time.time()  # 上次重写的时间，本进程还没有重写过时为打开的时间
+        self._counts = None        # 记录ID -> 文件中的历史条数，本进程第一次重写后才知道
+        self._oldest = None        # 文件中最早一条历史的时间
+
+    def append(self, entries):
+        """追加若干条历史并同步到磁盘"""
+        if not entries:
+            return
+        with open(self.path, 'ab') as f:
+            f.write(_encode(entries))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._counts is not None:
+            for entry in entries:
+                self._counts[entry['id']] = self._counts.get(entry['id'], 0) + 1
+            if self._oldest is None:
+                self._oldest = min(entry.get('time', 0) for entry in entries)
+
+    def _update_index(self, f):
+        """为文件中尚未索引的完整行补充索引"""
+        stat = os.fstat(f.fileno())
+        identity = (stat.st_dev, stat.st_ino)
+        if self._offsets is None or identity != self._identity or stat.st_size < self._indexed:
+            self._offsets = {}
+            self._indexed = 0
+            self._identity = identity
+        f.seek(self._indexed)
+        offset = self._indexed
+        offsets = self._offsets
+        match_id = _LINE_ID.match
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            match = match_id(line)
+            if match is not None:
+                raw = match.group(1)
+                record_id = json.loads(b'"' + raw + b'"') if b'\\' in raw else raw.decode('utf-8')
+                positions = offsets.get(record_id)
+                if positions is None:
+                    offsets[record_id] = [offset]
+                else:
+                    positions.append(offset)
+            offset += len(line)
+        self._indexed = offset
+
+    def bounded(self, entries, now=None):
+        """按保留条数和时长过滤（entries 按时间顺序）"""
+        cutoff = (now or time.time()) - self.max_age
+        entries = [entry for entry in entries if entry.get('time', 0) >= cutoff]
+        return entries[-self.max_entries:]
+
+    def read(self, record_id):
+        """按时间顺序读取一条记录保留范围内的历史，文件不存在时为空"""
+        try:
+            with open(self.path, 'rb') as f:
+                self._update_index(f)
+                entries = []
+                for offset in self._offsets.get(record_id, ())[-self.max_entries:]:
+                    f.seek(offset)
+                    try:
+                        entry = json.loads(f.readline())
+                    except ValueError:
+                        continue
+                    if isinstance(entry, dict) and entry.get('id') == record_id:
+                        entries.append(entry)
+        except FileNotFoundError:
+            return []
+        return self.bounded(entries)
+
+    def read_all(self):
+        """按时间顺序读取文件中的全部历史（不过滤）"""
+        entries = []
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(entry, dict) and 'id' in entry:
+                        entries.append(entry)
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def needs_compact(self, live_ids=None, now=None):
+        """是否需要重写：文件增长到 COMPACT_SIZE 以上、且为上次重写后的两倍；或距上次重写已过
+        COMPACT_INTERVAL，且有记录超出保留条数、有历史超出保留时长、有已删除记录（不在 live_ids 中）的历史
+        （本进程还没有重写过时不知道文件内容，视为需要）"""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+        if self._compacted_size is None:
+            self._compacted_size = size
+        if size >= COMPACT_SIZE and size >= 2 * self._compacted_size:
+            return True
+        now = now or time.time()
+        if now - self._compacted_at < COMPACT_INTERVAL:
+            return False
+        if self._counts is None:
+            return True
+        if any(count > self.max_entries for count in self._counts.values()):
+            return True
+        if self._oldest is not None and self._oldest < now - self.max_age:
+            return True
+        return live_ids is not None and not live_ids.issuperset(self._counts)
+
+    def compact(self, live_ids=None, force=False):
+        """需要时重写文件，只保留每条记录保留范围内的历史；给出 live_ids 时丢弃其他记录的历史
+
+        不保留上一代文件（已丢弃的旧密码不应留在磁盘上），返回是否重写。
+        """
+        now = time.time()
+        if not force and not self.needs_compact(live_ids, now):
+            return False
+        by_record = {}
+        for entry in self.read_all():
+            if live_ids is None or entry['id'] in live_ids:
+                by_record.setdefault(entry['id'], []).append(entry)
+        kept = [entry for entries in by_record.values() for entry in self.bounded(entries, now)]
+        kept.sort(key=lambda entry: entry.get('time', 0))
+        content = _encode(kept)
+        atomic_write_bytes(self.path, content, keep_backup=False)
+        # 旧版本重写时保留过上一代文件，其中可能还有已丢弃的历史
+        try:
+            os.remove(backup_path(self.path))
+        except FileNotFoundError:
+            pass
+        self._compacted_size = len(content)
+        self._compacted_at = now
+        self._counts = {}
+        for entry in kept:
+            self._counts[entry['id']] = self._counts.get(entry['id'], 0) + 1
+        self._oldest = kept[0].get('time', 0) if kept else None
+        return True
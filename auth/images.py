@@ -0,0 +1,117 @@
+# auth/images.py
+# 异步图片加载：在线程池中用 QImageReader 解码，界面线程只接收解码好的图片
+#
+# 调用方先显示占位内容，图片就绪后由回调替换；窗口构造不会因为解码图片而阻塞。
+
+from PySide6 import QtCore, QtGui
+
+
+def read_image(path, size=None, mode=QtCore.Qt.AspectRatioMode.KeepAspectRatio):
+    """解码图片（可在后台线程调用）；给出 size 时在解码阶段直接缩小到 size x size"""
+    reader = QtGui.QImageReader(path)
+    reader.setAutoTransform(True)
+    if size:
+        source = reader.size()
+        if source.isValid() and (source.width() > size or source.height() > size):
+            reader.setScaledSize(source.scaled(size, size, mode))
+    return reader.read()
+
+
+class _TaskSignals(QtCore.QObject):
+    """后台任务完成信号（属于界面线程，从工作线程发出时自动排队）"""
+    finished = QtCore.Signal(int, object)
+    failed = QtCore.Signal(int, str)
+
+
+class _Task(QtCore.QRunnable):
+    """在线程池中执行的任务"""
+    def __init__(self, request_id, func, signals):
+        super().__init__()
+        self.request_id = request_id
+        self.func = func
+        self.signals = signals
+
+    def run(self):
+        try:
+            result = self.func()
+        except Exception as e:
+            print(f"后台图片任务错误: {e}")
+            self.signals.failed.emit(self.request_id, str(e))
+            return
+        self.signals.finished.emit(self.request_id, result)
+
+
+class ImageLoader(QtCore.QObject):
+    """异步图片加载器：后台执行解码任务，完成后在界面线程调用回调
+
+    同一 tag 的新请求会取代尚未完成的旧请求（旧请求的结果被丢弃）；
+    任务在加载器自己的线程池中执行，程序退出或窗口关闭时由 shutdown 等待其结束；
+    加载器随父窗口销毁时线程池先于信号对象销毁（会等待任务结束），未完成请求的回调不再执行。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._next_id = 0
+        self._pending = {}
+        self._latest = {}
+        # 线程池须先于信号对象创建：子对象按创建顺序销毁
+        self._pool = QtCore.QThreadPool(self)
+        self._signals = _TaskSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def submit(self, func, callback, on_error=None, tag=None):
+        """在后台线程执行 func()，完成后在界面线程调用 callback(结果)"""
+        self._next_id += 1
+        request_id = self._next_id
+        self._pending[request_id] = (callback, on_error, tag)
+        if tag is not None:
+            self._latest[tag] = request_id
+        self._pool.start(_Task(request_id, func, self._signals))
+        return request_id
+
+    def shutdown(self):
+        """丢弃未完成的请求（不再回调），取消尚未开始的任务并等待正在执行的任务结束"""
+        self._pending.clear()
+        self._latest.clear()
+        self._pool.clear()
+        self._pool.waitForDone()
+
+    def load(self, path, size, callback, mode=QtCore.Qt.AspectRatioMode.KeepAspectRatio, transform=None, tag=None):
+        """后台解码图片并缩小到 size，完成后以 QPixmap 调用 callback；解码失败时不回调
+
+        transform 为可选的 QImage -> QImage 处理函数，同样在后台线程执行。
+        """
+        def decode():
+            image = read_image(path, size, mode)
+            if image.isNull():
+                raise ValueError(f"无法读取图片: {path}")
+            return transform(image) if transform else image
+
+        return self.submit(decode, lambda image: callback(QtGui.QPixmap.fromImage(image)), tag=tag)
+
+    def _take(self, request_id):
+        entry = self._pending.pop(request_id, None)
+        if entry is None:
+            return None
+        tag = entry[2]
+        if tag is not None:
+            if self._latest.get(tag) != request_id:
+                return None
+            del self._latest[tag]
+        return entry
+
+    @QtCore.Slot(int, object)
+    def _on_finished(self, request_id, result):
+        entry = self._take(request_id)
+        if entry is not None:
+            entry[0](result)
+
+    @QtCore.Slot(int, str)
+    def _on_failed(self, request_id, message):
+        entry = self._take(request_id)
+        if entry is not None and entry[1] is not None:
+            entry[1](message)
@@ -10,27 +10,24 @@ import base64
 import shutil
 from datetime import datetime
 
+from .storage import WriteBehindSaver
+from .vault import Vault, new_record_id, compact_records
+from .record import Record
+from .style import apply_app_style, set_state, set_button_style
+from .avatar import show_avatar, find_avatar, save_thumbnail
+from .images import ImageLoader
+from .resources import set_window_icon
+from .search import DEFAULT_LIMIT, SearchThread, display_name
+from .query import QuerySyntaxError, parse_query
+from .similarity import SimilarityThread
+from .generator import GeneratorPolicyError, PasswordPolicy
+from .undo import EditCommand, UndoConflictError, UndoStack
+
 class RefreshButton(QtWidgets.QPushButton):
     """刷新按钮：带有刷新图标"""
     def __init__(self):
         super().__init__()
-        self.setStyleSheet("""
-            QPushButton {
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                background-color: white;
-                min-width: 30px;
-                min-height: 30px;
-                max-width: 30px;
-                max-height: 30px;
-                color: #6b7280;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-                color: #3b82f6;
-            }
-        """)
+        self.setObjectName("iconButton")
         self.setText("↻")
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
         self.setToolTip("刷新页面")
@@ -49,38 +46,27 @@ class ImportDataDialog(QtWidgets.QDialog):
         
         # 标题
         title = QtWidgets.QLabel("请拖入以下文件或文件夹进行导入：")
-        title.setStyleSheet("font-size: 16px; font-weight: bold;")
+        title.setObjectName("dialogHeading")
         layout.addWidget(title)
         
         # 支持的文件列表
         supported_files = QtWidgets.QLabel("• users.json\n• SecurePassData (文件夹)\n• remember_me.json")
-        supported_files.setStyleSheet("font-size: 14px; color: #6b7280; margin: 10px 0;")
+        supported_files.setObjectName("dialogHint")
         layout.addWidget(supported_files)
         
         # 拖放区域
         self.drop_area = QtWidgets.QWidget()
-        self.drop_area.setStyleSheet("""
-            QWidget {
-                border: 2px dashed #d1d5db;
-                border-radius: 10px;
-                background-color: #f9fafb;
-                min-height: 200px;
-            }
-            QWidget:hover {
-                border-color: #3b82f6;
-                background-color: #eff6ff;
-            }
-        """)
+        self.drop_area.setObjectName("dropArea")
         
         drop_layout = QtWidgets.QVBoxLayout(self.drop_area)
         drop_layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
         
         drop_icon = QtWidgets.QLabel("📁")
-        drop_icon.setStyleSheet("font-size: 48px;")
+        drop_icon.setObjectName("dropIcon")
         drop_layout.addWidget(drop_icon)
         
         drop_text = QtWidgets.QLabel("将文件或文件夹拖放到此处")
-        drop_text.setStyleSheet("font-size: 14px; color: #6b7280;")
+        drop_text.setObjectName("mutedText")
         drop_layout.addWidget(drop_text)
         
         layout.addWidget(self.drop_area)
@@ -91,41 +77,17 @@ class ImportDataDialog(QtWidgets.QDialog):
         
         # 状态标签
         self.status_label = QtWidgets.QLabel("")
-        self.status_label.setStyleSheet("font-size: 12px; color: #6b7280;")
+        self.status_label.setObjectName("statusLabel")
         layout.addWidget(self.status_label)
         
         # 按钮
         button_layout = QtWidgets.QHBoxLayout()
         self.import_btn = QtWidgets.QPushButton("选择文件导入")
-        self.import_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3b82f6;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 20px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #2563eb;
-            }
-        """)
+        set_button_style(self.import_btn, "primary", "medium")
         self.import_btn.clicked.connect(self.select_files)
         
         self.cancel_btn = QtWidgets.QPushButton("取消")
-        self.cancel_btn.setStyleSheet("""
-            QPushButton {
-                background-color: white;
-                color: #6b7280;
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                padding: 10px 20px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-            }
-        """)
+        set_button_style(self.cancel_btn, "outline", "medium")
         self.cancel_btn.clicked.connect(self.reject)
         
         button_layout.addWidget(self.import_btn)
@@ -200,7 +162,7 @@ class ImportDataDialog(QtWidgets.QDialog):
             
             if imported_files:
                 self.status_label.setText(f"成功导入：{', '.join(imported_files)}")
-                self.status_label.setStyleSheet("font-size: 12px; color: #10b981;")
+                set_state(self.status_label, "state", "success")
                 
                 # 提示重启应用以应用更改
                 reply = QtWidgets.QMessageBox.question(
@@ -215,10 +177,10 @@ class ImportDataDialog(QtWidgets.QDialog):
                     QtWidgets.QApplication.exec()
             else:
                 self.status_label.setText("未找到可导入的有效文件")
-                self.status_label.setStyleSheet("font-size: 12px; color: #ef4444;")
+                set_state(self.status_label, "state", "error")
         except Exception as e:
             self.status_label.setText(f"导入失败：{str(e)}")
-            self.status_label.setStyleSheet("font-size: 12px; color: #ef4444;")
+            set_state(self.status_label, "state", "error")
 
 
 class VersionInfoDialog(QtWidgets.QDialog):
@@ -234,7 +196,7 @@ class VersionInfoDialog(QtWidgets.QDialog):
         
         # 标题
         title = QtWidgets.QLabel("安密库 (SecurePass) v1.0.0")
-        title.setStyleSheet("font-size: 24px; font-weight: bold; color: #3b82f6; margin-bottom: 20px;")
+        title.setObjectName("versionTitle")
         layout.addWidget(title)
         
         # 内容区域
@@ -243,13 +205,13 @@ class VersionInfoDialog(QtWidgets.QDialog):
         
         # 介绍
         intro = QtWidgets.QLabel("安密库是一款安全、易用的密码管理工具，帮助您存储和管理各类账户密码信息。")
-        intro.setStyleSheet("font-size: 14px; margin-bottom: 20px;")
+        intro.setObjectName("versionIntro")
         intro.setWordWrap(True)
         content_layout.addWidget(intro)
         
         # 功能介绍
         features = QtWidgets.QLabel("主要功能：")
-        features.setStyleSheet("font-size: 16px; font-weight: bold; margin-bottom: 10px;")
+        features.setObjectName("versionHeading")
         content_layout.addWidget(features)
         
         features_list = [
@@ -263,17 +225,18 @@ class VersionInfoDialog(QtWidgets.QDialog):
         
         for feature in features_list:
             feature_label = QtWidgets.QLabel(feature)
-            feature_label.setStyleSheet("font-size: 14px; margin-bottom: 5px;")
+            feature_label.setObjectName("versionFeature")
             content_layout.addWidget(feature_label)
         
         # 使用指南
         guide = QtWidgets.QLabel("使用指南：")
-        guide.setStyleSheet("font-size: 16px; font-weight: bold; margin-top: 30px; margin-bottom: 10px;")
+        guide.setObjectName("versionHeading")
+        guide.setProperty("spaced", True)
         content_layout.addWidget(guide)
         
         # 注册指南
         register_guide = QtWidgets.QLabel("注册流程：")
-        register_guide.setStyleSheet("font-size: 14px; font-weight: bold; margin-bottom: 5px;")
+        register_guide.setObjectName("versionSubheading")
         content_layout.addWidget(register_guide)
         
         register_steps = [
@@ -285,12 +248,12 @@ class VersionInfoDialog(QtWidgets.QDialog):
         
         for step in register_steps:
             step_label = QtWidgets.QLabel(step)
-            step_label.setStyleSheet("font-size: 14px; margin-bottom: 3px; margin-left: 20px;")
+            step_label.setObjectName("versionStep")
             content_layout.addWidget(step_label)
         
         # 登录指南
         login_guide = QtWidgets.QLabel("\n登录流程：")
-        login_guide.setStyleSheet("font-size: 14px; font-weight: bold; margin-bottom: 5px;")
+        login_guide.setObjectName("versionSubheading")
         content_layout.addWidget(login_guide)
         
         login_steps = [
@@ -302,12 +265,12 @@ class VersionInfoDialog(QtWidgets.QDialog):
         
         for step in login_steps:
             step_label = QtWidgets.QLabel(step)
-            step_label.setStyleSheet("font-size: 14px; margin-bottom: 3px; margin-left: 20px;")
+            step_label.setObjectName("versionStep")
             content_layout.addWidget(step_label)
         
         # 使用指南
         usage_guide = QtWidgets.QLabel("\n使用方法：")
-        usage_guide.setStyleSheet("font-size: 14px; font-weight: bold; margin-bottom: 5px;")
+        usage_guide.setObjectName("versionSubheading")
         content_layout.addWidget(usage_guide)
         
         usage_steps = [
@@ -320,7 +283,7 @@ class VersionInfoDialog(QtWidgets.QDialog):
         
         for step in usage_steps:
             step_label = QtWidgets.QLabel(step)
-            step_label.setStyleSheet("font-size: 14px; margin-bottom: 3px; margin-left: 20px;")
+            step_label.setObjectName("versionStep")
             content_layout.addWidget(step_label)
         
         content_layout.addStretch()
@@ -333,19 +296,8 @@ class VersionInfoDialog(QtWidgets.QDialog):
         
         # 关闭按钮
         self.close_btn = QtWidgets.QPushButton("关闭")
-        self.close_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3b82f6;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 40px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #2563eb;
-            }
-        """)
+        self.close_btn.setObjectName("closeButton")
+        set_button_style(self.close_btn, "primary", "medium")
         self.close_btn.clicked.connect(self.accept)
         
         button_layout = QtWidgets.QHBoxLayout()
@@ -361,22 +313,7 @@ class ImportButton(QtWidgets.QPushButton):
     """导入按钮"""
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setStyleSheet("""
-            QPushButton {
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                background-color: white;
-                min-width: 80px;
-                min-height: 30px;
-                color: #6b7280;
-                font-size: 12px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-                color: #3b82f6;
-            }
-        """)
+        self.setObjectName("toolbarButton")
         self.setText("导入")
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
         self.setToolTip("导入用户数据")
@@ -385,22 +322,7 @@ class ExportButton(QtWidgets.QPushButton):
     """导出按钮"""
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setStyleSheet("""
-            QPushButton {
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                background-color: white;
-                min-width: 80px;
-                min-height: 30px;
-                color: #6b7280;
-                font-size: 12px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-                color: #3b82f6;
-            }
-        """)
+        self.setObjectName("toolbarButton")
         self.setText("导出")
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
         self.setToolTip("导出用户数据")
@@ -409,22 +331,7 @@ class VersionButton(QtWidgets.QPushButton):
     """版本信息按钮"""
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setStyleSheet("""
-            QPushButton {
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                background-color: white;
-                min-width: 100px;
-                min-height: 30px;
-                color: #6b7280;
-                font-size: 12px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-                color: #3b82f6;
-            }
-        """)
+        self.setObjectName("toolbarButton")
         self.setText("版本 v1.0.0")
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
         self.setToolTip("查看版本信息")
@@ -443,51 +350,32 @@ class ExportDataDialog(QtWidgets.QDialog):
         
         # 标题
         title = QtWidgets.QLabel("导出用户数据")
-        title.setStyleSheet("font-size: 16px; font-weight: bold;")
+        title.setObjectName("dialogHeading")
         layout.addWidget(title)
         
         # 说明文字
         description = QtWidgets.QLabel("导出以下文件到指定位置：")
-        description.setStyleSheet("font-size: 14px; color: #6b7280; margin: 10px 0;")
+        description.setObjectName("dialogHint")
         layout.addWidget(description)
         
         # 文件列表
         files_list = QtWidgets.QLabel("• users.json\n• SecurePassData (文件夹)\n• remember_me.json")
-        files_list.setStyleSheet("font-size: 14px; color: #6b7280; margin: 10px 0;")
+        files_list.setObjectName("dialogHint")
         layout.addWidget(files_list)
         
         # 导出路径选择
         path_layout = QtWidgets.QHBoxLayout()
         path_label = QtWidgets.QLabel("导出到：")
-        path_label.setStyleSheet("font-size: 14px;")
+        path_label.setObjectName("fieldLabel")
         path_layout.addWidget(path_label)
         
         self.path_edit = QtWidgets.QLineEdit()
         self.path_edit.setPlaceholderText("选择导出路径")
-        self.path_edit.setStyleSheet("""
-            QLineEdit {
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                padding: 8px 12px;
-                font-size: 14px;
-            }
-        """)
+        self.path_edit.setObjectName("pathInput")
         path_layout.addWidget(self.path_edit)
         
         self.browse_btn = QtWidgets.QPushButton("浏览")
-        self.browse_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3b82f6;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 8px 16px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #2563eb;
-            }
-        """)
+        set_button_style(self.browse_btn, "primary", "small")
         self.browse_btn.clicked.connect(self.browse_path)
         path_layout.addWidget(self.browse_btn)
         
@@ -495,41 +383,17 @@ class ExportDataDialog(QtWidgets.QDialog):
         
         # 状态标签
         self.status_label = QtWidgets.QLabel("")
-        self.status_label.setStyleSheet("font-size: 12px; color: #6b7280;")
+        self.status_label.setObjectName("statusLabel")
         layout.addWidget(self.status_label)
         
         # 按钮
         button_layout = QtWidgets.QHBoxLayout()
         self.export_btn = QtWidgets.QPushButton("导出数据")
-        self.export_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #10b981;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 20px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #059669;
-            }
-        """)
+        set_button_style(self.export_btn, "success", "medium")
         self.export_btn.clicked.connect(self.export_data)
         
         self.cancel_btn = QtWidgets.QPushButton("取消")
-        self.cancel_btn.setStyleSheet("""
-            QPushButton {
-                background-color: white;
-                color: #6b7280;
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                padding: 10px 20px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-            }
-        """)
+        set_button_style(self.cancel_btn, "outline", "medium")
         self.cancel_btn.clicked.connect(self.reject)
         
         button_layout.addWidget(self.export_btn)
@@ -554,7 +418,7 @@ class ExportDataDialog(QtWidgets.QDialog):
         
         if not export_path:
             self.status_label.setText("请选择导出路径")
-            self.status_label.setStyleSheet("font-size: 12px; color: #ef4444;")
+            set_state(self.status_label, "state", "error")
             return
         
         try:
@@ -580,7 +444,7 @@ class ExportDataDialog(QtWidgets.QDialog):
             
             if exported_files:
                 self.status_label.setText(f"成功导出：{', '.join(exported_files)}")
-                self.status_label.setStyleSheet("font-size: 12px; color: #10b981;")
+                set_state(self.status_label, "state", "success")
                 
                 # 提示用户
                 QtWidgets.QMessageBox.information(
@@ -589,10 +453,10 @@ class ExportDataDialog(QtWidgets.QDialog):
                 )
             else:
                 self.status_label.setText("未找到可导出的数据文件")
-                self.status_label.setStyleSheet("font-size: 12px; color: #ef4444;")
+                set_state(self.status_label, "state", "error")
         except Exception as e:
             self.status_label.setText(f"导出失败：{str(e)}")
-            self.status_label.setStyleSheet("font-size: 12px; color: #ef4444;")
+            set_state(self.status_label, "state", "error")
 
 
 class UserProfileDialog(QtWidgets.QDialog):
@@ -603,6 +467,7 @@ class UserProfileDialog(QtWidgets.QDialog):
         self.parent_window = parent
         self.setWindowTitle("用户资料 - 安密库")
         self.resize(450, 500)
+        self.image_loader = ImageLoader(self)
         self.setup_ui()
         self.load_user_info()
         
@@ -614,7 +479,7 @@ class UserProfileDialog(QtWidgets.QDialog):
         # 标题
         title_label = QtWidgets.QLabel("用户资料")
         title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        title_label.setStyleSheet("font-size: 24px; font-weight: bold; color: #111827;")
+        title_label.setObjectName("pageTitle")
         layout.addWidget(title_label)
         
         # 头像区域
@@ -624,13 +489,7 @@ class UserProfileDialog(QtWidgets.QDialog):
         # 头像显示
         self.avatar_label = QtWidgets.QLabel()
         self.avatar_label.setFixedSize(120, 120)
-        self.avatar_label.setStyleSheet("""
-            QLabel {
-                border: 3px solid #d1d5db;
-                border-radius: 60px;
-                background-color: #f9fafb;
-            }
-        """)
+        self.avatar_label.setObjectName("profileAvatar")
         self.avatar_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
         avatar_layout.addWidget(self.avatar_label)
         
@@ -638,35 +497,11 @@ class UserProfileDialog(QtWidgets.QDialog):
         avatar_buttons_layout = QtWidgets.QHBoxLayout()
         
         self.upload_btn = QtWidgets.QPushButton("上传头像")
-        self.upload_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3b82f6;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 8px 16px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #2563eb;
-            }
-        """)
+        set_button_style(self.upload_btn, "primary", "small")
         self.upload_btn.clicked.connect(self.upload_avatar)
         
         self.clear_btn = QtWidgets.QPushButton("清除头像")
-        self.clear_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #6b7280;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 8px 16px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #4b5563;
-            }
-        """)
+        set_button_style(self.clear_btn, "secondary", "small")
         self.clear_btn.clicked.connect(self.clear_avatar)
         
         avatar_buttons_layout.addWidget(self.upload_btn)
@@ -681,12 +516,12 @@ class UserProfileDialog(QtWidgets.QDialog):
         
         # 用户名
         self.username_label = QtWidgets.QLabel(self.username)
-        self.username_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #374151;")
+        self.username_label.setObjectName("profileName")
         info_layout.addRow("用户名：", self.username_label)
         
         # 注册时间
         self.register_time_label = QtWidgets.QLabel("")
-        self.register_time_label.setStyleSheet("font-size: 14px; color: #6b7280;")
+        self.register_time_label.setObjectName("mutedText")
         info_layout.addRow("注册时间：", self.register_time_label)
         
         layout.addLayout(info_layout)
@@ -697,20 +532,8 @@ class UserProfileDialog(QtWidgets.QDialog):
         buttons_layout.setAlignment(QtCore.Qt.AlignCenter)
         
         self.logout_btn = QtWidgets.QPushButton("退出账户")
-        self.logout_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #ef4444;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 12px 20px;
-                font-size: 16px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #dc2626;
-            }
-        """)
+        self.logout_btn.setObjectName("logoutButton")
+        set_button_style(self.logout_btn, "danger", "large")
         self.logout_btn.clicked.connect(self.logout)
         
         buttons_layout.addWidget(self.logout_btn)
@@ -731,48 +554,7 @@ class UserProfileDialog(QtWidgets.QDialog):
         """加载头像"""
         if self.parent_window:
             avatar_path = self.parent_window.get_avatar_path()
-            if avatar_path and os.path.exists(avatar_path):
-                pixmap = QtGui.QPixmap(avatar_path)
-            else:
-                pixmap = self.create_default_avatar()
-            
-            scaled_pixmap = self.create_round_avatar(pixmap, 120)
-            self.avatar_label.setPixmap(scaled_pixmap)
-    
-    def create_default_avatar(self):
-        """创建默认灰色头像"""
-        size = 120
-        pixmap = QtGui.QPixmap(size, size)
-        pixmap.fill(QtGui.QColor("#9CA3AF"))
-        
-        painter = QtGui.QPainter(pixmap)
-        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
-        painter.setPen(QtGui.QColor("white"))
-        painter.setFont(QtGui.QFont("Arial", 48, QtGui.QFont.Weight.Bold))
-        
-        first_char = self.username[0].upper() if self.username else "?"
-        painter.drawText(pixmap.rect(), QtCore.Qt.AlignmentFlag.AlignCenter, first_char)
-        painter.end()
-        
-        return pixmap
-    
-    def create_round_avatar(self, pixmap, size):
-        """创建圆形头像"""
-        rounded = QtGui.QPixmap(size, size)
-        rounded.fill(QtCore.Qt.GlobalColor.transparent)
-        
-        painter = QtGui.QPainter(rounded)
-        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
-        
-        path = QtGui.QPainterPath()
-        path.addEllipse(0, 0, size, size)
-        painter.setClipPath(path)
-        
-        scaled_pixmap = pixmap.scaled(size, size, QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding, QtCore.Qt.TransformationMode.SmoothTransformation)
-        painter.drawPixmap(0, 0, scaled_pixmap)
-        painter.end()
-        
-        return rounded
+            show_avatar(self.image_loader, self.username, avatar_path, 120, 48, self.avatar_label.setPixmap)
     
     def upload_avatar(self):
         """上传头像"""
@@ -785,9 +567,7 @@ class UserProfileDialog(QtWidgets.QDialog):
         )
         
         if file_path and self.parent_window:
-            self.parent_window.upload_avatar(file_path)
-            self.load_avatar()
-            QtWidgets.QMessageBox.information(self, "成功", "头像上传成功")
+            self.parent_window.upload_avatar(file_path, on_done=self.load_avatar)
     
     def clear_avatar(self):
         """清除头像"""
@@ -869,7 +649,7 @@ class CustomInputDialog(QtWidgets.QDialog):
         
         # 标题
         title_label = QtWidgets.QLabel("选择或输入自定义内容：")
-        title_label.setStyleSheet("font-size: 14px; font-weight: bold;")
+        title_label.setObjectName("dialogSubheading")
         layout.addWidget(title_label)
         
         # 常见选项列表
@@ -916,8 +696,218 @@ class CustomInputDialog(QtWidgets.QDialog):
         return self.custom_input.text().strip()
 
 
+class PasswordReuseDialog(QtWidgets.QDialog):
+    """重复密码报告：按密码分组列出使用同一密码的记录（不显示密码本身）"""
+    record_activated = QtCore.Signal(str)
+    
+    TITLE = "重复密码报告"
+    SUMMARY = "{groups} 个密码被重复使用，涉及 {records} 条记录。双击记录可在列表中定位。"
+    EMPTY = "没有发现重复使用的密码。"
+    GROUP = "密码 {number}：{records} 条记录"
+    
+    def __init__(self, groups, item_text, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(self.TITLE)
+        self.resize(560, 460)
+        self.groups = groups
+        self.item_text = item_text
+        self.setup_ui()
+    
+    def setup_ui(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        
+        title = QtWidgets.QLabel(self.TITLE)
+        title.setObjectName("dialogHeading")
+        layout.addWidget(title)
+        
+        if self.groups:
+            count = sum(len(group) for group in self.groups)
+            hint = self.SUMMARY.format(groups=len(self.groups), records=count)
+        else:
+            hint = self.EMPTY
+        description = QtWidgets.QLabel(hint)
+        description.setObjectName("dialogHint")
+        description.setWordWrap(True)
+        layout.addWidget(description)
+        
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        role = QtCore.Qt.ItemDataRole.UserRole
+        for number, group in enumerate(self.groups, 1):
+            group_item = QtWidgets.QTreeWidgetItem([self.group_label(number, group)])
+            for record in group:
+                child = QtWidgets.QTreeWidgetItem([self.item_text(record)])
+                child.setData(0, role, record.get('id'))
+                group_item.addChild(child)
+            self.tree.addTopLevelItem(group_item)
+        self.tree.expandAll()
+        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        layout.addWidget(self.tree)
+        
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addStretch()
+        self.close_btn = QtWidgets.QPushButton("关闭")
+        set_button_style(self.close_btn, "outline", "medium")
+        self.close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+    
+    def group_label(self, number, group):
+        return self.GROUP.format(number=number, records=len(group))
+    
+    def on_item_double_clicked(self, item):
+        record_id = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
+        if record_id:
+            self.record_activated.emit(record_id)
+            self.accept()
+
+
+class SimilarPasswordDialog(PasswordReuseDialog):
+    """相似密码报告：按相似程度分组列出密码只有少量字符不同的记录"""
+    TITLE = "相似密码报告"
+    SUMMARY = "{groups} 组记录的密码只有少量字符不同（如 Summer2024! 与 Summer2025!），涉及 {records} 条记录。双击记录可在列表中定位。"
+    EMPTY = "没有发现相似的密码。"
+    GROUP = "第 {number} 组：{records} 条记录"
+
+
+class BreachedPasswordDialog(PasswordReuseDialog):
+    """泄露检查报告：按密码分组列出出现在泄露密码列表中的记录"""
+    TITLE = "泄露检查报告"
+    SUMMARY = "{groups} 个密码出现在泄露密码列表中，涉及 {records} 条记录，建议尽快修改。双击记录可在列表中定位。"
+    EMPTY = "没有发现出现在泄露密码列表中的密码。"
+    GROUP = "密码 {number}：泄露 {count} 次，{records} 条记录"
+    
+    def __init__(self, groups, counts, item_text, parent=None):
+        self.counts = counts
+        super().__init__(groups, item_text, parent)
+    
+    def group_label(self, number, group):
+        count = self.counts[group[0].get('id')]
+        return self.GROUP.format(number=number, count=count, records=len(group))
+
+
+class RecordHistoryDialog(QtWidgets.QDialog):
+    """记录的修改历史：每次修改一项，展开为变化字段的旧值；双击旧密码可填回表单"""
+    password_chosen = QtCore.Signal(str)
+    
+    TITLE = "修改历史"
+    SUMMARY = "保留最近 {count} 次修改（每条记录最多 {limit} 次、一年以内）。双击旧密码可填回表单，保存后生效。"
+    EMPTY = "这条记录还没有修改历史。"
+    REASONS = {"edit": "编辑", "rotation": "批量换密码", "undo": "撤销", "redo": "重做"}
+    FIELD_NAMES = {
+        'website': "网址", 'site_name': "网站名称", 'name': "姓名", 'password': "密码", 'email': "邮箱",
+        'verification': "验证方式", 'registration_type': "注册形式", 'notes': "备注",
+    }
+    
+    def __init__(self, entries, limit, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(self.TITLE)
+        self.resize(560, 460)
+        self.entries = entries
+        self.limit = limit
+        self.setup_ui()
+    
+    def setup_ui(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        
+        title = QtWidgets.QLabel(self.TITLE)
+        title.setObjectName("dialogHeading")
+        layout.addWidget(title)
+        
+        hint = self.SUMMARY.format(count=len(self.entries), limit=self.limit) if self.entries else self.EMPTY
+        description = QtWidgets.QLabel(hint)
+        description.setObjectName("dialogHint")
+        description.setWordWrap(True)
+        layout.addWidget(description)
+        
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        role = QtCore.Qt.ItemDataRole.UserRole
+        for entry in self.entries:
+            when = datetime.fromtimestamp(entry['time']).strftime("%Y-%m-%d %H:%M:%S")
+            reason = self.REASONS.get(entry.get('reason'), entry.get('reason', ''))
+            entry_item = QtWidgets.QTreeWidgetItem([f"{when}  {reason}"])
+            for key, value in entry.get('old', {}).items():
+                child = QtWidgets.QTreeWidgetItem([f"{self.FIELD_NAMES.get(key, key)}：{self.value_text(value)}"])
+                if key == 'password' and value:
+                    child.setData(0, role, value)
+                entry_item.addChild(child)
+            self.tree.addTopLevelItem(entry_item)
+        self.tree.expandAll()
+        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        layout.addWidget(self.tree)
+        
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addStretch()
+        self.close_btn = QtWidgets.QPushButton("关闭")
+        set_button_style(self.close_btn, "outline", "medium")
+        self.close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+    
+    def value_text(self, value):
+        """旧值的显示文本（姓名显示为用户名或 "名 姓"）"""
+        if value is None or value == "":
+            return "（空）"
+        if isinstance(value, dict):
+            return display_name({'name': value})
+        return str(value)
+    
+    def on_item_double_clicked(self, item):
+        password = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
+        if password:
+            self.password_chosen.emit(password)
+            self.accept()
+
+
+class RecordLoaderThread(QtCore.QThread):
+    """后台加载密码记录：逐条解码，分批推送到界面"""
+    batch_loaded = QtCore.Signal(list)
+    load_finished = QtCore.Signal(int)
+    load_failed = QtCore.Signal(str)
+    
+    def __init__(self, vault, first_batch=50, batch_size=1000, parent=None):
+        super().__init__(parent)
+        self.vault = vault
+        self.first_batch = first_batch
+        self.batch_size = batch_size
+    
+    def run(self):
+        try:
+            version, records = self.vault.open_stream()
+            batch = []
+            loaded = 0
+            limit = self.first_batch  # 首批较小，尽快显示第一屏
+            for record in records:
+                if self.isInterruptionRequested():
+                    return
+                batch.append(record)
+                if len(batch) >= limit:
+                    self.batch_loaded.emit(compact_records(batch, loaded))
+                    loaded += len(batch)
+                    batch = []
+                    limit = self.batch_size
+            if batch:
+                self.batch_loaded.emit(compact_records(batch, loaded))
+            self.load_finished.emit(version)
+        except Exception as e:
+            self.load_failed.emit(str(e))
+
+
 class PasswordManagerWindow(QtWidgets.QMainWindow):
     """主密码管理窗口"""
+    save_failed = QtCore.Signal(str)
+    vault_merged = QtCore.Signal(object, object, int)
+    
+    # 搜索框的查询语法提示
+    SEARCH_HINT = "可以按字段筛选，例如：site:github email:@corp.com verification:二次验证 updated:<2025-01-01"
+    
+    # 密码生成方式 -> 生成规则
+    GENERATOR_POLICIES = {
+        "随机密码": PasswordPolicy(),
+        "易读密码": PasswordPolicy(PasswordPolicy.PRONOUNCEABLE, length=12),
+        "单词口令": PasswordPolicy(PasswordPolicy.PASSPHRASE, words=6),
+    }
     
     def __init__(self, username):
         super().__init__()
@@ -925,7 +915,9 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         self.user_data_dir = self.setup_user_directory()
         self.setWindowTitle(f"安密库 (SecurePass) - 密码管理器 ({username})")
         self.resize(1200, 700)
-        self.set_window_icon()
+        apply_app_style()
+        self.image_loader = ImageLoader(self)
+        set_window_icon(self)
         
         # 初始化数据
         self.name_type = "单一用户名"
@@ -934,21 +926,22 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         self.custom_verification_options = []
         self.custom_registration_options = []
         
+        # 密码库；后台延迟保存：多次修改合并为一次写入
+        self.vault = Vault(self.get_passwords_file())
+        self.saver = WriteBehindSaver(self.write_passwords, on_error=lambda e: self.save_failed.emit(str(e)))
+        self.save_failed.connect(self.on_save_failed)
+        self.vault_merged.connect(self.on_vault_merged)
+        # 撤销栈：只保存每次修改的差量（见 undo.py）
+        self.undo_stack = UndoStack()
+        app = QtWidgets.QApplication.instance()
+        if app:
+            app.aboutToQuit.connect(self.saver.flush)
+        
         self.setup_ui()
         self.load_passwords()
         self.load_avatar()
+        self.setup_file_watcher()
     
-    def set_window_icon(self):
-        """设置窗口图标"""
-        try:
-            current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            icon_path = os.path.join(current_dir, "images", "Main icon.png")
-            if os.path.exists(icon_path):
-                icon = QtGui.QIcon(icon_path)
-                self.setWindowIcon(icon)
-        except Exception as e:
-            print(f"设置窗口图标失败: {e}")
-        
     def setup_ui(self):
         """设置主界面UI"""
         central_widget = QtWidgets.QWidget()
@@ -973,104 +966,43 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
     
     def get_avatar_path(self):
         """获取头像文件路径"""
-        for ext in ['.png', '.jpg', '.jpeg', '.bmp', '.gif']:
-            avatar_path = os.path.join(self.user_data_dir, f"avatar{ext}")
-            if os.path.exists(avatar_path):
-                return avatar_path
-        return None
+        return find_avatar(self.user_data_dir)
     
     def update_login_status(self):
         """更新登录状态显示"""
         if os.path.exists("remember_me.json"):
             # 保持登录状态（绿色）
             self.login_status_label.setText("状态:保持登录")
-            self.login_status_label.setStyleSheet("""
-                color: white;
-                background-color: #10b981;
-                font-size: 12px;
-                font-weight: bold;
-                padding: 4px 8px;
-                border-radius: 12px;
-            """)
+            set_state(self.login_status_label, "remembered", True)
         else:
             # 临时登录状态（黄色）
             self.login_status_label.setText("状态:临时登录")
-            self.login_status_label.setStyleSheet("""
-                color: #111827;
-                background-color: #f59e0b;
-                font-size: 12px;
-                font-weight: bold;
-                padding: 4px 8px;
-                border-radius: 12px;
-            """)
+            set_state(self.login_status_label, "remembered", False)
     
     def load_avatar(self):
         """加载用户头像"""
         avatar_path = self.get_avatar_path()
-        if avatar_path and os.path.exists(avatar_path):
-            pixmap = QtGui.QPixmap(avatar_path)
-        else:
-            pixmap = self.create_default_avatar()
-        
-        scaled_pixmap = self.create_round_avatar(pixmap)
-        self.avatar_btn.setIcon(QtGui.QIcon(scaled_pixmap))
+        show_avatar(self.image_loader, self.username, avatar_path, 40, 16, self.set_avatar_icon)
         
         # 每次加载头像时也更新登录状态
         self.update_login_status()
     
-    def create_default_avatar(self):
-        """创建默认灰色头像"""
-        size = 40
-        pixmap = QtGui.QPixmap(size, size)
-        pixmap.fill(QtGui.QColor("#9CA3AF"))
-        
-        painter = QtGui.QPainter(pixmap)
-        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
-        painter.setPen(QtGui.QColor("white"))
-        painter.setFont(QtGui.QFont("Arial", 16, QtGui.QFont.Weight.Bold))
-        
-        first_char = self.username[0].upper() if self.username else "?"
-        painter.drawText(pixmap.rect(), QtCore.Qt.AlignmentFlag.AlignCenter, first_char)
-        painter.end()
-        
-        return pixmap
-    
-    def create_round_avatar(self, pixmap):
-        """创建圆形头像"""
-        size = 40
-        rounded = QtGui.QPixmap(size, size)
-        rounded.fill(QtCore.Qt.GlobalColor.transparent)
-        
-        painter = QtGui.QPainter(rounded)
-        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
-        
-        path = QtGui.QPainterPath()
-        path.addEllipse(0, 0, size, size)
-        painter.setClipPath(path)
-        
-        scaled_pixmap = pixmap.scaled(size, size, QtCore.Qt.AspectRatioMode.KeepAspectRatioByExpanding, QtCore.Qt.TransformationMode.SmoothTransformation)
-        painter.drawPixmap(0, 0, scaled_pixmap)
-        painter.end()
-        
-        return rounded
+    def set_avatar_icon(self, pixmap):
+        """设置头像按钮图标"""
+        self.avatar_btn.setIcon(QtGui.QIcon(pixmap))
     
-    def upload_avatar(self, file_path):
-        """上传头像"""
-        try:
-            old_avatar = self.get_avatar_path()
-            if old_avatar:
-                os.remove(old_avatar)
-            
-            _, ext = os.path.splitext(file_path)
-            new_avatar_path = os.path.join(self.user_data_dir, f"avatar{ext}")
-            
-            shutil.copy2(file_path, new_avatar_path)
-            
+    def upload_avatar(self, file_path, on_done=None):
+        """上传头像：后台解码原图并保存缩小后的缩略图，完成后刷新头像（on_done 为额外的完成回调）"""
+        def saved(_):
             self.load_avatar()
-            
+            if on_done:
+                on_done()
             QtWidgets.QMessageBox.information(self, "成功", "头像上传成功")
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(self, "错误", f"头像上传失败: {str(e)}")
+        
+        def failed(message):
+            QtWidgets.QMessageBox.critical(self, "错误", f"头像上传失败: {message}")
+        
+        self.image_loader.submit(lambda: save_thumbnail(file_path, self.user_data_dir), saved, failed)
     
     def show_user_profile(self):
         """显示用户资料对话框"""
@@ -1078,9 +1010,21 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         self.profile_dialog.exec()
     
     def get_passwords_file(self):
-        """获取密码数据文件路径"""
+        """获取密码数据文件路径（存在二进制格式的 passwords.spv 时优先使用）"""
+        binary_file = os.path.join(self.user_data_dir, "passwords.spv")
+        if os.path.exists(binary_file):
+            return binary_file
         return os.path.join(self.user_data_dir, "passwords.json")
     
+    @property
+    def records(self):
+        """当前密码记录列表"""
+        return self.vault.records
+    
+    @records.setter
+    def records(self, value):
+        self.vault.records = value
+    
     def setup_ui(self):
         """设置主界面UI"""
         central_widget = QtWidgets.QWidget()
@@ -1098,77 +1042,83 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         # 搜索框
         search_layout = QtWidgets.QHBoxLayout()
         self.search_input = QtWidgets.QLineEdit()
-        self.search_input.setPlaceholderText("搜索记录（网址、用户名、邮箱）...")
-        self.search_input.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 8px 12px;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.search_input.setPlaceholderText("搜索记录（网址、用户名、邮箱、拼音、备注），回车打开最佳匹配...")
+        self.search_input.setToolTip(self.SEARCH_HINT)
+        self.search_input.setObjectName("field")
         search_layout.addWidget(self.search_input)
         left_layout.addLayout(search_layout)
         
+        # 输入停顿后再搜索；搜索在后台线程进行，新查询取代未完成的旧查询
+        self.search_timer = QtCore.QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.filter_records)
+        self.search_generation = 0
+        self.search_threads = set()
+        # 最近一次搜索按得分排序的记录ID（搜索索引由密码库持有，见 Vault.search_index）
+        self.search_ranked = []
+        self.search_ranked_generation = 0
+        self.search_refresh = False
+        # 按得分顺序显示在前面的记录：记录ID -> 所在行（只含不在原位置的记录），其余条目保持记录顺序
+        self.search_moved = {}
+        self.open_match_pending = False
+        
         # 记录列表
         self.record_list = QtWidgets.QListWidget()
-        self.record_list.setStyleSheet("""
-            QListWidget {
-                border: 2px solid #e5e7eb;
-                border-radius: 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QListWidget::item {
-                padding: 12px;
-                border-bottom: 1px solid #f3f4f6;
-            }
-            QListWidget::item:selected {
-                background-color: #dbeafe;
-                color: #1e40af;
-            }
-        """)
+        self.record_list.setObjectName("recordList")
         left_layout.addWidget(self.record_list)
         
         # 批量操作按钮
         batch_layout = QtWidgets.QHBoxLayout()
         self.delete_selected_btn = QtWidgets.QPushButton("删除选中")
-        self.delete_selected_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #ef4444;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 8px 16px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #dc2626;
-            }
-        """)
+        set_button_style(self.delete_selected_btn, "danger", "small")
         
         self.clear_all_btn = QtWidgets.QPushButton("清空所有")
-        self.clear_all_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #f59e0b;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 8px 16px;
-                font-size: 14px;
-            }
-            QPushButton:hover {
-                background-color: #d97706;
-            }
-        """)
+        set_button_style(self.clear_all_btn, "warning", "small")
+        
+        self.rotate_btn = QtWidgets.QPushButton("批量换密码")
+        self.rotate_btn.setToolTip("为匹配当前搜索条件（未搜索时为全部）的记录生成新密码，旧密码保留在修改历史中")
+        set_button_style(self.rotate_btn, "primary", "small")
         
         batch_layout.addWidget(self.delete_selected_btn)
         batch_layout.addWidget(self.clear_all_btn)
+        batch_layout.addWidget(self.rotate_btn)
         left_layout.addLayout(batch_layout)
         
+        # 撤销/重做按钮（Ctrl+Z / Ctrl+Y，输入框中的快捷键仍撤销输入框的编辑）
+        undo_layout = QtWidgets.QHBoxLayout()
+        self.undo_btn = QtWidgets.QPushButton("撤销")
+        set_button_style(self.undo_btn, "outline", "small")
+        self.redo_btn = QtWidgets.QPushButton("重做")
+        set_button_style(self.redo_btn, "outline", "small")
+        self.undo_shortcut = QtGui.QShortcut(QtGui.QKeySequence.StandardKey.Undo, self)
+        self.redo_shortcut = QtGui.QShortcut(QtGui.QKeySequence.StandardKey.Redo, self)
+        
+        undo_layout.addWidget(self.undo_btn)
+        undo_layout.addWidget(self.redo_btn)
+        left_layout.addLayout(undo_layout)
+        self.update_undo_buttons()
+        
+        # 密码安全检查按钮
+        audit_layout = QtWidgets.QHBoxLayout()
+        self.reuse_report_btn = QtWidgets.QPushButton("重复密码")
+        self.reuse_report_btn.setToolTip("查看被多条记录重复使用的密码")
+        set_button_style(self.reuse_report_btn, "secondary", "small")
+        
+        self.similar_report_btn = QtWidgets.QPushButton("相似密码")
+        self.similar_report_btn.setToolTip("在后台查找只有少量字符不同的密码")
+        set_button_style(self.similar_report_btn, "secondary", "small")
+        self.similarity_thread = None
+        
+        self.breach_check_btn = QtWidgets.QPushButton("泄露检查")
+        self.breach_check_btn.setToolTip("对照本地的泄露密码列表检查所有密码（不联网）")
+        set_button_style(self.breach_check_btn, "secondary", "small")
+        
+        audit_layout.addWidget(self.reuse_report_btn)
+        audit_layout.addWidget(self.similar_report_btn)
+        audit_layout.addWidget(self.breach_check_btn)
+        left_layout.addLayout(audit_layout)
+        
         # 右侧：数据输入表单
         right_widget = QtWidgets.QWidget()
         right_layout = QtWidgets.QVBoxLayout(right_widget)
@@ -1178,20 +1128,15 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         
         # 表单标题
         form_title = QtWidgets.QLabel("添加/编辑密码记录")
-        form_title.setStyleSheet("font-size: 18px; font-weight: bold; color: #111827;")
+        form_title.setObjectName("sectionTitle")
         top_toolbar.addWidget(form_title)
         
         top_toolbar.addStretch()
         
         # 登录状态显示
         self.login_status_label = QtWidgets.QLabel()
+        self.login_status_label.setObjectName("loginStatus")
         self.update_login_status()
-        self.login_status_label.setStyleSheet("""
-            font-size: 12px;
-            font-weight: bold;
-            padding: 4px 8px;
-            border-radius: 12px;
-        """)
         top_toolbar.addWidget(self.login_status_label)
         
 
@@ -1199,18 +1144,7 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         # 用户头像按钮
         self.avatar_btn = QtWidgets.QPushButton()
         self.avatar_btn.setFixedSize(44, 44)
-        self.avatar_btn.setStyleSheet("""
-            QPushButton {
-                border: 2px solid #d1d5db;
-                border-radius: 22px;
-                background-color: #f9fafb;
-                padding: 0px;
-            }
-            QPushButton:hover {
-                border-color: #3b82f6;
-                background-color: #f0f9ff;
-            }
-        """)
+        self.avatar_btn.setObjectName("avatarButton")
         self.avatar_btn.setIconSize(QtCore.QSize(40, 40))
         self.avatar_btn.clicked.connect(self.show_user_profile)
         
@@ -1238,39 +1172,58 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         name_type_layout = QtWidgets.QHBoxLayout()
         self.name_type_combo = QtWidgets.QComboBox()
         self.name_type_combo.addItems(["单一用户名", "分开的姓名", "无"])
-        self.name_type_combo.setStyleSheet("""
-            QComboBox {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QComboBox:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.name_type_combo.setObjectName("field")
         name_type_layout.addWidget(self.name_type_combo)
         
         self.name_type_label = QtWidgets.QLabel("（选择姓名显示方式）")
-        self.name_type_label.setStyleSheet("color: #6b7280; font-size: 12px;")
+        self.name_type_label.setObjectName("hintLabel")
         name_type_layout.addWidget(self.name_type_label)
         name_type_layout.addStretch()
         
         self.form_layout.addRow("姓名类型：", name_type_layout)
         
-        # 动态姓名输入区域
-        self.name_widget = QtWidgets.QWidget()
-        self.name_layout = QtWidgets.QHBoxLayout(self.name_widget)
-        self.name_layout.setContentsMargins(0, 0, 0, 0)
-        self.form_layout.addRow("", self.name_widget)
-        
-        # 密码字段（明文显示）
+        # 姓名输入区域：输入框只创建一次，按姓名类型切换页面
+        self.name_stack = QtWidgets.QStackedWidget()
+        
+        self.username_input = QtWidgets.QLineEdit()
+        self.username_input.setPlaceholderText("输入用户名")
+        self.setup_input_style(self.username_input)
+        self.name_stack.addWidget(self.username_input)
+        
+        split_name_widget = QtWidgets.QWidget()
+        split_name_layout = QtWidgets.QHBoxLayout(split_name_widget)
+        split_name_layout.setContentsMargins(0, 0, 0, 0)
+        self.first_name_input = QtWidgets.QLineEdit()
+        self.first_name_input.setPlaceholderText("名字")
+        self.setup_input_style(self.first_name_input)
+        split_name_layout.addWidget(self.first_name_input)
+        self.last_name_input = QtWidgets.QLineEdit()
+        self.last_name_input.setPlaceholderText("姓氏")
+        self.setup_input_style(self.last_name_input)
+        split_name_layout.addWidget(self.last_name_input)
+        self.name_stack.addWidget(split_name_widget)
+        
+        self.name_pages = {"单一用户名": self.username_input, "分开的姓名": split_name_widget}
+        self.form_layout.addRow("", self.name_stack)
+        
+        # 密码字段（明文显示）和生成按钮
+        password_layout = QtWidgets.QHBoxLayout()
         self.password_input = QtWidgets.QLineEdit()
         self.password_input.setPlaceholderText("输入密码（可选）")
         self.password_input.setEchoMode(QtWidgets.QLineEdit.EchoMode.Normal)
         self.setup_input_style(self.password_input)
-        self.form_layout.addRow("密码：", self.password_input)
+        password_layout.addWidget(self.password_input)
+        
+        self.generator_combo = QtWidgets.QComboBox()
+        self.generator_combo.addItems(list(self.GENERATOR_POLICIES))
+        self.generator_combo.setObjectName("field")
+        password_layout.addWidget(self.generator_combo)
+        
+        self.generate_btn = QtWidgets.QPushButton("生成")
+        self.generate_btn.setToolTip("按选择的方式生成一个本密码库中未使用过的密码")
+        set_button_style(self.generate_btn, "secondary", "small")
+        password_layout.addWidget(self.generate_btn)
+        self.form_layout.addRow("密码：", password_layout)
         
         # 邮箱字段
         self.email_input = QtWidgets.QLineEdit()
@@ -1281,52 +1234,20 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         # 验证方式
         self.verification_combo = QtWidgets.QComboBox()
         self.update_verification_combo()
-        self.verification_combo.setStyleSheet("""
-            QComboBox {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QComboBox:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.verification_combo.setObjectName("field")
         self.form_layout.addRow("验证方式：", self.verification_combo)
         
         # 注册形式
         self.registration_combo = QtWidgets.QComboBox()
         self.update_registration_combo()
-        self.registration_combo.setStyleSheet("""
-            QComboBox {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QComboBox:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.registration_combo.setObjectName("field")
         self.form_layout.addRow("注册形式：", self.registration_combo)
         
         # 备注
         self.notes_input = QtWidgets.QTextEdit()
         self.notes_input.setPlaceholderText("输入备注信息...（可选）")
         self.notes_input.setMaximumHeight(80)
-        self.notes_input.setStyleSheet("""
-            QTextEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 8px;
-                font-size: 14px;
-            }
-            QTextEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.notes_input.setObjectName("field")
         self.form_layout.addRow("备注：", self.notes_input)
         
         right_layout.addLayout(self.form_layout)
@@ -1335,39 +1256,18 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         button_layout = QtWidgets.QHBoxLayout()
         
         self.save_btn = QtWidgets.QPushButton("保存记录")
-        self.save_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3b82f6;
-                color: white;
-                border: none;
-                border-radius: 10px;
-                padding: 12px 24px;
-                font-size: 16px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #2563eb;
-            }
-        """)
+        set_button_style(self.save_btn, "primary", "form")
         
         self.new_btn = QtWidgets.QPushButton("新建记录")
-        self.new_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #10b981;
-                color: white;
-                border: none;
-                border-radius: 10px;
-                padding: 12px 24px;
-                font-size: 16px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #059669;
-            }
-        """)
+        set_button_style(self.new_btn, "success", "form")
+        
+        self.history_btn = QtWidgets.QPushButton("修改历史")
+        self.history_btn.setToolTip("查看当前记录以前的密码和修改过的字段")
+        set_button_style(self.history_btn, "secondary", "form")
         
         button_layout.addWidget(self.save_btn)
         button_layout.addWidget(self.new_btn)
+        button_layout.addWidget(self.history_btn)
         button_layout.addStretch()
         
         # 右下角刷新按钮
@@ -1386,6 +1286,10 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         # 连接信号
         self.connect_signals()
         
+        # 保存提示（非模态）
+        from .register import ToastMessage
+        self.toast = ToastMessage(self)
+        
         # 初始化界面
         self.update_name_inputs()
         self.clear_form()
@@ -1407,17 +1311,7 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         
     def setup_input_style(self, input_widget):
         """设置输入框样式"""
-        input_widget.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 8px 12px;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        input_widget.setObjectName("field")
     
     def refresh_page(self):
         """刷新页面 - 重新加载密码数据和用户数据"""
@@ -1425,6 +1319,10 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         from .register import user_manager
         user_manager.users = user_manager.load_users()
         
+        # 先写入尚未落盘的修改，再从磁盘重新加载；写入失败时不重新加载，以免丢失这些修改
+        if not self.saver.flush():
+            QtWidgets.QMessageBox.warning(self, "刷新", "还有未能保存的修改，请稍后再刷新")
+            return
         self.load_passwords()
         self.clear_form()
         self.search_input.clear()
@@ -1456,38 +1354,34 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         self.new_btn.clicked.connect(self.new_record)
         self.delete_selected_btn.clicked.connect(self.delete_selected)
         self.clear_all_btn.clicked.connect(self.clear_all)
+        self.reuse_report_btn.clicked.connect(self.show_reuse_report)
+        self.similar_report_btn.clicked.connect(self.start_similarity_audit)
+        self.breach_check_btn.clicked.connect(self.check_breached_passwords)
+        self.generate_btn.clicked.connect(self.generate_password)
+        self.rotate_btn.clicked.connect(self.rotate_passwords)
+        self.history_btn.clicked.connect(self.show_record_history)
+        self.undo_btn.clicked.connect(self.undo)
+        self.redo_btn.clicked.connect(self.redo)
+        self.undo_shortcut.activated.connect(self.undo)
+        self.redo_shortcut.activated.connect(self.redo)
         
         # 列表选择
         self.record_list.itemSelectionChanged.connect(self.show_record_details)
         
         # 搜索
-        self.search_input.textChanged.connect(self.filter_records)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_input.returnPressed.connect(self.open_best_match)
     
     def update_name_inputs(self):
-        """根据姓名类型更新输入框"""
-        for i in reversed(range(self.name_layout.count())):
-            widget = self.name_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        
-        name_type = self.name_type_combo.currentText()
-        
-        if name_type == "单一用户名":
-            self.username_input = QtWidgets.QLineEdit()
-            self.username_input.setPlaceholderText("输入用户名")
-            self.setup_input_style(self.username_input)
-            self.name_layout.addWidget(self.username_input)
-            
-        elif name_type == "分开的姓名":
-            self.first_name_input = QtWidgets.QLineEdit()
-            self.first_name_input.setPlaceholderText("名字")
-            self.setup_input_style(self.first_name_input)
-            self.name_layout.addWidget(self.first_name_input)
-            
-            self.last_name_input = QtWidgets.QLineEdit()
-            self.last_name_input.setPlaceholderText("姓氏")
-            self.setup_input_style(self.last_name_input)
-            self.name_layout.addWidget(self.last_name_input)
+        """根据姓名类型切换输入框（清空已有内容，不重新创建控件）"""
+        self.username_input.clear()
+        self.first_name_input.clear()
+        self.last_name_input.clear()
+        
+        page = self.name_pages.get(self.name_type_combo.currentText())
+        if page is not None:
+            self.name_stack.setCurrentWidget(page)
+        self.name_stack.setVisible(page is not None)
     
     def on_verification_changed(self, text):
         """验证方式变化处理"""
@@ -1518,77 +1412,424 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
                 self.registration_combo.setCurrentIndex(0)
     
     def load_passwords(self):
-        """加载密码数据"""
-        passwords_file = self.get_passwords_file()
-        if os.path.exists(passwords_file):
-            try:
-                with open(passwords_file, 'r', encoding='utf-8') as f:
-                    self.records = json.load(f)
-            except:
-                self.records = []
-        else:
-            self.records = []
-        
-        self.refresh_record_list()
+        """加载密码数据（后台渐进式加载，首批记录解码后立即显示）"""
+        self.stop_loading()
+        self.vault.begin_load()
+        self.record_list.clear()
+        self.search_moved = {}
+        self.set_loading(True)
+        
+        # 正文损坏时自动从上一代文件恢复，不再静默清空
+        self.loader = RecordLoaderThread(self.vault, parent=self)
+        self.loader.batch_loaded.connect(self.on_records_loaded)
+        self.loader.load_finished.connect(self.on_load_finished)
+        self.loader.load_failed.connect(self.on_load_failed)
+        self.loader.start()
+    
+    def stop_loading(self):
+        """中止正在进行的加载"""
+        loader = getattr(self, 'loader', None)
+        if loader is not None:
+            for signal in (loader.batch_loaded, loader.load_finished, loader.load_failed):
+                signal.disconnect()
+            loader.requestInterruption()
+            loader.wait()
+            self.loader = None
+    
+    def is_loading(self):
+        """是否正在加载密码数据"""
+        return getattr(self, 'loader', None) is not None
+    
+    def set_loading(self, loading):
+        """加载期间禁用会写入数据的操作"""
+        for button in (self.save_btn, self.delete_selected_btn, self.clear_all_btn, self.rotate_btn):
+            button.setEnabled(not loading)
+        self.update_undo_buttons()
+    
+    def on_records_loaded(self, batch):
+        """追加一批已解码的记录，并按当前搜索条件过滤"""
+        self.vault.add_records(batch)
+        query = self.current_query()
+        for record in batch:
+            item = self.create_record_item(record)
+            self.record_list.addItem(item)
+            if query:
+                item.setHidden(not query.matches(record))
+    
+    def on_load_finished(self, version):
+        """全部记录加载完成"""
+        self.vault.finish_load(version)
+        self.loader = None
+        self.set_loading(False)
+    
+    def on_load_failed(self, message):
+        """加载失败提示"""
+        self.vault.finish_load(0)
+        self.loader = None
+        self.set_loading(False)
+        QtWidgets.QMessageBox.critical(self, "错误", f"加载密码数据失败: {message}")
     
     def save_passwords(self):
-        """保存密码数据"""
-        passwords_file = self.get_passwords_file()
+        """保存密码数据（标记为已修改，由后台线程延迟写入）"""
         try:
-            with open(passwords_file, 'w', encoding='utf-8') as f:
-                json.dump(self.records, f, ensure_ascii=False, indent=2)
+            self.saver.mark_dirty(self.vault.snapshot())
             return True
-        except:
+        except RuntimeError:
             return False
     
+    def write_passwords(self, records):
+        """将密码数据写入磁盘（在后台线程中调用）"""
+        merge_result = self.vault.commit(records)
+        if merge_result:
+            self.vault_merged.emit(*merge_result)
+    
+    def on_vault_merged(self, snapshot, merged, seq):
+        """其他进程修改了密码库：合并后的记录并入界面"""
+        old_records = list(self.records)
+        self.vault.apply_merge(snapshot, merged, seq)
+        if self.records != merged:
+            self.save_passwords()
+        self.sync_record_list(old_records, self.records)
+        self.toast.show_message("已合并其他窗口对密码库的修改")
+    
+    def setup_file_watcher(self):
+        """监视密码库文件和 users.json，外部修改后自动增量刷新"""
+        self.file_watcher = QtCore.QFileSystemWatcher(self)
+        # 原子替换会触发多次事件，短暂合并后再处理
+        self.reload_timer = QtCore.QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(30)
+        self.reload_timer.timeout.connect(self.reload_changed_files)
+        self.file_watcher.fileChanged.connect(self.reload_timer.start)
+        self.file_watcher.directoryChanged.connect(self.reload_timer.start)
+        self.watch_files()
+    
+    def watch_files(self):
+        """添加监视路径（原子替换后文件被重建，需要重新添加）"""
+        from .register import user_manager
+        paths = [self.user_data_dir, self.get_passwords_file(), user_manager.data_file]
+        watched = set(self.file_watcher.files()) | set(self.file_watcher.directories())
+        missing = [path for path in paths if path not in watched and os.path.exists(path)]
+        if missing:
+            self.file_watcher.addPaths(missing)
+    
+    def reload_changed_files(self):
+        """重新读取被外部修改的文件，只更新有变化的记录"""
+        self.watch_files()
+        
+        from .register import user_manager
+        from .storage import read_version
+        if read_version(user_manager.data_file) != user_manager.version:
+            user_manager.users = user_manager.load_users()
+        
+        # 本进程还有待写入的修改时由后台保存负责合并；加载中的数据由加载完成后处理
+        if self.saver.is_dirty() or self.is_loading():
+            return
+        old_records = list(self.records)
+        try:
+            needs_save = self.vault.reload_if_changed()
+        except Exception as e:
+            print(f"重新加载密码数据失败: {e}")
+            return
+        if needs_save is None:
+            return
+        if needs_save:
+            self.save_passwords()
+        self.sync_record_list(old_records, self.records)
+    
+    def on_save_failed(self, message):
+        """后台保存失败提示"""
+        QtWidgets.QMessageBox.critical(self, "错误", f"保存密码数据失败: {message}")
+    
+    def closeEvent(self, event):
+        """关闭窗口前写入所有未保存的修改；写入失败时询问是否仍要关闭"""
+        if not self.saver.flush():
+            reply = QtWidgets.QMessageBox.question(
+                self, '保存失败',
+                '密码数据保存失败，还有未保存的修改，关闭后这些修改将丢失。仍要关闭吗？',
+                QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No
+            )
+            if reply != QtWidgets.QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+        self.stop_loading()
+        self.cancel_search(wait=True)
+        if self.similarity_thread is not None:
+            self.similarity_thread.requestInterruption()
+            self.similarity_thread.wait()
+        self.image_loader.shutdown()
+        super().closeEvent(event)
+    
     def refresh_record_list(self):
         """刷新记录列表"""
         self.record_list.clear()
+        self.search_moved = {}
         for record in self.records:
-            website = record.get('website', '未知网站')
-            site_name = record.get('site_name', '')
-            name_info = self.get_display_name(record)
-            
-            if site_name:
-                item_text = f"{site_name} ({website}) - {name_info}"
-            else:
-                item_text = f"{website} - {name_info}"
-                
-            item = QtWidgets.QListWidgetItem(item_text)
-            self.record_list.addItem(item)
+            self.record_list.addItem(self.create_record_item(record))
+    
+    def record_item_text(self, record):
+        """记录在列表中的显示文本"""
+        website = record.get('website', '未知网站')
+        site_name = record.get('site_name', '')
+        name_info = display_name(record)
+        
+        if site_name:
+            return f"{site_name} ({website}) - {name_info}"
+        return f"{website} - {name_info}"
+    
+    def create_record_item(self, record):
+        """创建列表条目，条目上保存记录ID"""
+        item = QtWidgets.QListWidgetItem()
+        self.set_item_record(item, record)
+        return item
     
-    def get_display_name(self, record):
-        """获取显示名称"""
-        name_data = record.get('name', {})
-        name_type = name_data.get('type', '单一用户名')
+    def set_item_record(self, item, record):
+        """条目显示给定的记录"""
+        item.setText(self.record_item_text(record))
+        item.setData(QtCore.Qt.ItemDataRole.UserRole, record.get('id'))
+    
+    def sync_record_list(self, old_records, new_records):
+        """按记录ID增量更新列表：只删除、插入、修改有变化的条目
+
+        先把按得分排列的条目放回记录顺序（列表与 old_records 一致），更新后再按最近一次搜索的得分排列。
+        """
+        role = QtCore.Qt.ItemDataRole.UserRole
+        self.restore_record_order(old_records)
+        new_ids = {record['id'] for record in new_records}
+        old_by_id = {record['id']: record for record in old_records}
+        
+        for row in reversed(range(self.record_list.count())):
+            if self.record_list.item(row).data(role) not in new_ids:
+                self.record_list.takeItem(row)
+        
+        changed = False
+        for row, record in enumerate(new_records):
+            item = self.record_list.item(row)
+            if item is None or item.data(role) != record['id']:
+                if record['id'] in old_by_id:
+                    # 顺序变化：把已有条目移动到新位置
+                    for other in range(row + 1, self.record_list.count()):
+                        if self.record_list.item(other).data(role) == record['id']:
+                            item = self.record_list.takeItem(other)
+                            break
+                    self.record_list.insertItem(row, item)
+                else:
+                    self.record_list.insertItem(row, self.create_record_item(record))
+                    changed = True
+                    continue
+            if old_by_id.get(record['id']) != record:
+                item.setText(self.record_item_text(record))
+                changed = True
+        
+        if self.search_ranked:
+            self.promote_ranked(self.search_ranked)
+        if changed and self.search_input.text():
+            self.filter_records(refresh=True)
+    
+    def current_query(self):
+        """解析搜索框中的查询语句；有误时把搜索框标红并返回 None"""
+        try:
+            query = parse_query(self.search_input.text())
+        except QuerySyntaxError as e:
+            set_state(self.search_input, "state", "error")
+            self.search_input.setToolTip(str(e))
+            return None
+        set_state(self.search_input, "state", "")
+        self.search_input.setToolTip(self.SEARCH_HINT)
+        return query
+    
+    def filter_records(self, refresh=False):
+        """在后台线程中按搜索框中的查询过滤记录列表
+
+        refresh 为 True 表示查询未变、只是记录有变化，结果就绪后不移动当前条目和滚动位置。
+        """
+        self.search_timer.stop()
+        self.search_refresh = refresh
+        query = self.current_query()
+        if query is None:
+            # 查询语句有误（多半还没输入完），保留当前结果
+            return
+        self.cancel_search()
+        self.search_generation += 1
+        if not query:
+            self.apply_search_results(None)
+            return
         
-        if name_type == "单一用户名":
-            return name_data.get('username', '未知用户')
-        elif name_type == "分开的姓名":
-            first_name = name_data.get('first_name', '')
-            last_name = name_data.get('last_name', '')
-            return f"{first_name} {last_name}".strip()
-        else:
-            return "匿名用户"
+        thread = SearchThread(self.search_generation, self.vault.search_index, list(self.records), query, parent=self)
+        thread.search_finished.connect(self.on_search_finished)
+        thread.finished.connect(lambda: self.search_threads.discard(thread))
+        thread.finished.connect(thread.deleteLater)
+        self.search_threads.add(thread)
+        thread.start()
     
-    def filter_records(self):
-        """过滤记录列表"""
-        search_text = self.search_input.text().lower()
+    def cancel_search(self, wait=False):
+        """中止尚未完成的搜索（结果不再送达界面）"""
+        for thread in list(self.search_threads):
+            thread.requestInterruption()
+            if wait:
+                thread.wait()
+    
+    def on_search_finished(self, generation, results):
+        """搜索完成：只应用最新一次查询的结果"""
+        if generation == self.search_generation:
+            self.apply_search_results(results)
+    
+    def apply_search_results(self, results):
+        """按搜索结果显示或隐藏条目，得分最高的条目按得分顺序排在最前，并把第一个设为当前条目；
+        results 为 None 时显示全部并恢复记录顺序"""
+        role = QtCore.Qt.ItemDataRole.UserRole
+        if results is None:
+            snapshot_ids = matched = None
+            self.search_ranked = []
+        else:
+            snapshot_ids, matched, self.search_ranked = results
+        self.search_ranked_generation = self.search_generation
+        # 批量修改期间暂停重绘，列表只重新布局一次
+        self.record_list.setUpdatesEnabled(False)
+        self.restore_record_order()
+        visible_rows = []
         for i in range(self.record_list.count()):
             item = self.record_list.item(i)
-            record = self.records[i] if i < len(self.records) else {}
-            
-            website = record.get('website', '').lower()
-            site_name = record.get('site_name', '').lower()
-            email = record.get('email', '').lower()
-            name_info = self.get_display_name(record).lower()
-            
-            match = (search_text in website or 
-                    search_text in site_name or
-                    search_text in email or 
-                    search_text in name_info)
-            
-            item.setHidden(not match)
+            record_id = item.data(role)
+            if matched is None:
+                hidden = False
+            elif record_id not in snapshot_ids:
+                hidden = item.isHidden()
+            else:
+                hidden = record_id not in matched
+            if item.isHidden() != hidden:
+                item.setHidden(hidden)
+            if not hidden:
+                visible_rows.append(i)
+        self.promote_ranked(self.search_ranked, visible_rows)
+        self.record_list.setUpdatesEnabled(True)
+        
+        best_row = self.record_row(self.search_ranked[0]) if self.search_ranked else None
+        if best_row is not None and not self.search_refresh:
+            # 只移动当前条目并滚动到可见位置，不改变选择（不会替换正在编辑的表单）
+            best_item = self.record_list.item(best_row)
+            self.record_list.setCurrentItem(best_item, QtCore.QItemSelectionModel.SelectionFlag.NoUpdate)
+            self.record_list.scrollToItem(best_item)
+        if self.open_match_pending:
+            self.open_match_pending = False
+            self.select_best_match()
+    
+    def open_best_match(self):
+        """在搜索框按回车：选中得分最高的记录并显示详情；搜索尚未完成时在结果就绪后打开"""
+        if self.search_timer.isActive():
+            self.filter_records()
+        if self.search_ranked_generation != self.search_generation:
+            self.open_match_pending = True
+        else:
+            self.select_best_match()
+    
+    def reorder_items(self, reorder):
+        """执行 reorder() 改变条目显示的记录，选择和当前条目跟随记录（不触发选择变化，不替换正在编辑的表单）"""
+        role = QtCore.Qt.ItemDataRole.UserRole
+        selected = [item.data(role) for item in self.record_list.selectedItems()]
+        current = self.record_list.currentItem()
+        current = current.data(role) if current is not None else None
+        self.record_list.blockSignals(True)
+        try:
+            reorder()
+            self.record_list.clearSelection()
+            if current is not None:
+                row = self.record_row(current)
+                if row is not None:
+                    self.record_list.setCurrentRow(row, QtCore.QItemSelectionModel.SelectionFlag.NoUpdate)
+            for record_id in selected:
+                row = self.record_row(record_id)
+                if row is not None:
+                    self.record_list.item(row).setSelected(True)
+        finally:
+            self.record_list.blockSignals(False)
+    
+    def restore_record_order(self, records=None):
+        """把按得分排列的条目放回记录顺序；records 为与列表对应的记录列表（默认为当前记录）"""
+        moved = self.search_moved
+        if not moved:
+            return
+        self.search_moved = {}
+        records = self.records if records is None else records
+        
+        def reorder():
+            for row in moved.values():
+                self.set_item_record(self.record_list.item(row), records[row])
+        self.reorder_items(reorder)
+    
+    def promote_ranked(self, ranked, visible_rows=None):
+        """把 ranked 中的记录（最近一次搜索得分最高的前若干条）按得分顺序显示在最前面
+
+        不移动条目（隐藏的条目很多时插入、删除行很慢），而是在显示的条目之间重新分配记录：
+        从第一行到排名记录中最靠后的那一行，显示的行依次显示排名记录和其余记录（保持记录顺序），
+        隐藏的行不变。visible_rows 为显示的行号（按顺序），调用方已知时传入以免再扫描一遍列表。
+        """
+        self.restore_record_order()
+        if not ranked:
+            return
+        if visible_rows is None:
+            visible_rows = [row for row in range(self.record_list.count())
+                            if not self.record_list.item(row).isHidden()]
+        wanted = set(ranked)
+        positions = {}
+        for position, row in enumerate(visible_rows):
+            record_id = self.records[row].get('id')
+            if record_id in wanted:
+                positions[record_id] = position
+        ranked = [record_id for record_id in ranked if record_id in positions]
+        if not ranked:
+            return
+        wanted = set(ranked)
+        rows = visible_rows[:max(positions.values()) + 1]
+        order = [self.records[rows[positions[record_id]]] for record_id in ranked]
+        order += [self.records[row] for row in rows if self.records[row].get('id') not in wanted]
+        moved = {}
+        
+        def reorder():
+            for row, record in zip(rows, order):
+                if record is not self.records[row]:
+                    self.set_item_record(self.record_list.item(row), record)
+                    moved[record.get('id')] = row
+        self.search_moved = moved
+        self.reorder_items(reorder)
+    
+    def record_row(self, record_id):
+        """记录在列表中的行号（考虑按得分排列的条目），找不到返回 None"""
+        row = self.search_moved.get(record_id)
+        if row is not None:
+            return row
+        return self.vault.find_index(record_id)
+    
+    def finish_search(self):
+        """搜索框的查询尚未应用到列表（等待输入停顿或后台搜索未完成）时，在界面线程中立即执行"""
+        if not self.search_timer.isActive() and self.search_ranked_generation == self.search_generation:
+            return
+        self.search_timer.stop()
+        query = self.current_query()
+        if query is None:
+            return
+        self.cancel_search()
+        self.search_generation += 1
+        if not query:
+            self.apply_search_results(None)
+            return
+        records = list(self.records)
+        matched, ranked = query.run(self.vault.search_index, records, DEFAULT_LIMIT)
+        self.apply_search_results(({record.get('id') for record in records}, matched, ranked))
+    
+    def visible_record_ids(self):
+        """列表中当前显示（未被搜索隐藏）的记录ID，按列表顺序"""
+        role = QtCore.Qt.ItemDataRole.UserRole
+        return [self.record_list.item(row).data(role) for row in range(self.record_list.count())
+                if not self.record_list.item(row).isHidden()]
+    
+    def select_best_match(self):
+        """选中最近一次搜索中得分最高的记录"""
+        if not self.search_ranked:
+            return
+        row = self.record_row(self.search_ranked[0])
+        if row is not None:
+            self.record_list.setCurrentRow(row)
     
     def clear_form(self):
         """清空表单"""
@@ -1614,10 +1855,10 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         if not selected_items:
             return
         
-        index = self.record_list.row(selected_items[0])
-        if 0 <= index < len(self.records):
+        index = self.vault.find_index(selected_items[0].data(QtCore.Qt.ItemDataRole.UserRole))
+        if index is not None:
             record = self.records[index]
-            self.current_record_id = index
+            self.current_record_id = record.get('id')
             
             # 填充表单
             self.website_input.setText(record.get('website', ''))
@@ -1630,13 +1871,10 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
             self.update_name_inputs()
             
             if name_type == "单一用户名":
-                if hasattr(self, 'username_input'):
-                    self.username_input.setText(name_data.get('username', ''))
+                self.username_input.setText(name_data.get('username', ''))
             elif name_type == "分开的姓名":
-                if hasattr(self, 'first_name_input'):
-                    self.first_name_input.setText(name_data.get('first_name', ''))
-                if hasattr(self, 'last_name_input'):
-                    self.last_name_input.setText(name_data.get('last_name', ''))
+                self.first_name_input.setText(name_data.get('first_name', ''))
+                self.last_name_input.setText(name_data.get('last_name', ''))
             
             self.password_input.setText(record.get('password', ''))
             self.email_input.setText(record.get('email', ''))
@@ -1654,9 +1892,9 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         name_type = self.name_type_combo.currentText()
         name_data = {"type": name_type}
         
-        if name_type == "单一用户名" and hasattr(self, 'username_input'):
+        if name_type == "单一用户名":
             name_data["username"] = self.username_input.text().strip()
-        elif name_type == "分开的姓名" and hasattr(self, 'first_name_input') and hasattr(self, 'last_name_input'):
+        elif name_type == "分开的姓名":
             name_data["first_name"] = self.first_name_input.text().strip()
             name_data["last_name"] = self.last_name_input.text().strip()
         
@@ -1672,15 +1910,90 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        if hasattr(self, 'current_record_id') and self.current_record_id is not None:
-            self.records[self.current_record_id] = record_data
+        if getattr(self, 'current_record_id', None):
+            record_data['id'] = self.current_record_id
         else:
-            self.records.append(record_data)
+            record_data['id'] = new_record_id()
+        
+        old_records = list(self.records)
+        self.vault.put_record(Record.from_dict(record_data))
+        
+        if self.save_passwords():
+            self.record_edit("保存记录", old_records)
+            # 增量更新列表，保留搜索条件和滚动位置
+            self.sync_record_list(old_records, self.records)
+            self.new_record()
+            self.toast.show_message("记录保存成功")
+    
+    def generate_password(self):
+        """按选择的方式生成一个未被其他记录使用的密码，填入密码框"""
+        kind = self.generator_combo.currentText()
+        policy = self.GENERATOR_POLICIES[kind]
+        try:
+            password = self.vault.generate_password(policy)
+        except (GeneratorPolicyError, OSError) as e:
+            QtWidgets.QMessageBox.warning(self, "生成密码失败", str(e))
+            return
+        self.password_input.setText(password)
+        self.toast.show_message(f"已生成{kind}（约 {policy.entropy():.0f} 位熵）")
+    
+    def rotate_passwords(self):
+        """批量更换匹配当前搜索条件的记录的密码：一个事务，只保存一次、刷新一次列表
+
+        更换的正是列表中显示的搜索结果（与列表相同的查询和结果数量），不另行搜索。
+        """
+        query = self.search_input.text().strip()
+        try:
+            parse_query(query)
+        except QuerySyntaxError as e:
+            QtWidgets.QMessageBox.warning(self, "查询错误", str(e))
+            return
+        record_ids = None
+        if query:
+            self.finish_search()
+            record_ids = self.visible_record_ids()
+        record_ids = [record.get('id') for record in self.vault.rotation_candidates(record_ids)]
+        count = len(record_ids)
+        if not count:
+            QtWidgets.QMessageBox.information(self, "批量换密码", "没有需要更换密码的记录")
+            return
+        
+        kind = self.generator_combo.currentText()
+        scope = "匹配当前搜索条件的" if query else "全部"
+        reply = QtWidgets.QMessageBox.question(
+            self, '确认批量换密码',
+            f'将为{scope} {count} 条记录生成新的{kind}，旧密码保留在修改历史中。确定吗？',
+            QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No
+        )
+        if reply != QtWidgets.QMessageBox.StandardButton.Yes:
+            return
+        
+        old_records = list(self.records)
+        try:
+            rotated = self.vault.rotate_passwords(record_ids, self.GENERATOR_POLICIES[kind])
+        except GeneratorPolicyError as e:
+            QtWidgets.QMessageBox.warning(self, "批量换密码失败", str(e))
+            return
         
         if self.save_passwords():
-            self.refresh_record_list()
-            self.clear_form()
-            QtWidgets.QMessageBox.information(self, "成功", "记录保存成功")
+            self.record_edit("批量换密码", old_records)
+            self.sync_record_list(old_records, self.records)
+            # 正在编辑的记录被更换了密码：表单中显示新密码，避免随后保存时写回旧密码
+            current_id = getattr(self, 'current_record_id', None)
+            for record in rotated:
+                if record.get('id') == current_id:
+                    self.password_input.setText(record.get('password', ''))
+            self.toast.show_message(f"已更换 {len(rotated)} 条记录的密码")
+    
+    def show_record_history(self):
+        """显示当前记录的修改历史（此时才读取历史文件）"""
+        record_id = getattr(self, 'current_record_id', None)
+        if not record_id:
+            QtWidgets.QMessageBox.warning(self, "操作错误", "请先选择一条记录")
+            return
+        dialog = RecordHistoryDialog(self.vault.record_history(record_id), self.vault.history.max_entries, self)
+        dialog.password_chosen.connect(self.password_input.setText)
+        dialog.exec()
     
     def delete_selected(self):
         """删除选中记录"""
@@ -1696,15 +2009,135 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         )
         
         if reply == QtWidgets.QMessageBox.StandardButton.Yes:
-            indices = sorted([self.record_list.row(item) for item in selected_items], reverse=True)
-            for index in indices:
-                if 0 <= index < len(self.records):
-                    del self.records[index]
+            role = QtCore.Qt.ItemDataRole.UserRole
+            old_records = list(self.records)
+            self.vault.delete_records(item.data(role) for item in selected_items)
             
             if self.save_passwords():
-                self.refresh_record_list()
+                self.record_edit(f"删除 {len(selected_items)} 条记录", old_records)
+                self.sync_record_list(old_records, self.records)
                 self.clear_form()
     
+    def record_edit(self, text, old_records):
+        """把一次修改（修改前的记录列表 -> 当前记录）记入撤销栈"""
+        self.undo_stack.push(EditCommand.from_records(text, old_records, self.records))
+        self.update_undo_buttons()
+    
+    def update_undo_buttons(self):
+        """按撤销栈更新撤销/重做按钮（加载期间禁用）"""
+        loading = self.is_loading()
+        for button, shortcut, available, action, text in (
+                (self.undo_btn, self.undo_shortcut, self.undo_stack.can_undo(), "撤销", self.undo_stack.undo_text()),
+                (self.redo_btn, self.redo_shortcut, self.undo_stack.can_redo(), "重做", self.undo_stack.redo_text())):
+            button.setEnabled(available and not loading)
+            shortcut.setEnabled(available and not loading)
+            button.setToolTip(f"{action}：{text}" if available else f"没有可{action}的操作")
+    
+    def undo(self):
+        """撤销最近一次修改"""
+        if self.undo_stack.can_undo():
+            self.run_undo_step(self.undo_stack.undo, "已撤销")
+    
+    def redo(self):
+        """重做最近一次撤销的修改"""
+        if self.undo_stack.can_redo():
+            self.run_undo_step(self.undo_stack.redo, "已重做")
+    
+    def run_undo_step(self, step, done_text):
+        """执行一步撤销或重做：增量刷新列表并保存"""
+        if self.is_loading():
+            return
+        old_records = list(self.records)
+        try:
+            command = step(self.vault)
+        except UndoConflictError as e:
+            print(f"撤销错误: {e}")
+            QtWidgets.QMessageBox.warning(self, "无法撤销", "记录已被其他窗口修改，撤销记录已清空")
+            self.update_undo_buttons()
+            return
+        self.save_passwords()
+        self.sync_record_list(old_records, self.records)
+        # 表单中的记录被删除或改变时清空或重新显示表单
+        current_id = getattr(self, 'current_record_id', None)
+        if current_id and any(change[0] == current_id for change in command.changes):
+            if self.vault.find_index(current_id) is None:
+                self.clear_form()
+            else:
+                self.show_record_details()
+        self.update_undo_buttons()
+        self.toast.show_message(f"{done_text}：{command.text}")
+    
+    def show_reuse_report(self):
+        """显示重复密码报告，选中报告中的记录时在列表中定位"""
+        dialog = PasswordReuseDialog(self.vault.password_reuse_groups(), self.record_item_text, self)
+        dialog.record_activated.connect(self.select_record)
+        dialog.exec()
+    
+    def start_similarity_audit(self):
+        """在后台线程中对当前记录快照查找相似密码，完成后显示报告"""
+        if self.similarity_thread is not None:
+            return
+        thread = SimilarityThread(list(self.records), parent=self)
+        thread.similarity_finished.connect(self.show_similarity_report)
+        thread.finished.connect(self.on_similarity_audit_finished)
+        self.similarity_thread = thread
+        self.similar_report_btn.setEnabled(False)
+        self.similar_report_btn.setText("检查中...")
+        thread.start()
+    
+    def on_similarity_audit_finished(self):
+        self.similarity_thread.deleteLater()
+        self.similarity_thread = None
+        self.similar_report_btn.setEnabled(True)
+        self.similar_report_btn.setText("相似密码")
+    
+    def show_similarity_report(self, groups):
+        """显示相似密码报告"""
+        dialog = SimilarPasswordDialog(groups, self.record_item_text, self)
+        dialog.record_activated.connect(self.select_record)
+        dialog.exec()
+    
+    def check_breached_passwords(self):
+        """对照本地的泄露密码列表（见 breach.py）检查所有记录的密码"""
+        from .breach import BREACH_FILE, BreachDatabase
+        if not os.path.exists(BREACH_FILE):
+            QtWidgets.QMessageBox.information(
+                self, "泄露检查",
+                f"未找到泄露密码文件 {BREACH_FILE}。\n\n"
+                "请先从 haveibeenpwned.com 下载 SHA-1 格式的泄露密码列表，然后运行：\n"
+                "python -m auth.breach 下载的文件"
+            )
+            return
+        records = list(self.records)
+        try:
+            with BreachDatabase(BREACH_FILE) as database:
+                counts = database.check_records(records)
+        except (OSError, ValueError) as e:
+            print(f"泄露检查错误: {e}")
+            QtWidgets.QMessageBox.critical(self, "错误", f"读取泄露密码文件失败: {e}")
+            return
+        
+        by_password = {}
+        for record in records:
+            if record.get('id') in counts:
+                by_password.setdefault(record.get('password'), []).append(record)
+        groups = sorted(by_password.values(), key=lambda group: counts[group[0].get('id')], reverse=True)
+        dialog = BreachedPasswordDialog(groups, counts, self.record_item_text, self)
+        dialog.record_activated.connect(self.select_record)
+        dialog.exec()
+    
+    def select_record(self, record_id):
+        """在列表中选中并显示指定记录（被搜索隐藏时先清空搜索）"""
+        row = self.record_row(record_id)
+        if row is None:
+            return
+        if self.record_list.item(row).isHidden():
+            self.search_input.clear()
+            self.filter_records()
+            row = self.record_row(record_id)
+        self.record_list.setCurrentRow(row)
+        self.record_list.scrollToItem(self.record_list.item(row))
+    
     def clear_all(self):
         """清空所有记录"""
         if not self.records:
@@ -1713,16 +2146,18 @@ class PasswordManagerWindow(QtWidgets.QMainWindow):
         
         reply = QtWidgets.QMessageBox.question(
             self, '确认清空', 
-            '确定要清空所有记录吗？此操作不可撤销！',
+            f'确定要清空所有 {len(self.records)} 条记录吗？清空后可以点击“撤销”恢复。',
             QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No
         )
         
         if reply == QtWidgets.QMessageBox.StandardButton.Yes:
-            self.records.clear()
+            old_records = list(self.records)
+            self.vault.clear_records()
             if self.save_passwords():
-                self.refresh_record_list()
+                self.record_edit("清空记录", old_records)
+                self.sync_record_list(old_records, self.records)
                 self.clear_form()
-                QtWidgets.QMessageBox.information(self, "成功", "所有记录已清空")
+                self.toast.show_message("所有记录已清空")
 
 
 def show_main_window(username):
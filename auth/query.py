@@ -0,0 +1,249 @@
+# auth/query.py
+# 结构化查询：把 "site:github email:@corp.com verification:二次验证 updated:<2025-01-01 支付"
+# 这样的查询语句解析为字段过滤条件和自由文本
+#
+# 过滤条件依次执行，结果取交集：网站、姓名、邮箱走搜索索引中的整块文本，备注走片段倒排索引，
+# 域名走规范域名索引，其余字段对整列值做批量比较（map / compress，循环在 C 中完成）。
+# 自由文本部分照常进行模糊匹配和排序，只在过滤后的记录中计分。
+#
+# 语法：
+#   字段:值            字段包含该值（不区分大小写），值中有空格时用双引号括起来
+#   domain:github.com  网址属于该网站（按规范域名比较，www.github.com/login、GitHub 等写法都算）
+#   -字段:值           排除匹配的记录
+#   updated:<2025-01-01  按修改时间比较，支持 < <= > >= =，日期可写到年、月、日或秒
+#                      （带时刻时用引号：updated:>="2025-02-03 04:05"）
+#   其他内容            自由文本；不认识的字段名（如 https://...）也按自由文本处理
+
+import re
+import time
+from operator import contains, ge, lt
+
+from .binformat import parse_timestamp
+from .domain import canonical_domain, same_site
+from .search import DEFAULT_LIMIT, SearchIndex, normalize, record_matches, record_search_keys
+
+_TOKEN = re.compile(r'(?P<neg>-)?(?:(?P<field>[^\s:"]+):)?(?:(?P<op>[<>=]*)"(?P<quoted>[^"]*)"?|(?P<bare>\S*))')
+_TIME_OPERATORS = ('<=', '>=', '<', '>', '=')
+_DATE_PATTERN = re.compile(r'(\d{4})(?:-(\d{1,2})(?:-(\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?)?)?$')
+_NAN = float('nan')
+
+
+class QuerySyntaxError(ValueError):
+    """查询语句无法解析（如日期格式错误）"""
+
+
+class _Field:
+    """可过滤的字段
+
+    columns 为该字段在记录搜索键（record_search_keys）中的位置，这些字段走搜索索引；
+    其余字段用 extract 取出整列值后批量比较。
+    """
+
+    def __init__(self, name, extract=None, columns=None):
+        self.name = name
+        self.extract = extract
+        self.columns = columns
+
+
+def _record_epoch(record):
+    """记录的修改时间（整数时间戳）；没有或无法解析时为 NaN，任何比较都不成立"""
+    value = getattr(record, 'timestamp', None)
+    if isinstance(value, int):
+        return value
+    value = record.get('timestamp')
+    epoch = parse_timestamp(value) if isinstance(value, str) else None
+    return _NAN if epoch is None else epoch
+
+
+def _text(key):
+    return lambda record: normalize(record.get(key, ''))
+
+
+_SITE = _Field('site', columns=(0, 1, 4, 5))
+_WEBSITE = _Field('website', columns=(1,))
+_NAME = _Field('name', columns=(2, 6, 7))
+_EMAIL = _Field('email', columns=(3,))
+_NOTES = _Field('notes', _text('notes'))
+_DOMAIN = _Field('domain', lambda record: canonical_domain(record.get('website', '')))
+_VERIFICATION = _Field('verification', _text('verification'))
+_REGISTRATION = _Field('registration_type', _text('registration_type'))
+_UPDATED = _Field('updated', _record_epoch)
+
+# 字段名（含别名） -> 字段
+FIELDS = {
+    'site': _SITE, '网站': _SITE,
+    'url': _WEBSITE, 'website': _WEBSITE, '网址': _WEBSITE,
+    'name': _NAME, 'user': _NAME, 'username': _NAME, '用户名': _NAME,
+    'email': _EMAIL, 'mail': _EMAIL, '邮箱': _EMAIL,
+    'notes': _NOTES, 'note': _NOTES, '备注': _NOTES,
+    'domain': _DOMAIN, '域名': _DOMAIN,
+    'verification': _VERIFICATION, 'verify': _VERIFICATION, '验证': _VERIFICATION,
+    'registration': _REGISTRATION, 'reg': _REGISTRATION, '注册': _REGISTRATION,
+    'updated': _UPDATED, 'time': _UPDATED, '时间': _UPDATED,
+}
+
+
+class TextFilter:
+    """字段包含给定文本"""
+
+    def __init__(self, field, value, negate=False):
+        self.field = field
+        self.value = value
+        self.negate = negate
+
+    def select(self, index):
+        """在搜索索引中查找匹配的记录ID集合"""
+        if self.field.columns is not None:
+            found = index.keys_containing(self.field.columns, self.value)
+        elif self.field is _NOTES:
+            found = index.notes_containing(self.value)
+        elif self.field is _DOMAIN:
+            found = index.site_ids(self.value)
+        else:
+            found = index.scan(self.field.name, self.field.extract, contains, self.value)
+        return index.all_ids() - found if self.negate else found
+
+    def matches(self, record):
+        if self.field.columns is not None:
+            keys = record_search_keys(record)
+            found = any(self.value in keys[column] for column in self.field.columns if column < len(keys))
+        elif self.field is _DOMAIN:
+            found = same_site(canonical_domain(self.value), self.field.extract(record))
+        else:
+            found = self.value in self.field.extract(record)
+        return found != self.negate
+
+
+class TimeFilter:
+    """修改时间在给定范围内：start <= 时间 < end（None 表示不限），没有时间的记录不匹配"""
+
+    def __init__(self, field, start, end, negate=False):
+        self.field = field
+        self.start = start
+        self.end = end
+        self.negate = negate
+
+    def select(self, index):
+        """对整列时间批量比较，返回匹配的记录ID集合"""
+        found = None
+        if self.start is not None:
+            found = index.scan(self.field.name, self.field.extract, ge, self.start)
+        if self.end is not None:
+            before = index.scan(self.field.name, self.field.extract, lt, self.end)
+            found = before if found is None else found & before
+        return index.all_ids() - found if self.negate else found
+
+    def matches(self, record):
+        epoch = self.field.extract(record)
+        found = (self.start is None or epoch >= self.start) and (self.end is None or epoch < self.end)
+        return found != self.negate
+
+
+def _date_range(text):
+    """日期文本对应的时间范围 (开始, 结束)：2025 表示全年，2025-01 表示整月，以此类推"""
+    match = _DATE_PATTERN.match(text)
+    if match is None:
+        raise QuerySyntaxError(f"无法识别的日期: {text or '(空)'}")
+    parts = [int(part) if part is not None else None for part in match.groups()]
+    year, month, day, hour, minute, second = parts
+    if month is None:
+        start, end = (year, 1, 1, 0, 0, 0), (year + 1, 1, 1, 0, 0, 0)
+    elif day is None:
+        start, end = (year, month, 1, 0, 0, 0), (year + month // 12, month % 12 + 1, 1, 0, 0, 0)
+    elif hour is None:
+        start, end = (year, month, day, 0, 0, 0), (year, month, day + 1, 0, 0, 0)
+    elif second is None:
+        start, end = (year, month, day, hour, minute, 0), (year, month, day, hour, minute + 1, 0)
+    else:
+        start, end = (year, month, day, hour, minute, second), (year, month, day, hour, minute, second + 1)
+    if not (1 <= (month or 1) <= 12 and 1 <= (day or 1) <= 31 and (hour or 0) < 24
+            and (minute or 0) < 60 and (second or 0) < 60):
+        raise QuerySyntaxError(f"无法识别的日期: {text}")
+    try:
+        # 结束时间由 mktime 自动进位（如 13 月、32 日），按本地时间计算
+        return (int(time.mktime(start + (0, 0, -1))), int(time.mktime(end + (0, 0, -1))))
+    except (OverflowError, ValueError):
+        raise QuerySyntaxError(f"无法识别的日期: {text}") from None
+
+
+def _time_filter(field, value, negate):
+    """updated:<2025-01-01 这类条件；没有比较符时表示在该日期（年、月、日）之内"""
+    operator = next((op for op in _TIME_OPERATORS if value.startswith(op)), '')
+    start, end = _date_range(value[len(operator):].strip())
+    if operator == '<':
+        return TimeFilter(field, None, start, negate)
+    if operator == '<=':
+        return TimeFilter(field, None, end, negate)
+    if operator == '>':
+        return TimeFilter(field, end, None, negate)
+    if operator == '>=':
+        return TimeFilter(field, start, None, negate)
+    return TimeFilter(field, start, end, negate)
+
+
+class Query:
+    """编译后的查询：字段过滤条件（依次执行取交集）+ 自由文本（模糊匹配并排序）"""
+
+    def __init__(self, filters, text):
+        self.filters = filters
+        self.text = text
+
+    def __bool__(self):
+        return bool(self.filters or self.text)
+
+    def matches(self, record):
+        """单条记录是否匹配（不使用索引，用于逐条追加的记录）"""
+        return all(f.matches(record) for f in self.filters) and record_matches(record, self.text)
+
+    def run(self, index, records, limit=DEFAULT_LIMIT, is_cancelled=lambda: False):
+        """在 records 快照中执行查询，返回值同 SearchIndex.search"""
+        return index.search(records, self.text, limit, is_cancelled, filters=self.filters)
+
+
+def parse_query(text):
+    """解析查询语句，返回 Query；日期等格式错误时抛出 QuerySyntaxError"""
+    text = normalize(text)
+    filters = []
+    words = []
+    position = 0
+    while position < len(text):
+        if text[position].isspace():
+            position += 1
+            continue
+        match = _TOKEN.match(text, position)
+        position = match.end() if match.end() > position else position + 1
+        field = FIELDS.get(match.group('field'))
+        if field is None:
+            words.append(match.group(0))
+            continue
+        value = match.group('quoted')
+        if value is None:
+            value = match.group('bare')
+        else:
+            # 比较符可以写在引号外：updated:>="2025-02-03 04:05"
+            value = match.group('op') + value
+        value = value.strip()
+        if not value:
+            # 还没输入值（如 "site:"），忽略该条件
+            continue
+        negate = bool(match.group('neg'))
+        if field is _UPDATED:
+            filters.append(_time_filter(field, value, negate))
+        else:
+            filters.append(TextFilter(field, value, negate))
+    return Query(filters, ' '.join(words))
+
+
+def search_records(records, text, limit=None, index=None):
+    """按查询语句搜索记录列表，返回匹配的记录
+
+    有自由文本时按得分从高到低排列，否则保持原有顺序；limit 限制返回数量。
+    index 为可复用的 SearchIndex（多次查询同一批记录时传入以免重复建立）。
+    """
+    query = parse_query(text)
+    index = index or SearchIndex()
+    matched, ranked = query.run(index, records, len(records) if limit is None else limit)
+    by_id = {record.get('id'): record for record in records}
+    if query.text:
+        return [by_id[record_id] for record_id in ranked]
+    return [record for record in records if record.get('id') in matched][:limit]
@@ -0,0 +1,157 @@
+# auth/record.py
+# 紧凑的密码记录：字段存于 __slots__，枚举值共享驻留字符串，时间存为整数时间戳
+#
+# Record 实现只读的 Mapping 接口（get / [] / in / items / dict(record)），
+# 界面代码可以像使用字典一样使用；记录只整体替换，不原地修改。
+# 无法紧凑存储的值（非字符串、未知字段、格式异常的姓名或时间）原样保存在 extras 中，保证往返无损。
+
+import sys
+from collections.abc import Mapping
+
+from .binformat import parse_timestamp, format_timestamp
+
+# 对外的键顺序（与写入文件的字段顺序一致）
+KEYS = ('id', 'website', 'site_name', 'name', 'password', 'email',
+        'verification', 'registration_type', 'notes', 'timestamp')
+NAME_PARTS = ('username', 'first_name', 'last_name')
+_TEXT_KEYS = ('id', 'website', 'site_name', 'password', 'email', 'notes')
+_ENUM_KEYS = ('verification', 'registration_type')
+
+
+def _take_text(data, key, extras):
+    """取出字符串字段；字段缺失返回 None，非字符串值放入 extras"""
+    if key not in data:
+        return None
+    value = data[key]
+    if isinstance(value, str):
+        return value
+    extras[key] = value
+    return None
+
+
+class Record(Mapping):
+    """紧凑的密码记录（只读字典接口），None 表示字段不存在"""
+
+    __slots__ = ('id', 'website', 'site_name', 'name_type', 'username', 'first_name', 'last_name',
+                 'password', 'email', 'verification', 'registration_type', 'notes', 'timestamp',
+                 'extras')
+
+    @classmethod
+    def from_dict(cls, data):
+        """由记录字典创建紧凑记录"""
+        if isinstance(data, Record):
+            return data
+        record = cls.__new__(cls)
+        extras = {}
+        for key in _TEXT_KEYS:
+            setattr(record, key, _take_text(data, key, extras))
+        for key in _ENUM_KEYS:
+            value = _take_text(data, key, extras)
+            setattr(record, key, sys.intern(value) if value is not None else None)
+
+        record.name_type = record.username = record.first_name = record.last_name = None
+        if 'name' in data:
+            name = data['name']
+            if (isinstance(name, dict) and isinstance(name.get('type'), str)
+                    and all(k == 'type' or (k in NAME_PARTS and isinstance(v, str)) for k, v in name.items())):
+                record.name_type = sys.intern(name['type'])
+                record.username = name.get('username')
+                record.first_name = name.get('first_name')
+                record.last_name = name.get('last_name')
+            else:
+                extras['name'] = name
+
+        timestamp = _take_text(data, 'timestamp', extras)
+        if timestamp is not None:
+            epoch = parse_timestamp(timestamp)
+            # 无法无损往返的时间（如夏令时重复的时刻）保留原字符串
+            if epoch is not None and format_timestamp(epoch) == timestamp:
+                timestamp = epoch
+        record.timestamp = timestamp
+
+        for key, value in data.items():
+            if key not in _SLOTS:
+                extras[key] = value
+        record.extras = extras or None
+        return record
+
+    def to_dict(self):
+        """转换为普通字典（新对象，可修改）"""
+        return {key: self[key] for key in self}
+
+    def _name(self):
+        if self.name_type is None:
+            return None
+        name = {'type': self.name_type}
+        if self.username is not None:
+            name['username'] = self.username
+        if self.first_name is not None:
+            name['first_name'] = self.first_name
+        if self.last_name is not None:
+            name['last_name'] = self.last_name
+        return name
+
+    def _timestamp(self):
+        if isinstance(self.timestamp, int):
+            return format_timestamp(self.timestamp)
+        return self.timestamp
+
+    def _state(self):
+        return tuple(getattr(self, slot) for slot in Record.__slots__)
+
+    def __getitem__(self, key):
+        getter = _GETTERS.get(key)
+        if getter is not None:
+            value = getter(self)
+            if value is not None:
+                return value
+        if self.extras is not None and key in self.extras:
+            return self.extras[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        slot = _SLOTS.get(key)
+        if slot is not None and getattr(self, slot) is not None:
+            return True
+        return self.extras is not None and key in self.extras
+
+    def __iter__(self):
+        for key in KEYS:
+            if getattr(self, _SLOTS[key]) is not None:
+                yield key
+        if self.extras is not None:
+            yield from self.extras
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        if isinstance(other, Record):
+            return self._state() == other._state()
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (Record.from_dict, (self.to_dict(),))
+
+
+# 键 -> 表示该字段是否存在的槽位
+_SLOTS = {key: key for key in KEYS}
+_SLOTS['name'] = 'name_type'
+_GETTERS = {key: (lambda record, slot=key: getattr(record, slot)) for key in _TEXT_KEYS + _ENUM_KEYS}
+_GETTERS['name'] = Record._name
+_GETTERS['timestamp'] = Record._timestamp
@@ -11,6 +11,12 @@ import secrets
 import base64
 from datetime import datetime
 
+from .storage import atomic_write_json, load_json, read_version, file_lock, merge_mappings
+from .style import apply_app_style, set_state, set_button_style
+from .images import ImageLoader
+from .resources import image_path, set_window_icon
+from .strength import estimate
+
 def _ensure_app():
     app = QtWidgets.QApplication.instance()
     if app is None:
@@ -30,52 +36,72 @@ def decode_from_binary(binary_text):
 class UserManager:
     def __init__(self):
         self.data_file = "users.json"
+        self.version = 0
+        self._base = {}
         self.users = self.load_users()
         
     def load_users(self):
         """加载用户数据"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # 解码二进制数据
-                    decoded_users = {}
-                    for username, user_data in data.items():
-                        decoded_username = decode_from_binary(username)
-                        decoded_data = {
-                            "password": user_data["password"],
-                            "security_question1": decode_from_binary(user_data["security_question1"]) if user_data["security_question1"] else "",
-                            "security_answer1": user_data["security_answer1"],
-                            "security_question2": decode_from_binary(user_data["security_question2"]) if user_data["security_question2"] else "",
-                            "security_answer2": user_data["security_answer2"],
-                            "register_time": user_data.get("register_time", "未知")
-                        }
-                        decoded_users[decoded_username] = decoded_data
-                    return decoded_users
-            except Exception as e:
-                print(f"加载用户数据错误: {e}")
-                return {}
-        return {}
+        try:
+            # 正文损坏时自动从上一代文件恢复
+            with file_lock(self.data_file):
+                data, version = load_json(self.data_file, {})
+            users = self.decode_users(data)
+            self.version = version
+            self._base = self.copy_users(users)
+            return users
+        except Exception as e:
+            print(f"加载用户数据错误: {e}")
+            return {}
+    
+    def decode_users(self, data):
+        """解码二进制数据"""
+        decoded_users = {}
+        for username, user_data in data.items():
+            decoded_username = decode_from_binary(username)
+            decoded_data = {
+                "password": user_data["password"],
+                "security_question1": decode_from_binary(user_data["security_question1"]) if user_data["security_question1"] else "",
+                "security_answer1": user_data["security_answer1"],
+                "security_question2": decode_from_binary(user_data["security_question2"]) if user_data["security_question2"] else "",
+                "security_answer2": user_data["security_answer2"],
+                "register_time": user_data.get("register_time", "未知")
+            }
+            decoded_users[decoded_username] = decoded_data
+        return decoded_users
+    
+    def encode_users(self, users):
+        """编码为二进制"""
+        encoded_users = {}
+        for username, user_data in users.items():
+            encoded_username = encode_to_binary(username)
+            encoded_data = {
+                "password": user_data["password"],
+                "security_question1": encode_to_binary(user_data["security_question1"]) if user_data["security_question1"] else "",
+                "security_answer1": user_data["security_answer1"],
+                "security_question2": encode_to_binary(user_data["security_question2"]) if user_data["security_question2"] else "",
+                "security_answer2": user_data["security_answer2"],
+                "register_time": user_data.get("register_time", "未知")
+            }
+            encoded_users[encoded_username] = encoded_data
+        return encoded_users
+    
+    def copy_users(self, users):
+        """复制用户数据（用户字典会被原地修改，合并基准需要独立副本）"""
+        return {username: dict(user_data) for username, user_data in users.items()}
     
     def save_users(self):
-        """保存用户数据"""
+        """保存用户数据；文件已被其他进程修改时按用户合并，而不是整体覆盖"""
         try:
-            # 编码为二进制
-            encoded_users = {}
-            for username, user_data in self.users.items():
-                encoded_username = encode_to_binary(username)
-                encoded_data = {
-                    "password": user_data["password"],
-                    "security_question1": encode_to_binary(user_data["security_question1"]) if user_data["security_question1"] else "",
-                    "security_answer1": user_data["security_answer1"],
-                    "security_question2": encode_to_binary(user_data["security_question2"]) if user_data["security_question2"] else "",
-                    "security_answer2": user_data["security_answer2"],
-                    "register_time": user_data.get("register_time", "未知")
-                }
-                encoded_users[encoded_username] = encoded_data
+            with file_lock(self.data_file):
+                disk_version = read_version(self.data_file)
+                if disk_version != self.version:
+                    data, disk_version = load_json(self.data_file, {})
+                    self.users = merge_mappings(self._base, self.users, self.decode_users(data))
                 
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(encoded_users, f, ensure_ascii=False, indent=2)
+                self.version = max(disk_version, self.version) + 1
+                atomic_write_json(self.data_file, self.encode_users(self.users), version=self.version)
+                self._base = self.copy_users(self.users)
             return True
         except Exception as e:
             print(f"保存用户数据错误: {e}")
@@ -196,7 +222,7 @@ class ClickableLabel(QtWidgets.QLabel):
     def __init__(self, text):
         super().__init__(text)
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
-        self.setStyleSheet("color: #3b82f6; text-decoration: underline;")
+        self.setObjectName("link")
         
     def mousePressEvent(self, event):
         self.clicked.emit()
@@ -211,19 +237,7 @@ class GlowButton(QtWidgets.QPushButton):
         self._color = QtGui.QColor(color)
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
         self.setMinimumHeight(38)
-        self.setStyleSheet("""
-            QPushButton {
-                border: none;
-                border-radius: 12px;
-                color: white;
-                background-color: #3b82f6;
-                font-size: 15px;
-                padding: 6px 18px;
-            }
-            QPushButton:pressed {
-                background-color: #2563eb;
-            }
-        """)
+        self.setObjectName("glowButton")
 
     def enterEvent(self, event):
         self._hover = True
@@ -251,23 +265,7 @@ class RefreshButton(QtWidgets.QPushButton):
     """刷新按钮：带有刷新图标"""
     def __init__(self):
         super().__init__()
-        self.setStyleSheet("""
-            QPushButton {
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                background-color: white;
-                min-width: 30px;
-                min-height: 30px;
-                max-width: 30px;
-                max-height: 30px;
-                color: #6b7280;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-                color: #3b82f6;
-            }
-        """)
+        self.setObjectName("iconButton")
         self.setText("↻")
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
         self.setToolTip("刷新页面")
@@ -277,23 +275,7 @@ class InfoButton(QtWidgets.QPushButton):
     """信息按钮：带有i图标"""
     def __init__(self):
         super().__init__()
-        self.setStyleSheet("""
-            QPushButton {
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                background-color: white;
-                min-width: 30px;
-                min-height: 30px;
-                max-width: 30px;
-                max-height: 30px;
-                color: #6b7280;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-                color: #3b82f6;
-            }
-        """)
+        self.setObjectName("iconButton")
         self.setText("i")
         self.setCursor(QtGui.QCursor(QtCore.Qt.CursorShape.PointingHandCursor))
         self.setToolTip("详情")
@@ -303,20 +285,7 @@ class SquareButton(QtWidgets.QPushButton):
     """正方形按钮：圆润边角样式"""
     def __init__(self, text=""):
         super().__init__(text)
-        self.setStyleSheet("""
-            QPushButton {
-                border: 1px solid #d1d5db;
-                border-radius: 8px;
-                background-color: white;
-                min-width: 30px;
-                min-height: 30px;
-                max-width: 30px;
-                max-height: 30px;
-            }
-            QPushButton:hover {
-                background-color: #f3f4f6;
-            }
-        """)
+        self.setObjectName("squareButton")
         
 
 class StepIndicator(QtWidgets.QWidget):
@@ -340,7 +309,7 @@ class StepIndicator(QtWidgets.QWidget):
             bar = QtWidgets.QWidget()
             bar.setFixedHeight(6)  # 增加进度条高度
             bar.setFixedWidth(60)
-            bar.setStyleSheet("background-color: #e5e7eb; border-radius: 3px;")
+            bar.setObjectName("stepBar")
             layout.addWidget(bar)
             self.bars.append(bar)
             
@@ -351,10 +320,7 @@ class StepIndicator(QtWidgets.QWidget):
         """更新当前步骤"""
         self.current_step = step
         for i, bar in enumerate(self.bars):
-            if i <= step:
-                bar.setStyleSheet("background-color: #10b981; border-radius: 3px;")
-            else:
-                bar.setStyleSheet("background-color: #e5e7eb; border-radius: 3px;")
+            set_state(bar, "done", i <= step)
 
 
 class ToastMessage(QtWidgets.QWidget):
@@ -390,36 +356,18 @@ class ToastMessage(QtWidgets.QWidget):
         
         # 消息文本
         self.message_label = QtWidgets.QLabel()
-        self.message_label.setStyleSheet("color: #92400e; font-size: 14px; font-weight: bold;")
+        self.message_label.setObjectName("toastMessage")
         layout.addWidget(self.message_label)
         
         # 关闭按钮
         self.close_btn = QtWidgets.QPushButton("×")
         self.close_btn.setFixedSize(20, 20)
-        self.close_btn.setStyleSheet("""
-            QPushButton {
-                border: none;
-                background-color: transparent;
-                color: #92400e;
-                font-size: 16px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: rgba(0,0,0,0.1);
-                border-radius: 10px;
-            }
-        """)
+        self.close_btn.setObjectName("toastClose")
         self.close_btn.clicked.connect(self.hide_toast)
         layout.addWidget(self.close_btn)
         
         # 设置样式
-        self.setStyleSheet("""
-            ToastMessage {
-                background-color: #fef3c7;
-                border: 1px solid #fbbf24;
-                border-radius: 8px;
-            }
-        """)
+        self.setObjectName("toast")
         
     def hide_toast(self):
         """手动关闭Toast"""
@@ -463,7 +411,7 @@ class PasswordStrengthIndicator(QtWidgets.QWidget):
         for i in range(5):
             bar = QtWidgets.QWidget()
             bar.setFixedHeight(4)
-            bar.setStyleSheet("background-color: #e5e7eb; border-radius: 2px;")
+            bar.setObjectName("strengthBar")
             strength_layout.addWidget(bar)
             self.bars.append(bar)
             
@@ -473,78 +421,45 @@ class PasswordStrengthIndicator(QtWidgets.QWidget):
         self.requirements_label = QtWidgets.QLabel(
             "密码要求：8-20位字符，包含字母和数字，不能包含中文"
         )
-        self.requirements_label.setStyleSheet("color: #6b7280; font-size: 12px;")
+        self.requirements_label.setObjectName("hintLabel")
         layout.addWidget(self.requirements_label)
         
+        # 强度不足时的具体原因（如 "这是非常常见的密码"）
+        self.feedback_label = QtWidgets.QLabel()
+        self.feedback_label.setObjectName("hintLabel")
+        self.feedback_label.setWordWrap(True)
+        self.feedback_label.hide()
+        layout.addWidget(self.feedback_label)
+        
     def update_strength(self, password):
-        """根据密码更新强度指示器"""
+        """根据密码更新强度指示器和提示"""
         strength = self.calculate_strength(password)
         
-        # 更新颜色
-        colors = ["#ef4444", "#f59e0b", "#eab308", "#84cc16", "#10b981"]
-        
+        # 更新颜色：点亮的第 i 格使用第 i 级颜色，只重新应用状态变化的格子
         for i, bar in enumerate(self.bars):
-            if i < strength:
-                bar.setStyleSheet(f"background-color: {colors[i]}; border-radius: 2px;")
-            else:
-                bar.setStyleSheet("background-color: #e5e7eb; border-radius: 2px;")
+            set_state(bar, "level", i + 1 if i < strength else 0)
+        
+        warning = estimate(password).warning() if strength else ""
+        self.feedback_label.setText(warning)
+        self.feedback_label.setVisible(bool(warning))
                 
         return strength
         
     def calculate_strength(self, password):
-        """计算密码强度"""
-        if not password:
-            return 0
-            
-        score = 0
+        """计算密码强度 0..5：按估计的猜测次数评分（见 auth/strength.py），包含中文时为 0
         
-        # 长度检查
-        if len(password) >= 8:
-            score += 1
-        if len(password) >= 12:
-            score += 1
-            
-        # 字符类型检查
-        if re.search(r'[a-z]', password):
-            score += 1
-        if re.search(r'[A-Z]', password):
-            score += 1
-        if re.search(r'\d', password):
-            score += 1
-        if re.search(r'[^a-zA-Z0-9]', password):
-            score += 1
-            
-        # 中文检查
-        if re.search(r'[\u4e00-\u9fff]', password):
+        逐字符输入时复用上一次的估计，每次按键只计算新增的字符。
+        """
+        if not password or re.search(r'[\u4e00-\u9fff]', password):
             return 0
-            
-        return min(score, 5)
+        return estimate(password).score + 1
 
 
 class CustomCheckBox(QtWidgets.QCheckBox):
     """自定义勾选框：圆润边角样式"""
     def __init__(self, text=""):
         super().__init__(text)
-        self.setStyleSheet("""
-            QCheckBox {
-                color: #374151;
-                font-size: 14px;
-            }
-            QCheckBox::indicator {
-                width: 18px;
-                height: 18px;
-                border-radius: 4px;
-                border: 2px solid #d1d5db;
-                background-color: white;
-            }
-            QCheckBox::indicator:checked {
-                background-color: #3b82f6;
-                border-color: #3b82f6;
-            }
-            QCheckBox::indicator:checked:hover {
-                background-color: #2563eb;
-            }
-        """)
+        self.setObjectName("checkBox")
 
 
 class InfoDialog(QtWidgets.QDialog):
@@ -561,7 +476,7 @@ class InfoDialog(QtWidgets.QDialog):
         
         # 标题
         title_label = QtWidgets.QLabel("安密库 - 密码管理器")
-        title_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #111827;")
+        title_label.setObjectName("sectionTitle")
         title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(title_label)
         
@@ -572,7 +487,7 @@ class InfoDialog(QtWidgets.QDialog):
             "• 一键自动填充登录信息\n\n"
             "使用安密库，您只需记住一个主密码，即可安全访问所有账户。"
         )
-        description.setStyleSheet("font-size: 14px; color: #374151; line-height: 1.5;")
+        description.setObjectName("bodyText")
         description.setWordWrap(True)
         layout.addWidget(description)
         
@@ -590,6 +505,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         super().__init__()
         self.setWindowTitle("找回密码 - 安密库 (SecurePass)")
         self.resize(520, 400)
+        apply_app_style()
         self.stage = 0
         self.current_username = ""
         self.current_question_index = 0
@@ -618,7 +534,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         # 标题
         self.title_label = QtWidgets.QLabel("找回密码")
         self.title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        self.title_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #111827;")
+        self.title_label.setObjectName("stageTitle")
         layout.addWidget(self.title_label)
         
         # 步骤指示器
@@ -636,18 +552,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         
         self.username_input = QtWidgets.QLineEdit()
         self.username_input.setPlaceholderText("请输入用户名")
-        self.username_input.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.username_input.setObjectName("formInput")
         form1.addRow("用户名：", self.username_input)
         
         self.stack.addWidget(page1)
@@ -660,7 +565,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         # 安全问题标签和刷新按钮
         question_layout = QtWidgets.QHBoxLayout()
         self.security_question = QtWidgets.QLabel("")
-        self.security_question.setStyleSheet("font-size: 14px; color: #374151;")
+        self.security_question.setObjectName("bodyText")
         question_layout.addWidget(self.security_question)
         
         # 刷新按钮
@@ -672,18 +577,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         
         self.answer_input = QtWidgets.QLineEdit()
         self.answer_input.setPlaceholderText("请输入答案")
-        self.answer_input.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.answer_input.setObjectName("formInput")
         form2.addRow("答案：", self.answer_input)
         
         self.stack.addWidget(page2)
@@ -696,18 +590,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         self.new_password = QtWidgets.QLineEdit()
         self.new_password.setEchoMode(QtWidgets.QLineEdit.EchoMode.Password)
         self.new_password.setPlaceholderText("请输入新密码")
-        self.new_password.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.new_password.setObjectName("formInput")
         form3.addRow("新密码：", self.new_password)
         
         # 密码强度指示器
@@ -719,23 +602,11 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         self.confirm_password = QtWidgets.QLineEdit()
         self.confirm_password.setEchoMode(QtWidgets.QLineEdit.EchoMode.Password)
         self.confirm_password.setPlaceholderText("请再次输入新密码")
-        self.confirm_password.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.confirm_password.setObjectName("formInput")
         confirm_layout.addWidget(self.confirm_password, 1)
         
         self.error_label = QtWidgets.QLabel("")
         self.error_label.setObjectName("error_label")
-        self.error_label.setStyleSheet("color: #ef4444; font-size: 12px;")
         confirm_layout.addWidget(self.error_label)
         
         # 显示密码勾选框
@@ -751,7 +622,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         layout4 = QtWidgets.QVBoxLayout(page4)
         self.error_label_user = QtWidgets.QLabel("")
         self.error_label_user.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        self.error_label_user.setStyleSheet("font-size: 16px; color: #ef4444;")
+        self.error_label_user.setObjectName("errorMessage")
         layout4.addWidget(self.error_label_user)
         self.stack.addWidget(page4)
         
@@ -760,7 +631,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
         layout5 = QtWidgets.QVBoxLayout(page5)
         self.error_label_question = QtWidgets.QLabel("")
         self.error_label_question.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        self.error_label_question.setStyleSheet("font-size: 16px; color: #ef4444;")
+        self.error_label_question.setObjectName("errorMessage")
         layout5.addWidget(self.error_label_question)
         self.stack.addWidget(page5)
         
@@ -804,18 +675,7 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
             self.current_question_index = (self.current_question_index + 1) % len(self.security_questions)
             self.security_question.setText(self.security_questions[self.current_question_index])
             self.answer_input.clear()
-            self.answer_input.setStyleSheet("""
-                QLineEdit {
-                    border: 2px solid #d1d5db;
-                    border-radius: 10px;
-                    padding: 6px 10px;
-                    background-color: white;
-                    font-size: 14px;
-                }
-                QLineEdit:focus {
-                    border: 2px solid #3b82f6;
-                }
-            """)
+            set_state(self.answer_input, "state", "")
         
     def validate_passwords(self):
         """验证密码是否一致"""
@@ -879,10 +739,10 @@ class ForgotPasswordWindow(QtWidgets.QWidget):
             # 验证安全问题答案
             current_question = self.security_questions[self.current_question_index]
             if not user_manager.verify_security_answer(self.current_username, current_question, answer):
-                self.answer_input.setStyleSheet("border: 2px solid #ef4444; border-radius: 10px; padding: 6px 10px;")
+                set_state(self.answer_input, "state", "error")
                 return
             else:
-                self.answer_input.setStyleSheet("border: 2px solid #10b981; border-radius: 10px; padding: 6px 10px;")
+                set_state(self.answer_input, "state", "ok")
                 
         elif self.stage == 2:
             if self.error_label.text() or not self.new_password.text():
@@ -957,22 +817,12 @@ class LoginWindow(QtWidgets.QWidget):
         self.prefilled_password = password
         self.setWindowTitle("登录 - 安密库 (SecurePass)")
         self.resize(520, 400)
-        self.setup_ui()
-        self.connect_signals()
-        self.load_remembered_user()
-        self.set_window_icon()
-
-    def set_window_icon(self):
-        """设置窗口图标"""
-        try:
-            current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            icon_path = os.path.join(current_dir, "images", "Main icon.png")
-            if os.path.exists(icon_path):
-                icon = QtGui.QIcon(icon_path)
-                self.setWindowIcon(icon)
-        except Exception as e:
-            print(f"设置窗口图标失败: {e}")
-
+        apply_app_style()
+        self.setup_ui()
+        self.connect_signals()
+        self.load_remembered_user()
+        set_window_icon(self)
+
     def load_remembered_user(self):
         """加载记住的用户信息"""
         try:
@@ -1023,7 +873,7 @@ class LoginWindow(QtWidgets.QWidget):
         # 标题
         title_label = QtWidgets.QLabel("登录到安密库")
         title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        title_label.setStyleSheet("font-size: 24px; font-weight: bold; color: #111827;")
+        title_label.setObjectName("pageTitle")
         layout.addWidget(title_label)
         
         # 步骤指示器
@@ -1039,18 +889,7 @@ class LoginWindow(QtWidgets.QWidget):
         self.username = QtWidgets.QLineEdit()
         self.username.setPlaceholderText("请输入用户名")
         self.username.setText(self.prefilled_username)
-        self.username.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.username.setObjectName("formInput")
         form_layout.addRow("用户名：", self.username)
         
         # 密码输入
@@ -1059,18 +898,7 @@ class LoginWindow(QtWidgets.QWidget):
         self.password.setEchoMode(QtWidgets.QLineEdit.EchoMode.Password)
         self.password.setPlaceholderText("请输入密码")
         self.password.setText(self.prefilled_password)
-        self.password.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        self.password.setObjectName("formInput")
         password_layout.addWidget(self.password, 1)
         
         # 显示密码和记住我勾选框放在同一行右侧，保持对齐
@@ -1115,18 +943,7 @@ class LoginWindow(QtWidgets.QWidget):
         self.username.clear()
         self.password.clear()
         self.remember_me.setChecked(False)
-        self.password.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-        """)
+        set_state(self.password, "state", "")
         self.toast = ToastMessage(self)
         self.toast.show_message("页面已刷新，用户数据已重新加载")
         
@@ -1175,7 +992,7 @@ class LoginWindow(QtWidgets.QWidget):
                 QtWidgets.QMessageBox.critical(self, "错误", "无法加载主程序界面")
         else:
             # 登录失败
-            self.password.setStyleSheet("border: 2px solid #ef4444; border-radius: 10px; padding: 6px 10px;")
+            set_state(self.password, "state", "error")
             print(f"登录失败: {message}")
     
     def back_to_welcome(self):
@@ -1196,33 +1013,15 @@ class WelcomeWindow(QtWidgets.QWidget):
         super().__init__()
         self.setWindowTitle("安密库 (SecurePass)")
         self.resize(520, 380)
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #f9fafb;
-                font-family: "Microsoft YaHei";
-            }
-            QLabel {
-                color: #374151;
-                font-size: 14px;
-            }
-        """)
+        apply_app_style()
+        self.image_loader = ImageLoader(self)
+        self.wechat_qrcode_pixmap = None
         self.current_view = "welcome"
         self.setup_ui()
         self.setup_github_view()
         self.setup_more_view()
         self.connect_signals()
-        self.set_window_icon()
-
-    def set_window_icon(self):
-        """设置窗口图标"""
-        try:
-            current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            icon_path = os.path.join(current_dir, "images", "Main icon.png")
-            if os.path.exists(icon_path):
-                icon = QtGui.QIcon(icon_path)
-                self.setWindowIcon(icon)
-        except Exception as e:
-            print(f"设置窗口图标失败: {e}")
+        set_window_icon(self)
 
     def setup_ui(self):
         # 主布局使用QStackedWidget实现视图切换
@@ -1253,7 +1052,7 @@ class WelcomeWindow(QtWidgets.QWidget):
         # 标题
         title_label = QtWidgets.QLabel("没有本地账户？")
         title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        title_label.setStyleSheet("font-size: 24px; font-weight: bold; color: #111827;")
+        title_label.setObjectName("pageTitle")
         welcome_layout.addWidget(title_label)
         
         # 注册按钮
@@ -1268,7 +1067,6 @@ class WelcomeWindow(QtWidgets.QWidget):
         link_layout = QtWidgets.QHBoxLayout()
         link_layout.addStretch()
         self.have_account_link = ClickableLabel("不，我有本地账户")
-        self.have_account_link.setStyleSheet("color: #3b82f6; font-size: 14px; text-decoration: underline;")
         link_layout.addWidget(self.have_account_link)
         link_layout.addStretch()
         welcome_layout.addLayout(link_layout)
@@ -1282,19 +1080,17 @@ class WelcomeWindow(QtWidgets.QWidget):
         self.github_button = SquareButton()
         self.more_button = SquareButton()
         
-        # 设置GitHub按钮图片
-        github_icon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "github.png")
-        if os.path.exists(github_icon_path):
-            self.github_button.setIcon(QtGui.QIcon(github_icon_path))
-            self.github_button.setIconSize(QtCore.QSize(24, 24))
-            self.github_button.setToolTip("GitHub")
+        # 设置GitHub按钮图片（后台解码，完成前按钮为空白）
+        self.github_button.setIconSize(QtCore.QSize(24, 24))
+        self.github_button.setToolTip("GitHub")
+        self.image_loader.load(image_path("github.png"), 48,
+                               lambda pixmap: self.github_button.setIcon(QtGui.QIcon(pixmap)))
         
         # 设置more按钮图片
-        more_icon_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "more.png")
-        if os.path.exists(more_icon_path):
-            self.more_button.setIcon(QtGui.QIcon(more_icon_path))
-            self.more_button.setIconSize(QtCore.QSize(24, 24))
-            self.more_button.setToolTip("更多")
+        self.more_button.setIconSize(QtCore.QSize(24, 24))
+        self.more_button.setToolTip("更多")
+        self.image_loader.load(image_path("more.png"), 48,
+                               lambda pixmap: self.more_button.setIcon(QtGui.QIcon(pixmap)))
         
         bottom_layout.addWidget(self.info_button)
         bottom_layout.addWidget(self.github_button)
@@ -1314,7 +1110,7 @@ class WelcomeWindow(QtWidgets.QWidget):
         # 标题
         title_label = QtWidgets.QLabel("支持与关注")
         title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        title_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #111827; margin-bottom: 20px;")
+        title_label.setObjectName("viewTitle")
         github_layout.addWidget(title_label)
         
         # 左右分栏布局
@@ -1327,28 +1123,25 @@ class WelcomeWindow(QtWidgets.QWidget):
         # 微信赞助标题（放在图片上方）
         wechat_label = QtWidgets.QLabel("微信赞助")
         wechat_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        wechat_label.setStyleSheet("font-size: 16px; font-weight: bold; margin-bottom: 10px;")
+        wechat_label.setObjectName("supportHeading")
+        wechat_label.setContentsMargins(0, 0, 0, 10)
         left_layout.addWidget(wechat_label)
         
         # 微信二维码图片
         self.wechat_icon_label = ClickableLabel("")  # 使用可点击标签
         self.wechat_icon_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
         
-        # 加载微信二维码图片
-        self.wechat_qrcode_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "G WeChat payment.png")
-        if os.path.exists(self.wechat_qrcode_path):
-            pixmap = QtGui.QPixmap(self.wechat_qrcode_path)
-            self.wechat_icon_label.setPixmap(pixmap.scaled(200, 200, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))
-            # 设置可点击样式（ClickableLabel已处理）
-            # 连接点击信号
-            self.wechat_icon_label.clicked.connect(self.show_wechat_qrcode_large)
+        # 加载微信二维码图片（后台解码为大图尺寸，完成前显示占位文字）
+        self.wechat_icon_label.setText("加载中...")
+        self.wechat_icon_label.setMinimumSize(200, 200)
+        self.image_loader.load(image_path("G WeChat payment.png"), 400, self.on_wechat_qrcode_loaded)
         
         left_layout.addWidget(self.wechat_icon_label)
         
         # 添加点击提示文本
         click_hint_label = QtWidgets.QLabel("点击图片查看大图")
         click_hint_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        click_hint_label.setStyleSheet("color: #6b7280; font-style: italic; font-size: 12px; margin-top: 5px;")
+        click_hint_label.setObjectName("clickHint")
         left_layout.addWidget(click_hint_label)
         left_layout.addStretch()
         
@@ -1358,19 +1151,15 @@ class WelcomeWindow(QtWidgets.QWidget):
         self.github_image_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
         
         # 加载GitHub图片，更换为Galen563 author icon.png
-        github_image_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "Galen563 author icon.png")
-        if os.path.exists(github_image_path):
-            pixmap = QtGui.QPixmap(github_image_path)
-            self.github_image_label.setPixmap(pixmap.scaled(80, 80, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))
-            # 设置可点击样式（ClickableLabel已处理）
-            # 连接点击信号
-            self.github_image_label.clicked.connect(self.open_github_link)
+        self.github_image_label.setMinimumSize(80, 80)
+        self.image_loader.load(image_path("Galen563 author icon.png"), 80, self.on_github_image_loaded)
         
         right_layout.addWidget(self.github_image_label)
         
         github_label = QtWidgets.QLabel("GitHub: Galen563")
         github_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        github_label.setStyleSheet("font-size: 16px; font-weight: bold; margin-top: 10px;")
+        github_label.setObjectName("supportHeading")
+        github_label.setContentsMargins(0, 10, 0, 0)
         right_layout.addWidget(github_label)
         
         # 添加GitHub链接
@@ -1391,7 +1180,7 @@ class WelcomeWindow(QtWidgets.QWidget):
         self.back_button = SquareButton()
         self.back_button.setText("返回")
         # 设置为蓝色样式
-        self.back_button.setStyleSheet("background-color: #3b82f6; color: white; border: none; padding: 8px 20px; border-radius: 6px; font-weight: bold;")
+        self.back_button.setObjectName("backButton")
         self.back_button.setToolTip("返回欢迎页面")
         bottom_layout.addWidget(self.back_button)
         bottom_layout.setContentsMargins(0, 0, 0, 10)
@@ -1452,6 +1241,7 @@ class WelcomeWindow(QtWidgets.QWidget):
     def setup_more_view(self):
         """创建More主页视图"""
         self.more_view = QtWidgets.QWidget()
+        self.more_view.setObjectName("moreView")
         self.stacked_widget.addWidget(self.more_view)
         
         # 主布局
@@ -1461,7 +1251,7 @@ class WelcomeWindow(QtWidgets.QWidget):
         # 标题
         title_label = QtWidgets.QLabel("更多功能")
         title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        title_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #111827; margin-bottom: 30px;")
+        title_label.setObjectName("viewTitle")
         more_layout.addWidget(title_label)
         
         # 按钮布局
@@ -1470,59 +1260,20 @@ class WelcomeWindow(QtWidgets.QWidget):
         
         # 导入按钮
         self.import_btn = QtWidgets.QPushButton("导入数据")
-        self.import_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3b82f6;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 12px 20px;
-                font-size: 14px;
-                font-weight: 500;
-                min-width: 120px;
-            }
-            QPushButton:hover {
-                background-color: #2563eb;
-            }
-        """)
+        self.import_btn.setObjectName("moreButton")
+        set_button_style(self.import_btn, "primary", "large")
         self.import_btn.setToolTip("导入用户数据")
         
         # 导出按钮
         self.export_btn = QtWidgets.QPushButton("导出数据")
-        self.export_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #10b981;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 12px 20px;
-                font-size: 14px;
-                font-weight: 500;
-                min-width: 120px;
-            }
-            QPushButton:hover {
-                background-color: #059669;
-            }
-        """)
+        self.export_btn.setObjectName("moreButton")
+        set_button_style(self.export_btn, "success", "large")
         self.export_btn.setToolTip("导出用户数据")
         
         # 版本信息按钮
         self.version_btn = QtWidgets.QPushButton("版本信息 v1.0.0")
-        self.version_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #6b7280;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 12px 20px;
-                font-size: 14px;
-                font-weight: 500;
-                min-width: 140px;
-            }
-            QPushButton:hover {
-                background-color: #4b5563;
-            }
-        """)
+        self.version_btn.setObjectName("versionButton")
+        set_button_style(self.version_btn, "secondary", "large")
         self.version_btn.setToolTip("查看版本信息")
         
         # 添加按钮到布局
@@ -1538,7 +1289,7 @@ class WelcomeWindow(QtWidgets.QWidget):
         bottom_layout.addStretch()
         self.more_back_button = SquareButton()
         self.more_back_button.setText("返回")
-        self.more_back_button.setStyleSheet("background-color: #3b82f6; color: white; border: none; padding: 8px 20px; border-radius: 6px; font-weight: bold;")
+        self.more_back_button.setObjectName("backButton")
         self.more_back_button.setToolTip("返回欢迎页面")
         bottom_layout.addWidget(self.more_back_button)
         bottom_layout.setContentsMargins(0, 0, 0, 10)
@@ -1571,9 +1322,20 @@ class WelcomeWindow(QtWidgets.QWidget):
         """打开GitHub链接"""
         QtGui.QDesktopServices.openUrl(QtCore.QUrl("https://github.com/Galen563"))
         
+    def on_wechat_qrcode_loaded(self, pixmap):
+        """微信二维码解码完成：显示缩略图并允许点击查看大图"""
+        self.wechat_qrcode_pixmap = pixmap
+        self.wechat_icon_label.setPixmap(pixmap.scaled(200, 200, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))
+        self.wechat_icon_label.clicked.connect(self.show_wechat_qrcode_large)
+    
+    def on_github_image_loaded(self, pixmap):
+        """GitHub头像解码完成"""
+        self.github_image_label.setPixmap(pixmap)
+        self.github_image_label.clicked.connect(self.open_github_link)
+    
     def show_wechat_qrcode_large(self):
         """显示微信二维码大图，使用QStackedWidget实现视图切换"""
-        if hasattr(self, 'wechat_qrcode_path') and os.path.exists(self.wechat_qrcode_path):
+        if self.wechat_qrcode_pixmap is not None:
             # 创建微信二维码大图视图
             self.qrcode_view = QtWidgets.QWidget()
             layout = QtWidgets.QVBoxLayout(self.qrcode_view)
@@ -1581,10 +1343,8 @@ class WelcomeWindow(QtWidgets.QWidget):
             
             # 图片显示
             image_label = QtWidgets.QLabel()
-            pixmap = QtGui.QPixmap(self.wechat_qrcode_path)
-            # 放大显示（400x400尺寸）
-            scaled_pixmap = pixmap.scaled(400, 400, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
-            image_label.setPixmap(scaled_pixmap)
+            # 放大显示（解码时已缩放到400x400以内）
+            image_label.setPixmap(self.wechat_qrcode_pixmap)
             image_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
             layout.addWidget(image_label, alignment=QtCore.Qt.AlignmentFlag.AlignCenter)
             
@@ -1592,20 +1352,7 @@ class WelcomeWindow(QtWidgets.QWidget):
             button_layout = QtWidgets.QHBoxLayout()
             button_layout.addStretch()
             back_button = QtWidgets.QPushButton("返回")
-            back_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #3b82f6;
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    padding: 8px 20px;
-                    font-size: 14px;
-                    font-weight: 500;
-                }
-                QPushButton:hover {
-                    background-color: #2563eb;
-                }
-            """)
+            back_button.setObjectName("backButton")
             back_button.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.github_view))
             button_layout.addWidget(back_button)
             
@@ -1631,58 +1378,18 @@ class RegisterWindow(QtWidgets.QWidget):
         self.welcome_window = welcome_window
         self.setWindowTitle("注册 - 安密库 (SecurePass)")
         self.resize(520, 500)
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #f9fafb;
-                font-family: "Microsoft YaHei";
-            }
-            QLineEdit {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 6px 10px;
-                background-color: white;
-                font-size: 14px;
-            }
-            QLineEdit:focus {
-                border: 2px solid #3b82f6;
-            }
-            QLabel {
-                color: #374151;
-                font-size: 14px;
-            }
-            QComboBox {
-                border: 2px solid #d1d5db;
-                border-radius: 10px;
-                padding: 4px 10px;
-                background-color: white;
-            }
-            .error_label {
-                color: #ef4444;
-                font-size: 12px;
-            }
-        """)
+        apply_app_style()
         self.stage = 0
         self.registered_username = ""
         self.registered_password = ""
         self.setup_ui()
         self.connect_signals()
         self.update_stage()
-        self.set_window_icon()
+        set_window_icon(self)
         
         # 创建Toast消息组件
         self.toast = ToastMessage(self)
     
-    def set_window_icon(self):
-        """设置窗口图标"""
-        try:
-            current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            icon_path = os.path.join(current_dir, "images", "Main icon.png")
-            if os.path.exists(icon_path):
-                icon = QtGui.QIcon(icon_path)
-                self.setWindowIcon(icon)
-        except Exception as e:
-            print(f"设置窗口图标失败: {e}")
-
     def setup_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
         layout.setContentsMargins(40, 30, 40, 30)
@@ -1712,7 +1419,7 @@ class RegisterWindow(QtWidgets.QWidget):
         
         self.title_label = QtWidgets.QLabel("欢迎注册安密库")
         self.title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        self.title_label.setStyleSheet("font-size: 20px; font-weight: bold; color: #111827;")
+        self.title_label.setObjectName("stageTitle")
         title_layout.addWidget(self.title_label)
         
         layout.addLayout(title_layout)
@@ -1755,7 +1462,6 @@ class RegisterWindow(QtWidgets.QWidget):
         confirm_layout.addWidget(self.confirm, 1)
         self.error_label = QtWidgets.QLabel("")
         self.error_label.setObjectName("error_label")
-        self.error_label.setStyleSheet("color: #ef4444; font-size: 12px;")
         confirm_layout.addWidget(self.error_label)
         
         # 显示密码勾选框
@@ -1796,7 +1502,7 @@ class RegisterWindow(QtWidgets.QWidget):
         v3 = QtWidgets.QVBoxLayout(page3)
         self.finish_label = QtWidgets.QLabel("注册完成！\n感谢使用安密库。")
         self.finish_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        self.finish_label.setStyleSheet("font-size:18px; color:#2563eb; font-weight:bold;")
+        self.finish_label.setObjectName("finishLabel")
         v3.addWidget(self.finish_label)
         self.stack.addWidget(page3)
 
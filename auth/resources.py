@@ -0,0 +1,101 @@
+# auth/resources.py
+# 资源包：images/ 下的图片和预缩放的程序图标打包为一个 Qt 二进制资源文件，启动时注册一次
+#
+# images/resources.rcc 为生成文件，不纳入版本库：发布打包前运行 `python -m auth.resources` 生成，
+# 修改 images/ 中的图片后重新生成。资源文件不存在时直接从 images/ 目录读取图片。
+
+import os
+import shutil
+import subprocess
+import tempfile
+from xml.sax.saxutils import escape
+
+from PySide6 import QtCore, QtGui
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGES_DIR = os.path.join(ROOT_DIR, "images")
+RESOURCE_FILE = os.path.join(IMAGES_DIR, "resources.rcc")
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+# 程序图标及打包时预缩放的尺寸
+APP_ICON = "Main icon.png"
+ICON_SIZES = (16, 24, 32, 48, 64, 128, 256)
+
+_registered = None
+_icons = {}
+
+
+def register_resources():
+    """注册资源文件（进程内只注册一次，Qt 以内存映射方式读取），返回资源是否可用"""
+    global _registered
+    if _registered is None:
+        _registered = QtCore.QResource.registerResource(RESOURCE_FILE)
+    return _registered
+
+
+def image_path(name):
+    """程序自带图片的路径：资源已注册时为 ":/images/..."，否则为 images/ 目录下的文件"""
+    if register_resources():
+        return f":/images/{name}"
+    return os.path.join(IMAGES_DIR, name)
+
+
+def app_icon():
+    """程序图标（所有窗口共享同一个 QIcon）"""
+    icon = _icons.get(APP_ICON)
+    if icon is None:
+        icon = QtGui.QIcon()
+        if register_resources():
+            for size in ICON_SIZES:
+                icon.addFile(f":/icons/app_{size}.png", QtCore.QSize(size, size))
+        else:
+            icon_path = os.path.join(IMAGES_DIR, APP_ICON)
+            if os.path.exists(icon_path):
+                icon.addFile(icon_path)
+        _icons[APP_ICON] = icon
+    return icon
+
+
+def set_window_icon(window):
+    """设置窗口图标"""
+    try:
+        window.setWindowIcon(app_icon())
+    except Exception as e:
+        print(f"设置窗口图标失败: {e}")
+
+
+def build_resources(output=RESOURCE_FILE):
+    """把 images/ 下的图片和预缩放的程序图标打包为二进制资源文件（需要 pyside6-rcc）"""
+    rcc = shutil.which("pyside6-rcc")
+    if rcc is None:
+        raise RuntimeError("未找到 pyside6-rcc，请先安装 PySide6")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        entries = []
+        for name in sorted(os.listdir(IMAGES_DIR)):
+            if name.lower().endswith(IMAGE_SUFFIXES):
+                entries.append((f"images/{name}", os.path.join(IMAGES_DIR, name)))
+
+        source = QtGui.QImage(os.path.join(IMAGES_DIR, APP_ICON))
+        if source.isNull():
+            raise RuntimeError(f"无法读取程序图标: {APP_ICON}")
+        for size in ICON_SIZES:
+            icon_path = os.path.join(temp_dir, f"app_{size}.png")
+            source.scaled(size, size, QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                          QtCore.Qt.TransformationMode.SmoothTransformation).save(icon_path, "PNG")
+            entries.append((f"icons/app_{size}.png", icon_path))
+
+        qrc_path = os.path.join(temp_dir, "resources.qrc")
+        with open(qrc_path, 'w', encoding='utf-8') as f:
+            f.write('<RCC>\n  <qresource prefix="/">\n')
+            for alias, path in entries:
+                alias = escape(alias, {'"': '&quot;'})
+                f.write(f'    <file alias="{alias}">{escape(path)}</file>\n')
+            f.write('  </qresource>\n</RCC>\n')
+
+        subprocess.run([rcc, "--binary", qrc_path, "-o", output], check=True)
+    return output
+
+
+if __name__ == "__main__":
+    print(f"已生成资源文件: {build_resources()}")
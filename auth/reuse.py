@@ -0,0 +1,97 @@
+# auth/reuse.py
+# 重复密码检测：以带密钥的 HMAC 摘要为键，索引使用同一密码的记录
+#
+# 索引中只保存摘要和对记录对象的引用，不另存明文副本。密钥在每次启动时随机生成、只存在于内存中，
+# 摘要无法脱离本进程用于字典比对。记录保存、删除时增量更新，重复分组随时可直接取出。
+
+import hashlib
+import hmac
+import secrets
+
+
+class PasswordReuseIndex:
+    """密码摘要 -> 记录ID集合的索引，由密码库在记录变化时增量维护（只在界面线程中使用）"""
+
+    def __init__(self, key=None):
+        # 密钥处理后的 HMAC 状态，每次计算时复制，省去重复处理密钥
+        self._mac = hmac.new(key or secrets.token_bytes(32), digestmod=hashlib.sha256)
+        self._entries = {}       # 记录ID -> (记录对象, 密码摘要)；空密码的摘要为 None
+        self._holders = {}       # 密码摘要 -> 记录ID集合
+        self._reused = set()     # 被多条记录使用的密码摘要
+
+    def digest(self, password):
+        """密码的 HMAC-SHA256 摘要"""
+        mac = self._mac.copy()
+        mac.update(password.encode('utf-8', 'surrogatepass'))
+        return mac.digest()
+
+    def add(self, record):
+        """加入或更新一条记录（同一记录对象重复加入时直接返回）"""
+        record_id = record.get('id')
+        entry = self._entries.get(record_id)
+        if entry is not None and entry[0] is record:
+            return
+        password = record.get('password')
+        digest = self.digest(password) if password else None
+        if entry is not None and entry[1] != digest:
+            self._unlink(record_id, entry[1])
+        elif entry is not None:
+            # 密码没有变化，只更新记录对象
+            self._entries[record_id] = (record, digest)
+            return
+        self._entries[record_id] = (record, digest)
+        if digest is None:
+            return
+        holders = self._holders.get(digest)
+        if holders is None:
+            self._holders[digest] = {record_id}
+        else:
+            holders.add(record_id)
+            self._reused.add(digest)
+
+    def remove(self, record_id):
+        """移除一条记录"""
+        entry = self._entries.pop(record_id, None)
+        if entry is not None:
+            self._unlink(record_id, entry[1])
+
+    def _unlink(self, record_id, digest):
+        holders = self._holders.get(digest)
+        if holders is None:
+            return
+        holders.discard(record_id)
+        if len(holders) < 2:
+            self._reused.discard(digest)
+            if not holders:
+                del self._holders[digest]
+
+    def sync(self, records):
+        """把索引更新到 records（整体替换记录列表后调用），只重新计算有变化的记录"""
+        for record in records:
+            self.add(record)
+        if len(self._entries) > len(records):
+            current = {record.get('id') for record in records}
+            for record_id in self._entries.keys() - current:
+                self.remove(record_id)
+
+    def clear(self):
+        self._entries.clear()
+        self._holders.clear()
+        self._reused.clear()
+
+    def groups(self):
+        """使用同一密码的记录分组（记录对象列表），记录多的分组在前"""
+        groups = [[self._entries[record_id][0] for record_id in self._holders[digest]]
+                  for digest in self._reused]
+        groups.sort(key=len, reverse=True)
+        return groups
+
+    def reused_count(self):
+        """密码被其他记录重复使用的记录数"""
+        return sum(len(self._holders[digest]) for digest in self._reused)
+
+    def holders(self, password):
+        """使用该密码的记录ID集合（如检查正在输入的密码是否已被使用）"""
+        if not password:
+            return set()
+        return set(self._holders.get(self.digest(password), ()))
@@ -0,0 +1,553 @@
+# auth/search.py
+# 记录搜索：模糊匹配与排序、预先规范化的搜索索引、后台搜索线程
+#
+# 匹配分几档：完全相同 > 前缀 > 子串 > 子序列（按顺序出现的字符，如 "gthb" 匹配 "github"）
+# > 少量拼写错误（编辑距离）。候选记录先在整块文本上用正则（C 实现）筛出，
+# 只对候选记录计算得分，再用堆取前 K 名。
+# 中文网站名称和姓名另外预先计算全拼和拼音首字母（"zfb"、"zhifubao" 都能找到“支付宝”）；
+# 备注只按子串匹配，通过片段倒排索引（汉字二元组、其他文字三元组）查找，不逐条扫描。
+
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import compress, repeat
+from operator import contains, is_, itemgetter
+
+from PySide6 import QtCore
+
+from .domain import DomainIndex, canonical_domain
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # 未安装 pypinyin 时不支持拼音搜索
+    lazy_pinyin = None
+
+# 参与搜索的字段及权重（顺序与 record_search_keys 的返回值一致）：
+# 网站名称、网址、用户名、邮箱、网站名称全拼、网站名称拼音首字母、姓名全拼、姓名拼音首字母
+FIELD_WEIGHTS = (1.0, 1.0, 0.9, 0.8, 0.95, 0.9, 0.85, 0.8)
+# 备注匹配的权重（备注只按子串匹配）
+NOTES_WEIGHT = 0.6
+# 默认返回的排序结果数量
+DEFAULT_LIMIT = 50
+# 拼写容错阶段最多检查的候选记录数（短片段在大量记录中都会出现，需要限制计算量）
+TYPO_CHECK_LIMIT = 500
+
+# 各档基础分
+SCORE_EXACT = 100
+SCORE_PREFIX = 90
+SCORE_SUBSTRING = 80
+SCORE_SUBSEQUENCE = 60
+SCORE_TYPO = 40
+
+# 字段内的分隔符：分隔符后的匹配视为单词开头
+_WORD_SEPARATORS = " ./@-_:"
+_TOKEN_SPLIT = re.compile(r"[\s./@\-_:]+")
+# 连续的汉字；连续的其他文字（字母、数字）
+_CJK_RUN = re.compile(r"([\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)")
+_WORD_RUN = re.compile(r"[^\W\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+def display_name(record):
+    """记录的显示名称"""
+    name_data = record.get('name', {})
+    name_type = name_data.get('type', '单一用户名')
+
+    if name_type == "单一用户名":
+        return name_data.get('username', '未知用户')
+    elif name_type == "分开的姓名":
+        first_name = name_data.get('first_name', '')
+        last_name = name_data.get('last_name', '')
+        return f"{first_name} {last_name}".strip()
+    else:
+        return "匿名用户"
+
+
+def record_name(record):
+    """记录中实际填写的用户名或姓名，没有填写时为空（不含 display_name 的 "未知用户" 等占位文字）"""
+    name_data = record.get('name', {})
+    name_type = name_data.get('type', '单一用户名')
+    if name_type == "单一用户名":
+        return name_data.get('username', '')
+    if name_type == "分开的姓名":
+        return f"{name_data.get('first_name', '')} {name_data.get('last_name', '')}".strip()
+    return ''
+
+
+def normalize(text):
+    """搜索用的规范化文本：全角转半角、统一小写，去掉字段内的换行和制表符"""
+    if text.isascii():
+        text = text.lower()
+    else:
+        text = unicodedata.normalize('NFKC', text).casefold()
+    return text.replace('\n', ' ').replace('\t', ' ')
+
+
+@lru_cache(maxsize=4096)
+def _run_pinyin(run):
+    """一段连续汉字的 (全拼, 拼音首字母)；同一段汉字在很多记录中重复出现，结果缓存"""
+    return ''.join(lazy_pinyin(run)), ''.join(lazy_pinyin(run, style=Style.FIRST_LETTER))
+
+
+def pinyin_keys(text):
+    """规范化文本的 (全拼, 拼音首字母)，如 "支付宝" -> ("zhifubao", "zfb")
+
+    不含汉字或未安装 pypinyin 时为空字符串；非汉字部分原样保留（去掉空白）。
+    """
+    if lazy_pinyin is None or text.isascii() or not _CJK_RUN.search(text):
+        return '', ''
+    full = []
+    initials = []
+    # 切分结果中奇数位置是汉字段
+    for i, part in enumerate(_CJK_RUN.split(text)):
+        if i % 2:
+            run_full, run_initials = _run_pinyin(part)
+            full.append(run_full)
+            initials.append(run_initials)
+        else:
+            part = ''.join(part.split())
+            full.append(part)
+            initials.append(part)
+    return ''.join(full), ''.join(initials)
+
+
+def text_grams(text):
+    """倒排索引用的片段：汉字取相邻两字，其他文字取连续三个字符
+
+    包含子串 query 的文本一定包含 text_grams(query) 的全部片段。
+    """
+    grams = set()
+    for run in _CJK_RUN.findall(text):
+        grams.update(run[i:i + 2] for i in range(len(run) - 1))
+    for run in _WORD_RUN.findall(text):
+        grams.update(run[i:i + 3] for i in range(len(run) - 2))
+    return grams
+
+
+def record_search_keys(record):
+    """记录的规范化搜索键（网站名称、网址、用户名、邮箱以及名称和姓名的拼音）
+
+    名称和姓名都不含汉字时省略拼音部分，只有前四项。
+    """
+    site_name = normalize(record.get('site_name', ''))
+    name = normalize(record_name(record))
+    keys = (site_name, normalize(record.get('website', '')), name, normalize(record.get('email', '')))
+    pinyin = pinyin_keys(site_name) + pinyin_keys(name)
+    return keys + pinyin if any(pinyin) else keys
+
+
+def edit_distance(a, b, limit):
+    """a 与 b 的编辑距离（含相邻字符交换）；超过 limit 时返回 limit + 1
+
+    只计算对角线两侧 limit 宽的带状区域，任意一行全部超过 limit 时提前结束。
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    width = len(b)
+    previous2 = None
+    previous = [j if j <= limit else over for j in range(width + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (width + 1)
+        low = max(1, i - limit)
+        high = min(width, i + limit)
+        if low == 1:
+            current[0] = i if i <= limit else over
+        row_min = current[0]
+        char = a[i - 1]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous2 is not None and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous2[j - 2] + 1 < value):
+                value = previous2[j - 2] + 1
+            current[j] = value if value < over else over
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous2, previous = previous, current
+    return previous[width]
+
+
+def typo_limit(query):
+    """允许的拼写错误数：短查询太容易误配，不做拼写容错；长查询最多两处"""
+    if len(query) < 5:
+        return 0
+    return 1 if len(query) < 8 else 2
+
+
+def _subsequence_gaps(key, query):
+    """query 作为子序列出现在 key 中时返回字符间的总间隔，否则返回 None"""
+    position = key.find(query[0])
+    if position < 0:
+        return None
+    gaps = 0
+    for char in query[1:]:
+        found = key.find(char, position + 1)
+        if found < 0:
+            return None
+        gaps += found - position - 1
+        position = found
+    return gaps
+
+
+def _typo_distance(key, query, limit):
+    """query 与 key 中各单词及 key 开头部分的最小编辑距离"""
+    best = limit + 1
+    candidates = _TOKEN_SPLIT.split(key)
+    candidates.extend(key[:len(query) + delta] for delta in (-1, 0, 1))
+    for candidate in candidates:
+        if candidate:
+            best = min(best, edit_distance(query, candidate, min(best - 1, limit)))
+            if best == 0:
+                break
+    return best
+
+
+def score_keys(keys, query):
+    """记录的得分：各字段得分按权重取最高值，不匹配时为 0
+
+    有子串匹配的记录只按子串计分，没有时再看子序列，都不匹配时才计算编辑距离。
+    """
+    best = 0
+    for key, weight in zip(keys, FIELD_WEIGHTS):
+        position = key.find(query)
+        if position == 0:
+            score = SCORE_EXACT if len(key) == len(query) else SCORE_PREFIX
+        elif position > 0:
+            bonus = 5 if key[position - 1] in _WORD_SEPARATORS else 0
+            score = SCORE_SUBSTRING + bonus - min(position, 20) / 2
+        else:
+            continue
+        best = max(best, score * weight)
+    if best:
+        return best
+
+    for key, weight in zip(keys, FIELD_WEIGHTS):
+        gaps = _subsequence_gaps(key, query) if key else None
+        if gaps is not None:
+            best = max(best, (SCORE_SUBSEQUENCE - min(gaps, 20)) * weight)
+    if best:
+        return best
+
+    limit = typo_limit(query)
+    if limit:
+        for key, weight in zip(keys, FIELD_WEIGHTS):
+            distance = _typo_distance(key, query, limit) if key else limit + 1
+            if distance <= limit:
+                best = max(best, (SCORE_TYPO - 10 * distance) * weight)
+    return best
+
+
+def notes_score(notes, query):
+    """备注的匹配得分（只按子串匹配），不匹配时为 0"""
+    position = notes.find(query)
+    if position < 0:
+        return 0
+    bonus = 5 if position == 0 or notes[position - 1] in _WORD_SEPARATORS else 0
+    return (SCORE_SUBSTRING + bonus) * NOTES_WEIGHT
+
+
+def record_matches(record, search_text):
+    """记录是否匹配搜索文本"""
+    query = normalize(search_text).strip()
+    return (not query or score_keys(record_search_keys(record), query) > 0
+            or notes_score(normalize(record.get('notes', '')), query) > 0)
+
+
+def _subsequence_pattern(query):
+    """在整块文本中查找“同一字段内按顺序出现 query 各字符”的正则
+
+    字符之间用“除下一个字符和分隔符外的任意字符”连接，每步取下一个字符最早的出现位置。
+    """
+    parts = [re.escape(query[0])]
+    for char in query[1:]:
+        parts.append(f"[^{re.escape(char)}\\t\\n]*{re.escape(char)}")
+    return re.compile(''.join(parts))
+
+
+def _split_pieces(query, count):
+    """把 query 切成 count 段长度相近的片段"""
+    size, extra = divmod(len(query), count)
+    pieces = []
+    start = 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        pieces.append(query[start:end])
+        start = end
+    return pieces
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class SearchIndex:
+    """记录的搜索索引：缓存每条记录的规范化搜索键，按记录快照增量更新
+
+    所有记录的搜索键拼成一块文本（每条记录一行，字段之间用制表符分隔），
+    候选记录由正则在整块文本上查找；备注另建片段倒排索引，网址另建规范域名索引。记录对象不可变，
+    同一 ID 的记录对象没有变化时直接复用已有的搜索键，倒排索引也只更新变化的记录。
+    可在后台线程中使用，同一时间只有一个线程访问索引。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = []
+        self._keys = {}          # 记录ID -> (记录对象, 搜索键, 拼接后的一行文本, 备注, 规范域名)
+        self._ids = []
+        self._text = ""
+        self._starts = []
+        self._note_grams = {}    # 备注片段 -> 备注中包含它的记录ID集合
+        self._domains = DomainIndex()
+        self._columns = {}       # 字段名 -> 与记录顺序对应的整列值（用到时才取出，记录变化后失效）
+
+    def _sync(self, records):
+        """把索引更新到 records 快照，只重新计算有变化的记录"""
+        if len(records) == len(self._records) and all(map(is_, records, self._records)):
+            return
+
+        keys = {}
+        ids = []
+        lines = []
+        starts = []
+        offset = 0
+        for record in records:
+            record_id = record.get('id')
+            entry = self._keys.get(record_id)
+            if entry is None or entry[0] is not record:
+                search_keys = record_search_keys(record)
+                notes = normalize(record.get('notes', ''))
+                domain = canonical_domain(record.get('website', ''))
+                if entry is None:
+                    self._update_note_grams(record_id, '', notes)
+                else:
+                    self._update_note_grams(record_id, entry[3], notes)
+                    self._domains.remove(record_id, entry[4])
+                self._domains.add(record_id, domain)
+                entry = (record, search_keys, '\t'.join(search_keys), notes, domain)
+            keys[record_id] = entry
+            ids.append(record_id)
+            lines.append(entry[2])
+            starts.append(offset)
+            offset += len(entry[2]) + 1
+
+        for record_id in self._keys.keys() - keys.keys():
+            entry = self._keys[record_id]
+            self._update_note_grams(record_id, entry[3], '')
+            self._domains.remove(record_id, entry[4])
+
+        self._records = list(records)
+        self._columns = {}
+        self._keys = keys
+        self._ids = ids
+        self._text = '\n'.join(lines)
+        self._starts = starts
+
+    def _update_note_grams(self, record_id, old_notes, new_notes):
+        if old_notes == new_notes:
+            return
+        old = text_grams(old_notes)
+        new = text_grams(new_notes)
+        for gram in old - new:
+            holders = self._note_grams[gram]
+            holders.discard(record_id)
+            if not holders:
+                del self._note_grams[gram]
+        for gram in new - old:
+            holders = self._note_grams.get(gram)
+            if holders is None:
+                self._note_grams[gram] = {record_id}
+            else:
+                holders.add(record_id)
+
+    def _note_candidates(self, query):
+        """备注中可能包含 query 的记录ID：query 的所有片段都出现的记录"""
+        grams = text_grams(query)
+        if not grams:
+            return set()
+        holders = sorted((self._note_grams.get(gram, set()) for gram in grams), key=len)
+        return holders[0].intersection(*holders[1:])
+
+    def all_ids(self):
+        """快照中全部记录ID的集合"""
+        return set(self._ids)
+
+    def keys_containing(self, columns, value):
+        """搜索键第 columns 列中任意一列包含 value 的记录ID集合（在整块文本中查找）"""
+        value = normalize(value)
+        text = self._text
+        starts = self._starts
+        found = set()
+        position = text.find(value)
+        while position >= 0:
+            row = bisect_right(starts, position) - 1
+            if text.count('\t', starts[row], position) in columns:
+                found.add(self._ids[row])
+                # 这一行已经匹配，从下一行继续
+                position = starts[row + 1] if row + 1 < len(starts) else len(text)
+            else:
+                position += 1
+            position = text.find(value, position)
+        return found
+
+    def site_ids(self, website):
+        """与网址属于同一网站（规范域名相同）的记录ID集合"""
+        return self._domains.lookup(website)
+
+    def site_groups(self, records):
+        """在 records 快照中找出同一网站有多条记录的分组：规范域名 -> 记录ID集合"""
+        with self._lock:
+            self._sync(records)
+            return self._domains.groups()
+
+    def records_for_site(self, records, website):
+        """records 快照中与网址属于同一网站的记录ID集合"""
+        with self._lock:
+            self._sync(records)
+            return self.site_ids(website)
+
+    def notes_containing(self, value):
+        """备注包含 value 的记录ID集合：能切出片段时走倒排索引，否则扫描整列备注"""
+        value = normalize(value)
+        if text_grams(value):
+            keys = self._keys
+            return {record_id for record_id in self._note_candidates(value)
+                    if value in keys[record_id][3]}
+        return self.scan('notes', lambda record: self._keys[record.get('id')][3], contains, value)
+
+    def scan(self, name, extract, test, value):
+        """对整列值批量执行 test(列值, value)，返回结果为真的记录ID集合
+
+        列值由 extract(记录) 取出并缓存到记录变化为止；比较由 map / compress 在 C 中循环。
+        """
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = list(map(extract, self._records))
+        return set(compress(self._ids, map(test, column, repeat(value))))
+
+    def _matching_rows(self, pattern):
+        """正则在整块文本中匹配到的行号（按顺序，不重复）"""
+        starts = self._starts
+        last = -1
+        for match in pattern.finditer(self._text):
+            row = bisect_right(starts, match.start()) - 1
+            if row != last:
+                last = row
+                yield row
+
+    def _typo_candidates(self, query, limit, exclude):
+        """可能在拼写错误范围内的记录ID（逐个产生）
+
+        把查询切成 limit + 1 段，错误不超过 limit 处的匹配至少原样包含其中一段；
+        每处编辑最多破坏两个二元组，因此还要至少包含 (二元组数 - 2 × limit) 个查询二元组。
+        """
+        grams = _bigrams(query)
+        needed = len(grams) - 2 * limit
+        text = self._text
+        starts = self._starts
+        seen = set(exclude)
+        # 先查出现次数最少的片段
+        for piece in sorted(set(_split_pieces(query, limit + 1)), key=text.count):
+            position = text.find(piece)
+            while position >= 0:
+                row = bisect_right(starts, position) - 1
+                end = starts[row + 1] - 1 if row + 1 < len(starts) else len(text)
+                record_id = self._ids[row]
+                if record_id not in seen:
+                    seen.add(record_id)
+                    if sum(gram in self._keys[record_id][2] for gram in grams) >= needed:
+                        yield record_id
+                position = text.find(piece, end)
+
+    def search(self, records, search_text, limit=DEFAULT_LIMIT, is_cancelled=lambda: False, filters=()):
+        """在 records 快照中搜索
+
+        filters 为附加的过滤条件（query.py 中的 TextFilter 等，各自返回匹配的记录ID集合），
+        只在满足全部条件的记录中按 search_text 匹配。
+        返回 (匹配的记录ID集合, 按得分从高到低排列的前 limit 个记录ID)；
+        is_cancelled() 为真时尽快返回 None。
+        """
+        query = normalize(search_text).strip()
+        with self._lock:
+            self._sync(records)
+            allowed = None
+            for search_filter in filters:
+                found = search_filter.select(self)
+                allowed = found if allowed is None else allowed & found
+                if is_cancelled():
+                    return None
+            if not query:
+                ids = self._ids if allowed is None else [i for i in self._ids if i in allowed]
+                return set(ids), ids[:limit]
+
+            ids = self._ids
+            keys = self._keys
+            scores = {}          # 记录ID -> 得分
+            for count, row in enumerate(self._matching_rows(_subsequence_pattern(query))):
+                if count % 1024 == 0 and is_cancelled():
+                    return None
+                record_id = ids[row]
+                if allowed is None or record_id in allowed:
+                    scores[record_id] = score_keys(keys[record_id][1], query)
+
+            for record_id in self._note_candidates(query):
+                if allowed is None or record_id in allowed:
+                    score = notes_score(keys[record_id][3], query)
+                    if score > scores.get(record_id, 0):
+                        scores[record_id] = score
+
+            # 匹配不足 limit 条时，用拼写容错的结果补足
+            typos = typo_limit(query)
+            if len(scores) < limit and typos:
+                for count, record_id in enumerate(self._typo_candidates(query, typos, scores.keys())):
+                    if count >= TYPO_CHECK_LIMIT:
+                        break
+                    if count % 256 == 0 and is_cancelled():
+                        return None
+                    if allowed is not None and record_id not in allowed:
+                        continue
+                    score = score_keys(keys[record_id][1], query)
+                    if score > 0:
+                        scores[record_id] = score
+                        if len(scores) >= limit:
+                            break
+
+            if is_cancelled():
+                return None
+            # nlargest 是稳定的：同分时先找到的（排在列表前面的）记录优先
+            ranked = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+            return set(scores), [record_id for record_id, _ in ranked]
+
+
+class SearchThread(QtCore.QThread):
+    """后台搜索：在记录快照中执行查询并排序匹配的记录，可随时中止
+
+    query 为 query.py 解析得到的 Query。被新查询取代时调用 requestInterruption()，
+    线程尽快退出且不发送结果。结果为 (快照中的记录ID集合, 匹配的记录ID集合, 排序后的前 K 个记录ID)。
+    """
+    search_finished = QtCore.Signal(int, object)
+
+    def __init__(self, generation, index, records, query, limit=DEFAULT_LIMIT, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.index = index
+        self.records = records
+        self.query = query
+        self.limit = limit
+
+    def run(self):
+        result = self.query.run(self.index, self.records, self.limit,
+                                is_cancelled=self.isInterruptionRequested)
+        if result is None or self.isInterruptionRequested():
+            return
+        # 只包含快照中的记录，快照之后新增的条目不受影响
+        snapshot_ids = {record.get('id') for record in self.records}
+        matched, ranked = result
+        self.search_finished.emit(self.generation, (snapshot_ids, matched, ranked))
@@ -0,0 +1,157 @@
+# auth/similarity.py
+# 相似密码检测：把密码切成字符片段（shingle），用 MinHash 签名和局部敏感哈希（LSH）分桶，
+# 找出 "Summer2024!" 与 "Summer2025!" 这类只有少量字符不同的密码
+#
+# 签名分为若干段，任一段完全相同的密码落入同一个桶，只在桶内比较片段集合的相似度（Jaccard），
+# 总耗时与密码数量大致成线性，不做两两比较。完全相同的密码先合并（重复使用由 reuse.py 报告）。
+
+import random
+
+from PySide6 import QtCore
+
+SHINGLE_SIZE = 3
+# 签名 = BANDS 段 x ROWS 个最小哈希；相似度 0.5 的两个密码至少有一段相同的概率约为 1 - (1 - 0.5 ** 2) ** 12 ≈ 0.97
+BANDS = 12
+ROWS = 2
+_HASH_MASK = (1 << 64) - 1
+# 空槽借用的值加上 第几次尝试 x _BORROW_STEP，大于任何槽自身的值，两者不会相等
+_BORROW_STEP = 1 << 60
+# 片段集合的 Jaccard 相似度达到该值才算相似
+SIMILARITY_THRESHOLD = 0.5
+
+
+def shingles(password):
+    """密码的字符片段集合（不区分大小写，首尾加边界符，短密码也能切出片段）"""
+    text = f"\x02{password.casefold()}\x03"
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def jaccard(a, b):
+    """两个集合的 Jaccard 相似度"""
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+class MinHasher:
+    """一次置换的 MinHash 签名（one permutation hashing）
+
+    每个片段只计算一次哈希，按哈希值分到 bands x rows 个槽中，每个槽的最小值作为签名的一个分量，
+    代替对每个分量分别计算一遍所有片段的哈希。密码的片段很少，多数槽为空，空槽按该槽固定的随机顺序
+    借用第一个非空槽的值，两个集合的同一槽相等的概率仍约等于其 Jaccard 相似度；
+    随机顺序（而不是都借用右侧的槽）使相邻的空槽借自不同的槽，同一段内的分量不会都来自同一个片段。
+    """
+
+    def __init__(self, bands=BANDS, rows=ROWS, seed=None):
+        rng = random.Random(seed)
+        self.bands = bands
+        self.rows = rows
+        self.size = bands * rows
+        self.salt = rng.getrandbits(64)
+        self.probes = [rng.sample(range(self.size), self.size) for _ in range(self.size)]
+
+    def signature(self, shingle_set):
+        size = self.size
+        salt = self.salt
+        slots = [None] * size
+        for value in map(hash, shingle_set):
+            value = (value ^ salt) & _HASH_MASK
+            slot = value % size
+            value //= size
+            current = slots[slot]
+            if current is None or value < current:
+                slots[slot] = value
+        signature = list(slots)
+        for slot, probes in enumerate(self.probes):
+            if slots[slot] is None:
+                for attempt, source in enumerate(probes, 1):
+                    if slots[source] is not None:
+                        signature[slot] = slots[source] + attempt * _BORROW_STEP
+                        break
+        return signature
+
+    def band_keys(self, shingle_set):
+        """签名按段切分后的桶键（段号, 该段的最小哈希）"""
+        signature = self.signature(shingle_set)
+        rows = self.rows
+        return [(band, *signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+
+def _find(parent, item):
+    root = item
+    while parent[root] != root:
+        root = parent[root]
+    while parent[item] != root:
+        parent[item], item = root, parent[item]
+    return root
+
+
+def similar_password_clusters(records, threshold=SIMILARITY_THRESHOLD, is_cancelled=lambda: False, hasher=None):
+    """找出使用相似（不完全相同）密码的记录分组，返回记录列表的列表，记录多的分组在前
+
+    被取消时返回 None。
+    """
+    by_password = {}
+    for record in records:
+        password = record.get('password')
+        if password:
+            by_password.setdefault(password, []).append(record)
+    passwords = list(by_password)
+    hasher = hasher or MinHasher()
+
+    shingle_sets = []
+    buckets = {}
+    for number, password in enumerate(passwords):
+        if number % 1000 == 0 and is_cancelled():
+            return None
+        shingle_set = shingles(password)
+        shingle_sets.append(shingle_set)
+        for key in hasher.band_keys(shingle_set):
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [number]
+            else:
+                bucket.append(number)
+
+    # 桶内的密码只与桶中已有的各个分组的代表比较，常见密码形成的大桶也不会退化为两两比较
+    parent = list(range(len(passwords)))
+    for count, bucket in enumerate(buckets.values()):
+        if count % 1000 == 0 and is_cancelled():
+            return None
+        if len(bucket) < 2:
+            continue
+        roots = [_find(parent, bucket[0])]
+        for number in bucket[1:]:
+            root = _find(parent, number)
+            if root in roots:
+                continue
+            for other in roots:
+                if jaccard(shingle_sets[number], shingle_sets[other]) >= threshold:
+                    parent[root] = other
+                    break
+            else:
+                roots.append(root)
+
+    clusters = {}
+    for number in range(len(passwords)):
+        clusters.setdefault(_find(parent, number), []).append(number)
+    groups = [[record for number in members for record in by_password[passwords[number]]]
+              for members in clusters.values() if len(members) > 1]
+    groups.sort(key=len, reverse=True)
+    return groups
+
+
+class SimilarityThread(QtCore.QThread):
+    """后台检测相似密码：在记录快照中分组，完成后发送分组列表；可随时中止（中止时不发送结果）"""
+    similarity_finished = QtCore.Signal(object)
+
+    def __init__(self, records, parent=None):
+        super().__init__(parent)
+        self.records = records
+
+    def run(self):
+        groups = similar_password_clusters(self.records, is_cancelled=self.isInterruptionRequested)
+        if groups is None or self.isInterruptionRequested():
+            return
+        self.similarity_finished.emit(groups)
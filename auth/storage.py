@@ -0,0 +1,394 @@
+# auth/storage.py
+# 数据持久化：原子写入、校验恢复、多进程文件锁与后台延迟保存
+#
+# 文件格式：JSON 正文 + 末尾一行校验尾 "#securepass version=<n> sha256=<hex>"。
+# version 每次写入单调递增，用于检测其他进程的并发修改。
+# 每次写入时上一代文件保留为 "<文件名>.bak"，加载时若正文损坏则自动从中恢复。
+
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import contextlib
+from collections.abc import Mapping
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+TRAILER_MARK = b"\n#securepass "
+_WHITESPACE = re.compile(r'\s*')
+
+
+class StorageCorruptedError(ValueError):
+    """数据文件损坏（校验失败或无法解析）"""
+
+
+def backup_path(path):
+    """上一代（最后一次完好）文件的路径"""
+    return path + ".bak"
+
+
+def _fsync_directory(directory):
+    """同步目录项，确保重命名落盘（Windows 不支持时忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_file_atomic(path, content, keep_backup=True):
+    """先写临时文件并fsync，再重命名替换目标文件；可选保留上一代为 .bak"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if keep_backup and os.path.exists(path):
+            os.replace(path, backup_path(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def _parse_trailer(trailer):
+    """解析校验尾中的 key=value 字段"""
+    return dict(
+        item.split("=", 1)
+        for item in trailer.decode('ascii', 'replace').split()
+        if "=" in item
+    )
+
+
+def _trailer_version(fields):
+    try:
+        return int(fields.get("version", 0))
+    except ValueError:
+        return 0
+
+
+def _json_default(obj):
+    """JSON 序列化时把只读映射（如紧凑记录）转换为字典"""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"无法序列化的对象: {type(obj).__name__}")
+
+
+def encode_json(data, version=0):
+    """将数据编码为带校验尾的文件内容"""
+    payload = json.dumps(data, ensure_ascii=False, indent=2, default=_json_default).encode('utf-8')
+    digest = hashlib.sha256(payload).hexdigest()
+    return payload + TRAILER_MARK + f"version={version} sha256={digest}\n".encode('ascii')
+
+
+def decode_json(content):
+    """解析带校验尾的文件内容，返回 (数据, 版本号)；没有校验尾的旧文件按普通JSON读取"""
+    payload = content
+    version = 0
+    pos = content.rfind(TRAILER_MARK)
+    if pos != -1:
+        payload = content[:pos]
+        fields = _parse_trailer(content[pos + len(TRAILER_MARK):])
+        if hashlib.sha256(payload).hexdigest() != fields.get("sha256"):
+            raise StorageCorruptedError("校验和不匹配")
+        version = _trailer_version(fields)
+    try:
+        return json.loads(payload.decode('utf-8')), version
+    except ValueError as e:
+        raise StorageCorruptedError(f"无法解析数据: {e}")
+
+
+def open_json_stream(content):
+    """校验文件内容后返回 (版本号, 逐个解码顶层数组元素的迭代器)
+
+    有校验尾时先整体校验，再增量解码，首批记录无需等待整个文件解析完毕；
+    没有校验尾的旧文件无法提前发现损坏，直接整体解析。
+    """
+    pos = content.rfind(TRAILER_MARK)
+    if pos == -1:
+        data, version = decode_json(content)
+        return version, iter(data if isinstance(data, list) else [])
+    
+    payload = content[:pos]
+    fields = _parse_trailer(content[pos + len(TRAILER_MARK):])
+    if hashlib.sha256(payload).hexdigest() != fields.get("sha256"):
+        raise StorageCorruptedError("校验和不匹配")
+    try:
+        text = payload.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise StorageCorruptedError(f"无法解析数据: {e}")
+    index = _WHITESPACE.match(text, 0).end()
+    if text[index:index + 1] != '[':
+        raise StorageCorruptedError("数据不是记录列表")
+    return _trailer_version(fields), _iter_json_array(text, index + 1)
+
+
+def _iter_json_array(text, index):
+    decoder = json.JSONDecoder()
+    while True:
+        index = _WHITESPACE.match(text, index).end()
+        if text[index:index + 1] == ']':
+            return
+        try:
+            item, index = decoder.raw_decode(text, index)
+        except ValueError as e:
+            raise StorageCorruptedError(f"无法解析数据: {e}")
+        yield item
+        index = _WHITESPACE.match(text, index).end()
+        if text[index:index + 1] == ',':
+            index += 1
+
+
+def read_json_checked(path):
+    """读取并校验数据文件，返回 (数据, 版本号)，损坏时抛出 StorageCorruptedError"""
+    data, version, _ = _read_checked(path, decode_json)
+    return data, version
+
+
+def _read_checked(path, decode):
+    with open(path, 'rb') as f:
+        content = f.read()
+    return decode(content) + (content,)
+
+
+def read_version(path):
+    """只读取文件末尾的校验尾获取版本号（文件不存在或旧格式返回0）"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 256))
+            tail = f.read()
+    except OSError:
+        return 0
+    pos = tail.rfind(TRAILER_MARK)
+    if pos == -1:
+        return 0
+    return _trailer_version(_parse_trailer(tail[pos + len(TRAILER_MARK):]))
+
+
+def atomic_write_bytes(path, content, keep_backup=True):
+    """原子写入已编码的文件内容，默认保留上一代文件"""
+    _write_file_atomic(path, content, keep_backup)
+
+
+def atomic_write_json(path, data, version=0):
+    """原子写入JSON文件（带校验尾和版本号），并保留上一代文件"""
+    _write_file_atomic(path, encode_json(data, version))
+
+
+def load_json(path, default):
+    """加载JSON数据文件，返回 (数据, 版本号)；正文缺失或损坏时自动从上一代文件恢复"""
+    return load_checked(path, decode_json, default)
+
+
+def load_checked(path, decode, default):
+    """用 decode(内容) -> (数据, 版本号) 加载数据文件；正文缺失或损坏时自动从上一代文件恢复"""
+    bak = backup_path(path)
+    if not os.path.exists(path) and not os.path.exists(bak):
+        return default, 0
+    
+    try:
+        data, version, _ = _read_checked(path, decode)
+        return data, version
+    except (OSError, StorageCorruptedError) as e:
+        error = e
+    
+    try:
+        data, version, content = _read_checked(bak, decode)
+    except (OSError, StorageCorruptedError):
+        print(f"数据文件损坏且无法恢复: {path} ({error})")
+        _quarantine(path)
+        return default, 0
+    
+    # 保留损坏的文件以便排查，再用上一代文件恢复正文
+    print(f"数据文件损坏，已从上一代文件恢复: {path} ({error})")
+    _quarantine(path)
+    _write_file_atomic(path, content, keep_backup=False)
+    return data, version
+
+
+def _quarantine(path):
+    """将损坏的文件改名保留，避免被后续写入覆盖"""
+    if os.path.exists(path):
+        try:
+            os.replace(path, f"{path}.corrupt-{int(time.time())}")
+        except OSError as e:
+            print(f"保留损坏文件失败: {e}")
+
+
+@contextlib.contextmanager
+def file_lock(path, timeout=10.0):
+    """跨进程建议锁：锁定 "<文件名>.lock"，超时抛出 TimeoutError"""
+    lock_file = open(path + ".lock", 'a+b')
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"等待文件锁超时: {path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        lock_file.close()
+
+
+def merge_mappings(base, ours, theirs):
+    """按键三方合并：双方都修改时以本方为准，修改优先于删除，保持对方的顺序"""
+    merged = {}
+    for key, value in theirs.items():
+        if key in ours:
+            mine = ours[key]
+            merged[key] = value if (key in base and mine == base[key]) else mine
+        elif key in base and value == base[key]:
+            continue  # 本方已删除，对方未改动
+        else:
+            merged[key] = value  # 对方新增，或对方修改了本方删除的条目
+    for key, mine in ours.items():
+        if key in theirs:
+            continue
+        if key in base and mine == base[key]:
+            continue  # 对方已删除，本方未改动
+        merged[key] = mine
+    return merged
+
+
+class WriteBehindSaver:
+    """后台延迟保存器：合并短时间内的多次修改，由后台线程只写入一次
+
+    mark_dirty 传入的快照会在后台线程中序列化，调用方之后不得原地修改其中的对象。
+    写入失败时快照放回待写入（期间有更新的快照则以新的为准），按 retry_delay 起倍增的间隔重试，
+    直到写入成功；on_error 只在连续失败的第一次调用。
+    """
+
+    def __init__(self, write_func, delay=0.5, on_error=None, retry_delay=1.0, max_retry_delay=60.0):
+        self.write_func = write_func
+        self.delay = delay
+        self.on_error = on_error
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._pending = None
+        self._has_pending = False
+        self._writing = False
+        self._deadline = 0.0
+        self._failures = 0
+        self._attempts = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="SecurePassSaver", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, snapshot):
+        """标记数据已修改，延迟一段时间后写入最新快照（正在等待重试时不提前）"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("保存器已关闭")
+            self._pending = snapshot
+            self._has_pending = True
+            self._deadline = max(self._deadline, time.monotonic() + self.delay)
+            self._cond.notify_all()
+
+    def is_dirty(self):
+        """是否还有未写入磁盘的修改"""
+        with self._cond:
+            return self._has_pending or self._writing
+
+    def flush(self):
+        """立即写入待保存的数据（不等重试间隔），并等待这次写入完成
+
+        返回是否已全部写入；写入失败时返回 False，数据仍保留，之后继续重试。
+        """
+        with self._cond:
+            while self._writing:
+                self._cond.wait()
+            if not self._has_pending:
+                return True
+            if self._closed:
+                return False
+            attempts = self._attempts
+            self._deadline = 0.0
+            self._cond.notify_all()
+            while self._attempts == attempts:
+                self._cond.wait()
+            if self._has_pending:
+                print("后台保存数据错误: 仍有未写入的修改")
+                return False
+            return True
+
+    def close(self):
+        """写入剩余数据并停止后台线程，返回是否已全部写入"""
+        saved = self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        return saved
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._has_pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                snapshot = self._pending
+                self._pending = None
+                self._has_pending = False
+                self._writing = True
+            error = None
+            try:
+                self.write_func(snapshot)
+            except Exception as e:
+                error = e
+                print(f"后台保存数据错误: {e}")
+            with self._cond:
+                self._writing = False
+                self._attempts += 1
+                if error is None:
+                    self._failures = 0
+                else:
+                    if not self._has_pending:
+                        self._pending = snapshot
+                        self._has_pending = True
+                    self._failures += 1
+                    retry = min(self.retry_delay * 2 ** (self._failures - 1), self.max_retry_delay)
+                    self._deadline = time.monotonic() + retry
+                first_failure = self._failures == 1 and error is not None
+                self._cond.notify_all()
+            if first_failure and self.on_error:
+                self.on_error(error)
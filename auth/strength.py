@@ -0,0 +1,790 @@
+# auth/strength.py
+# 密码强度估计（参照 zxcvbn 的模式匹配与猜测次数模型）：找出密码中的常见密码、单词、姓名、拼音、
+# 键盘连续按键、重复、顺序字符、年份和日期，以最省猜测次数的分解估计破解所需的猜测次数
+#
+# 词典预先编译为紧凑的前缀树（auth/strength_words.dat），第一次估计时才读入。匹配按 "以第 k 个字符
+# 结尾" 逐字符进行，每个前缀的匹配状态和动态规划列都被缓存：输入时只在上一个前缀的状态后追加一个字符，
+# 每次按键的工作量与密码长度无关。
+#
+# 词表和评分公式来自 zxcvbn（Dropbox，MIT 许可证），另加常见拼音词。更新词表后重新生成：
+#   python -m auth.strength zxcvbn/frequency_lists.py [更多词表.txt ...]
+# 查看每次按键的估计耗时：
+#   python -m auth.strength --benchmark
+#
+# 词典文件布局：
+#   文件头   b"SPWD" + u16 格式版本 + u16 词典数 + u32 节点数 + u16 词典名长度 + 词典名（UTF-8，换行分隔）
+#   节点区   zlib 压缩：各节点的字符（UTF-16-LE）、子节点数（u8）、词频排名（u16，0 表示不是词尾）、
+#            所属词典（u8）。节点按广度优先编号，同一节点的子节点相邻且按字符排序，
+#            子节点的起始编号由子节点数累加得到，不另外存储。
+
+import math
+import os
+import re
+import sys
+import struct
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from itertools import accumulate
+
+WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "strength_words.dat")
+MAGIC = b"SPWD"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIH")
+
+# 只分析密码的前 MAX_LENGTH 个字符，更长的部分不影响结果（此时强度已由前面的部分决定）
+MAX_LENGTH = 100
+# 缓存的前缀状态数
+PREFIX_CACHE_SIZE = 512
+# 重复模式的最长单元（如 "abcabc" 的单元为 "abc"）
+REPEAT_MAX_BASE = 16
+
+BRUTEFORCE_CARDINALITY = 10
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+MIN_YEAR_SPACE = 20
+REFERENCE_YEAR = datetime.now().year
+DATE_MIN_YEAR = 1000
+DATE_MAX_YEAR = 2050
+MAX_SEQUENCE_DELTA = 5
+# 猜测次数 -> 评分 0..4 的分界（同 zxcvbn 各加 5，恰好 10^n 次的暴力猜测归入较低一级）
+SCORE_THRESHOLDS = (1e3 + 5, 1e6 + 5, 1e8 + 5, 1e10 + 5)
+
+# 常见拼音词（按大致常见程度排列），作为单独的词典与 zxcvbn 的词表一起编译
+CHINESE_WORDS = (
+    "woaini", "aini", "wangwei", "zhangwei", "wangfang", "liwei", "lina", "zhangmin", "lijing",
+    "wangjing", "liuwei", "wangxiuying", "zhangli", "lixiuying", "wangli", "zhangjing", "lijun",
+    "zhangyong", "wangjun", "wangyong", "liuyang", "zhangyan", "lixia", "zhangjie", "wanglei",
+    "liuying", "zhangtao", "lihong", "wangming", "zhanglei", "chenjing", "liming", "wanghui",
+    "woaiwojia", "woainima", "woaiwoma", "woshishui", "nihao", "nihaoma", "mima", "mimamima",
+    "baobao", "baobei", "laopo", "laogong", "qinqin", "tiantian", "kuaile", "xingfu", "pingan",
+    "meinv", "shuaige", "xiaoming", "xiaohong", "xiaoqiang", "xiaobai", "xiaohei", "xiaoyu",
+    "xiaoxiao", "huahua", "dandan", "lele", "feifei", "yangyang", "beibei", "jingjing", "lanlan",
+    "zhongguo", "beijing", "shanghai", "guangzhou", "shenzhen", "tianjin", "chongqing", "hangzhou",
+    "nanjing", "wuhan", "chengdu", "xian", "aiqing", "tianshi", "xingxing", "yueliang", "taiyang",
+    "qingqing", "wangzi", "gongzhu", "haha", "hehe", "xixi", "hahaha", "hehehe", "zhubajie",
+    "sunwukong", "tangseng", "taobao", "baidu", "tengxun", "weixin", "zhifubao", "jingdong",
+    "yingxiong", "lianmeng", "wangzhe", "rongyao", "xiaomi", "huawei", "lianxiang", "meiyou",
+    "zhangsan", "lisi", "wangwu", "zhaoliu", "wang", "li", "zhang", "liu", "chen", "yang",
+    "huang", "zhao", "wu", "zhou", "xu", "sun", "ma", "zhu", "hu", "guo", "he", "gao", "lin",
+    "luo", "zheng", "liang", "xie", "song", "tang", "han", "feng", "deng", "cao", "peng", "zeng",
+    "xiao", "tian", "dong", "pan", "yuan", "cai", "jiang", "yu", "du", "ye", "cheng", "wei",
+    "su", "lv", "ding", "ren", "lu", "yao", "shen", "zhong", "cui", "tan", "fan", "jin", "qian",
+    "shi", "fu", "kong", "bai", "mao", "qiu", "qin", "xiong", "meng", "yan", "long", "hong",
+)
+
+_L33T_TABLE = {
+    'a': '4@', 'b': '8', 'c': '({[<', 'e': '3', 'g': '69', 'i': '1!|', 'l': '1|7',
+    'o': '0', 's': '$5', 't': '+7', 'x': '%', 'z': '2',
+}
+# l33t 字符 -> 可能代替的字母
+_UNL33T = {}
+for _letter, _subs in _L33T_TABLE.items():
+    for _sub in _subs:
+        _UNL33T[_sub] = _UNL33T.get(_sub, '') + _letter
+
+# 键盘布局：每个按键写作 "未按 Shift 的字符 + 按 Shift 的字符"，键盘各行错开排列，小键盘对齐排列
+_KEYBOARD_LAYOUTS = {
+    'qwerty': (True, r'''
+`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) -_ =+
+    qQ wW eE rR tT yY uU iI oO pP [{ ]} \|
+     aA sS dD fF gG hH jJ kK lL ;: '"
+      zZ xX cC vV bB nN mM ,< .> /?
+'''),
+    'dvorak': (True, r'''
+`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) [{ ]}
+    '" ,< .> pP yY fF gG cC rR lL /? =+ \|
+     aA oO eE uU iI dD hH tT nN sS -_
+      ;: qQ jJ kK xX bB mM wW vV zZ
+'''),
+    'keypad': (False, r'''
+  / * -
+7 8 9 +
+4 5 6
+1 2 3
+  0 .
+'''),
+    'mac_keypad': (False, r'''
+  = / *
+7 8 9 -
+4 5 6 +
+1 2 3
+  0 .
+'''),
+}
+_SHIFTED = frozenset('~!@#$%^&*()_+QWERTYUIOP{}|ASDFGHJKL:"ZXCVBNM<>?')
+
+_RECENT_YEAR = re.compile(r'19\d\d|20\d\d')
+_DATE_WITH_SEPARATOR = re.compile(r'(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})')
+# 不带分隔符的日期按长度的切分方式（第二、三段的起始位置）
+_DATE_SPLITS = {
+    4: ((1, 2), (2, 3)),
+    5: ((1, 3), (2, 3)),
+    6: ((1, 2), (2, 4), (4, 5)),
+    7: ((1, 3), (2, 3), (4, 5), (4, 6)),
+    8: ((2, 4), (4, 6)),
+}
+_START_UPPER = re.compile(r'[A-Z][^A-Z]+')
+_END_UPPER = re.compile(r'[^A-Z]+[A-Z]')
+_ALL_UPPER = re.compile(r'[^a-z]+')
+
+# l! 和 D^(l-1)：超出浮点范围的长度直接视为无穷大（这样长的分解不可能是最优的）
+_FACTORIAL = [float(math.factorial(l)) for l in range(MAX_LENGTH + 2)]
+_GROWTH = [float(MIN_GUESSES_BEFORE_GROWING_SEQUENCE) ** (l - 1) if l < 70 else math.inf
+           for l in range(MAX_LENGTH + 2)]
+
+_trie = None
+_graphs = None
+
+
+class _WordTrie:
+    """只读的词典前缀树"""
+
+    def __init__(self, names, labels, counts, ranks, dicts):
+        self.names = names
+        self.labels = labels
+        self.counts = counts
+        self.ranks = ranks
+        self.dicts = dicts
+        # 节点 i 的子节点从 first[i] 开始
+        self.first = array('I', accumulate(counts, initial=1))
+
+    def child(self, node, char):
+        """子节点编号，没有时返回 -1"""
+        first = self.first[node]
+        return self.labels.find(char, first, first + self.counts[node])
+
+
+def _load_trie():
+    """读取编译好的词典；文件缺失或损坏时只使用其他模式"""
+    global _trie
+    if _trie is None:
+        try:
+            with open(WORDS_FILE, 'rb') as f:
+                data = f.read()
+            magic, version, dict_count, node_count, names_size = HEADER.unpack_from(data)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError("不是有效的词典文件")
+            offset = HEADER.size
+            names = data[offset:offset + names_size].decode('utf-8').split('\n')
+            payload = zlib.decompress(data[offset + names_size:])
+            if len(names) != dict_count or len(payload) != node_count * 6:
+                raise ValueError("词典文件长度不符")
+            labels = payload[:node_count * 2].decode('utf-16-le')
+            counts = payload[node_count * 2:node_count * 3]
+            ranks = array('H')
+            ranks.frombytes(payload[node_count * 3:node_count * 5])
+            if sys.byteorder != 'little':
+                ranks.byteswap()
+            _trie = _WordTrie(names, labels, counts, ranks, payload[node_count * 5:])
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            print(f"读取密码词典错误: {e}")
+            _trie = _WordTrie([], '\0', b'\0', array('H', [0]), b'\0')
+    return _trie
+
+
+def _build_graph(layout, slanted):
+    """由键盘布局生成邻接表：字符 -> {相邻字符: (方向, 是否需要 Shift)}"""
+    positions = {}
+    token_size = len(layout.split()[0])
+    for y, line in enumerate(layout.split('\n')):
+        slant = y - 1 if slanted else 0
+        for token in line.split():
+            x = (line.index(token) - slant) // (token_size + 1)
+            positions[(x, y)] = token
+    graph = {}
+    for (x, y), keys in positions.items():
+        if slanted:
+            around = ((x - 1, y), (x, y - 1), (x + 1, y - 1), (x + 1, y), (x, y + 1), (x - 1, y + 1))
+        else:
+            around = ((x - 1, y), (x - 1, y - 1), (x, y - 1), (x + 1, y - 1),
+                      (x + 1, y), (x + 1, y + 1), (x, y + 1), (x - 1, y + 1))
+        neighbors = [positions.get(coord) for coord in around]
+        for char in keys:
+            graph[char] = {key: (direction, index == 1)
+                           for direction, neighbor in enumerate(neighbors) if neighbor
+                           for index, key in enumerate(neighbor)}
+    return graph
+
+
+def _load_graphs():
+    """键盘邻接表：[(名称, 邻接表, 是否区分 Shift, 起始位置数, 平均相邻按键数)]
+
+    与 zxcvbn 相同，主键盘布局都用 qwerty 的起始位置数和平均相邻按键数，小键盘都用 keypad 的。
+    """
+    global _graphs
+    if _graphs is None:
+        graphs = {name: _build_graph(layout, slanted) for name, (slanted, layout) in _KEYBOARD_LAYOUTS.items()}
+        parameters = {}
+        for keyboard, name in ((True, 'qwerty'), (False, 'keypad')):
+            graph = graphs[name]
+            degree = sum(len({direction for direction, _ in graph[char].values()}) for char in graph)
+            parameters[keyboard] = (len(graph), degree / len(graph))
+        _graphs = [(name, graph, slanted, *parameters[slanted])
+                   for (name, graph), (slanted, _) in zip(graphs.items(), _KEYBOARD_LAYOUTS.values())]
+    return _graphs
+
+
+def _choose(n, k):
+    return math.comb(n, k) if 0 <= k <= n else 0
+
+
+def _case_variations(token):
+    """大小写变化带来的猜测倍数"""
+    if token.lower() == token:
+        return 1
+    if _START_UPPER.fullmatch(token) or _END_UPPER.fullmatch(token) or _ALL_UPPER.fullmatch(token):
+        return 2
+    upper = sum(1 for c in token if c.isupper())
+    lower = sum(1 for c in token if c.islower())
+    return sum(_choose(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+def _l33t_variations(token, subs):
+    """l33t 替换（如 @ 代替 a）带来的猜测倍数"""
+    variations = 1
+    token = token.lower()
+    for subbed, letter in subs:
+        replaced, kept = token.count(subbed), token.count(letter)
+        if replaced == 0 or kept == 0:
+            variations *= 2
+        else:
+            variations *= sum(_choose(replaced + kept, i) for i in range(1, min(replaced, kept) + 1))
+    return variations
+
+
+def _spatial_guesses(length, turns, shifted, starts, degree):
+    guesses = 0
+    for i in range(2, length + 1):
+        for j in range(1, min(turns, i - 1) + 1):
+            guesses += _choose(i - 1, j - 1) * starts * degree ** j
+    if shifted:
+        unshifted = length - shifted
+        if unshifted == 0:
+            guesses *= 2
+        else:
+            guesses *= sum(_choose(length, i) for i in range(1, min(shifted, unshifted) + 1))
+    return guesses
+
+
+def _sequence_guesses(token, ascending):
+    first = token[0]
+    if first in 'aAzZ019':
+        base = 4
+    elif '0' <= first <= '9':
+        base = 10
+    else:
+        base = 26
+    return (base if ascending else base * 2) * len(token)
+
+
+def _year_guesses(year):
+    return max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)
+
+
+def _day_month(first, second):
+    for day, month in ((first, second), (second, first)):
+        if 1 <= day <= 31 and 1 <= month <= 12:
+            return day, month
+    return None
+
+
+def _to_date(a, b, c):
+    """三个整数能否组成日期，返回 (年, 月, 日) 或 None（规则同 zxcvbn 的 map_ints_to_dmy）"""
+    if b > 31 or b <= 0:
+        return None
+    over_12 = over_31 = under_1 = 0
+    for value in (a, b, c):
+        if 99 < value < DATE_MIN_YEAR or value > DATE_MAX_YEAR:
+            return None
+        over_31 += value > 31
+        over_12 += value > 12
+        under_1 += value <= 0
+    if over_31 >= 2 or over_12 == 3 or under_1 >= 2:
+        return None
+    for year, rest in ((c, (a, b)), (a, (b, c))):
+        if DATE_MIN_YEAR <= year <= DATE_MAX_YEAR:
+            day_month = _day_month(*rest)
+            return None if day_month is None else (year, day_month[1], day_month[0])
+    for year, rest in ((c, (a, b)), (a, (b, c))):
+        day_month = _day_month(*rest)
+        if day_month is not None:
+            if year <= 99:
+                year += 1900 if year > 50 else 2000
+            return year, day_month[1], day_month[0]
+    return None
+
+
+class Match:
+    """密码中 password[i:j + 1] 匹配到的模式
+
+    pattern 为 dictionary / spatial / repeat / sequence / year / date / bruteforce；
+    info 为该模式的细节（词典名、是否反写、l33t 替换、键盘布局等），用于给出提示。
+    """
+    __slots__ = ('pattern', 'i', 'j', 'guesses', 'info')
+
+    def __init__(self, pattern, i, j, guesses, info=None):
+        self.pattern = pattern
+        self.i = i
+        self.j = j
+        self.guesses = guesses
+        self.info = info
+
+    def __repr__(self):
+        return f"Match({self.pattern!r}, {self.i}, {self.j}, {self.guesses:g}, {self.info!r})"
+
+
+class _Prefix:
+    """某个前缀的匹配状态
+
+    columns[k] 为以第 k 个字符结尾的动态规划列 (各分解段数的最优项, 暴力段的最优前驱, 整段单个匹配)，
+    同一串输入的各个前缀共用一个只追加的列表，各自只读取前 length 列；其余状态为不可变的小元组。
+    """
+    __slots__ = ('length', 'columns', 'cursors', 'spatial', 'repeats', 'sequence', 'result')
+
+    def __init__(self, length, columns, cursors, spatial, repeats, sequence):
+        self.length = length
+        self.columns = columns
+        self.cursors = cursors
+        self.spatial = spatial
+        self.repeats = repeats
+        self.sequence = sequence
+        self.result = None
+
+
+_EMPTY = _Prefix(0, [], (), (), (0,) * REPEAT_MAX_BASE, None)
+
+
+def _dictionary_matches(password, k, cursors, trie, matches):
+    """推进词典游标（每个游标为 (节点, 起点, l33t 替换)），返回新游标并收集以 k 结尾的单词"""
+    char = password[k]
+    lower = char.lower()
+    advanced = []
+    for node, start, subs in cursors + ((0, k, ()),):
+        child = trie.child(node, lower)
+        if child >= 0:
+            advanced.append((child, start, subs))
+        for letter in _UNL33T.get(lower, ''):
+            used = next((used for sub, used in subs if sub == lower), None)
+            if used is not None and used != letter:
+                continue
+            child = trie.child(node, letter)
+            if child >= 0:
+                advanced.append((child, start, subs if used else subs + ((lower, letter),)))
+    ranks = trie.ranks
+    for node, start, subs in advanced:
+        rank = ranks[node]
+        if not rank or (subs and start == k):
+            continue
+        token = password[start:k + 1]
+        guesses = rank * _case_variations(token)
+        if subs:
+            guesses *= _l33t_variations(token, subs)
+        matches.append(Match('dictionary', start, k, guesses,
+                             {'dictionary': trie.names[trie.dicts[node]], 'rank': rank, 'l33t': bool(subs)}))
+    # 反写的单词（如 "drowssap"）：从 k 向前查找
+    node = 0
+    for start in range(k, -1, -1):
+        node = trie.child(node, password[start].lower())
+        if node < 0:
+            break
+        rank = ranks[node]
+        if rank and start < k:
+            token = password[start:k + 1]
+            matches.append(Match('dictionary', start, k, rank * _case_variations(token) * 2,
+                                 {'dictionary': trie.names[trie.dicts[node]], 'rank': rank, 'reversed': True}))
+    return tuple(advanced)
+
+
+def _spatial_matches(password, k, runs, matches):
+    """推进各键盘布局上的连续按键（每个为 (起点, 转向次数, Shift 次数, 上一步方向)）"""
+    char = password[k]
+    advanced = []
+    for number, (name, graph, keyboard, starts, degree) in enumerate(_load_graphs()):
+        step = graph.get(password[k - 1], {}).get(char) if k else None
+        if step is None:
+            advanced.append((k, 0, int(keyboard and char in _SHIFTED), None))
+            continue
+        start, turns, shifted, direction = runs[number]
+        direction_now, shift = step
+        run = (start, turns + (direction_now != direction), shifted + (keyboard and shift), direction_now)
+        advanced.append(run)
+        if k - start >= 2:
+            matches.append(Match('spatial', start, k,
+                                 _spatial_guesses(k - start + 1, run[1], run[2], starts, degree),
+                                 {'graph': name, 'turns': run[1]}))
+    return tuple(advanced)
+
+
+def _repeat_matches(password, k, repeats, matches):
+    """推进各单元长度 L 的重复计数（以 k 结尾、与前 L 个字符相同的连续字符数）"""
+    char = password[k]
+    advanced = tuple(run + 1 if k >= size and password[k - size] == char else 0
+                     for size, run in enumerate(repeats, 1))
+    for size, run in enumerate(advanced, 1):
+        copies = (run + size) // size
+        if copies >= 2:
+            start = k - copies * size + 1
+            base = password[start:start + size]
+            matches.append(Match('repeat', start, k, _base_guesses(base) * copies,
+                                 {'base': base, 'copies': copies}))
+    return advanced
+
+
+def _sequence_matches(password, k, sequence, matches):
+    """推进顺序字符（如 abc、9753）：(起点, 相邻字符的码位差)"""
+    if k == 0:
+        return None
+    delta = ord(password[k]) - ord(password[k - 1])
+    if sequence is None or sequence[1] == delta:
+        start = sequence[0] if sequence is not None else 0
+    else:
+        start = k - 1
+    if (k - start > 1 or abs(delta) == 1) and 0 < abs(delta) <= MAX_SEQUENCE_DELTA:
+        token = password[start:k + 1]
+        matches.append(Match('sequence', start, k, _sequence_guesses(token, delta > 0), {'ascending': delta > 0}))
+    return start, delta
+
+
+def _date_matches(password, k, matches):
+    """以 k 结尾的年份和日期（19xx、2024、1991-01-01、010191 等）"""
+    if not password[k].isdigit():
+        return
+    if k >= 3 and _RECENT_YEAR.fullmatch(password, k - 3, k + 1):
+        year = int(password[k - 3:k + 1])
+        matches.append(Match('year', k - 3, k, _year_guesses(year), {'year': year}))
+    for length in range(4, 9):
+        start = k - length + 1
+        if start < 0:
+            break
+        token = password[start:k + 1]
+        if not token.isdigit() or not token.isascii():
+            break
+        best = None
+        for second, third in _DATE_SPLITS[length]:
+            date = _to_date(int(token[:second]), int(token[second:third]), int(token[third:]))
+            if date is not None and (best is None or abs(date[0] - REFERENCE_YEAR) < abs(best[0] - REFERENCE_YEAR)):
+                best = date
+        if best is not None:
+            matches.append(Match('date', start, k, _year_guesses(best[0]) * 365, {'date': best}))
+    for length in range(6, 11):
+        start = k - length + 1
+        if start < 0:
+            break
+        found = _DATE_WITH_SEPARATOR.fullmatch(password, start, k + 1)
+        if found is None:
+            continue
+        date = _to_date(int(found.group(1)), int(found.group(3)), int(found.group(4)))
+        if date is not None:
+            matches.append(Match('date', start, k, _year_guesses(date[0]) * 365 * 4,
+                                 {'date': date, 'separator': found.group(2)}))
+
+
+def _update(entries, match, pi, length):
+    """长度为 length、以 match 结尾的分解若优于已有的同样或更短的分解，记入该列"""
+    g = _FACTORIAL[length] * pi + _GROWTH[length]
+    for other, entry in entries.items():
+        if other <= length and entry[0] <= g:
+            return
+    entries[length] = (g, pi, match)
+
+
+def _column(columns, k, matches):
+    """计算以第 k 个字符结尾的动态规划列（与 zxcvbn 的 most_guessable_match_sequence 相同）
+
+    列中 entries 为 段数 -> (g, 各段猜测次数之积, 最后一段)；g = 段数! x 积 + D^(段数-1)。
+    以本列结尾的暴力段只需考虑每个段数下最优的起点：runs 为 段数 -> (前驱积 x 10^暴力段长度, 暴力段起点)，
+    每列由上一列乘 10 后与新起点比较得到，不必对每个起点重新计算。
+    """
+    entries = {}
+    whole = None
+    matches.sort(key=lambda m: m.i)
+    for match in matches:
+        guesses = max(match.guesses, MIN_SUBMATCH_GUESSES_SINGLE_CHAR if match.i == match.j
+                      else MIN_SUBMATCH_GUESSES_MULTI_CHAR)
+        if match.i == 0:
+            _update(entries, match, guesses, 1)
+            # 覆盖整个前缀的单个匹配：若该前缀就是整个密码，不受子匹配的最小猜测次数限制
+            if whole is None or match.guesses < whole.guesses:
+                whole = match
+        else:
+            for length, (_, pi, _) in list(columns[match.i - 1][0].items()):
+                _update(entries, match, guesses * pi, length + 1)
+    bruteforce = max(float(BRUTEFORCE_CARDINALITY) ** (k + 1), MIN_SUBMATCH_GUESSES_SINGLE_CHAR + 1
+                     if k == 0 else MIN_SUBMATCH_GUESSES_MULTI_CHAR + 1)
+    _update(entries, Match('bruteforce', 0, k, bruteforce), bruteforce, 1)
+    runs = {}
+    if k:
+        previous, previous_runs, _ = columns[k - 1]
+        for length in sorted(previous.keys() | previous_runs.keys()):
+            entry = previous.get(length)
+            pi = entry[1] if entry is not None and entry[2].pattern != 'bruteforce' else None
+            run = previous_runs.get(length)
+            # 长度为 1 的暴力段接在 k-1 列之后，更长的接在更早的列之后
+            best = None
+            if run is not None:
+                best = (run[0] * BRUTEFORCE_CARDINALITY, run[1])
+            if pi is not None and (best is None or pi * (MIN_SUBMATCH_GUESSES_SINGLE_CHAR + 1) < best[0]):
+                best = (pi * (MIN_SUBMATCH_GUESSES_SINGLE_CHAR + 1), k)
+            if best is not None:
+                start = best[1]
+                guesses = (MIN_SUBMATCH_GUESSES_SINGLE_CHAR + 1 if start == k
+                           else float(BRUTEFORCE_CARDINALITY) ** (k - start + 1))
+                _update(entries, Match('bruteforce', start, k, guesses), best[0], length + 1)
+            if run is not None and (pi is None or run[0] <= pi):
+                runs[length] = (run[0] * BRUTEFORCE_CARDINALITY, run[1])
+            elif pi is not None:
+                runs[length] = (pi * BRUTEFORCE_CARDINALITY, k)
+    return entries, runs, whole
+
+
+def _advance(state, password, k):
+    """在前缀 password[:k] 的状态后追加第 k 个字符"""
+    matches = []
+    cursors = _dictionary_matches(password, k, state.cursors, _load_trie(), matches)
+    spatial = _spatial_matches(password, k, state.spatial, matches)
+    repeats = _repeat_matches(password, k, state.repeats, matches)
+    sequence = _sequence_matches(password, k, state.sequence, matches)
+    _date_matches(password, k, matches)
+    columns = state.columns
+    if len(columns) != k:
+        # 该前缀之后已追加过其他字符（如删除后重新输入），复制自己的部分
+        columns = columns[:k]
+    columns.append(_column(columns, k, matches))
+    return _Prefix(k + 1, columns, cursors, spatial, repeats, sequence)
+
+
+_prefixes = OrderedDict()
+
+
+def _prefix_state(password, cache=_prefixes):
+    """密码的匹配状态：从缓存中最长的前缀开始逐字符追加，新的前缀状态都放入缓存（cache 为 None 时不缓存）"""
+    state = _EMPTY
+    if cache is not None:
+        for length in range(len(password), 0, -1):
+            cached = cache.get(password[:length])
+            if cached is not None:
+                cache.move_to_end(password[:length])
+                state = cached
+                break
+    for k in range(state.length, len(password)):
+        state = _advance(state, password, k)
+        if cache is not None:
+            cache[password[:k + 1]] = state
+            if len(cache) > PREFIX_CACHE_SIZE:
+                cache.popitem(last=False)
+    return state
+
+
+@lru_cache(maxsize=4096)
+def _base_guesses(base):
+    """重复单元单独作为密码时的猜测次数"""
+    return _estimate_state(_prefix_state(base, None), base).guesses
+
+
+class StrengthEstimate:
+    """密码强度估计结果
+
+    guesses 为估计的猜测次数，score 为 0..4 的评分（同 zxcvbn），sequence 为最省猜测次数的匹配分解。
+    """
+
+    # 最长的匹配段的模式 -> 提示
+    WARNINGS = {
+        'top10': "这是最常用的 10 个密码之一",
+        'top100': "这是最常用的 100 个密码之一",
+        'common': "这是非常常见的密码",
+        'similar': "这和常见密码很相似",
+        'word': "单个单词很容易被猜到",
+        'name': "姓名很容易被猜到",
+        'pinyin': "常见拼音和姓氏很容易被猜到",
+        'reversed': "反着写的单词同样容易被猜到",
+        'l33t': "用符号代替字母（如 @ 代替 a）帮助不大",
+        'straight': "键盘上连成一排的按键很容易被猜到",
+        'keyboard': "较短的键盘图案很容易被猜到",
+        'repeat_char': "重复的字符（如 aaa）很容易被猜到",
+        'repeat': "重复的片段（如 abcabc）只比一份稍难猜",
+        'sequence': "顺序字符（如 abc、6543）很容易被猜到",
+        'date': "年份和日期很容易被猜到",
+        'short': "再加几个字符或不常见的单词",
+    }
+
+    def __init__(self, password, guesses, sequence):
+        self.password = password
+        self.guesses = guesses
+        self.sequence = sequence
+        self.score = sum(guesses >= threshold for threshold in SCORE_THRESHOLDS)
+
+    def warning(self):
+        """评分较低时给出的主要问题，评分足够时为空字符串"""
+        if self.score > 2 or not self.password:
+            return ""
+        longest = max(self.sequence, key=lambda m: m.j - m.i)
+        return self.WARNINGS.get(self._warning_key(longest, len(self.sequence) == 1), self.WARNINGS['short'])
+
+    @staticmethod
+    def _warning_key(match, sole):
+        info = match.info or {}
+        if match.pattern == 'dictionary':
+            if info.get('reversed'):
+                return 'reversed'
+            if info.get('l33t'):
+                return 'l33t'
+            dictionary = info['dictionary']
+            if dictionary == 'passwords':
+                if sole:
+                    return 'top10' if info['rank'] <= 10 else 'top100' if info['rank'] <= 100 else 'common'
+                return 'similar' if match.guesses <= 1e4 else None
+            if dictionary in ('english_wikipedia', 'us_tv_and_film'):
+                return 'word' if sole else None
+            if dictionary == 'chinese':
+                return 'pinyin'
+            return 'name'
+        if match.pattern == 'spatial':
+            return 'straight' if info['turns'] == 1 else 'keyboard'
+        if match.pattern == 'repeat':
+            return 'repeat_char' if len(info['base']) == 1 else 'repeat'
+        if match.pattern == 'sequence':
+            return 'sequence'
+        if match.pattern in ('year', 'date'):
+            return 'date'
+        return None
+
+
+def _estimate_state(state, password):
+    """由前缀状态取出最优分解（结果缓存在状态中）"""
+    if state.result is not None:
+        return state.result
+    n = state.length
+    if n == 0:
+        state.result = StrengthEstimate(password, 1, [])
+        return state.result
+    entries, _, whole = state.columns[n - 1]
+    length = min(entries, key=lambda l: entries[l][0])
+    guesses = entries[length][0]
+    if whole is not None and max(whole.guesses, 1) + 1 < guesses:
+        state.result = StrengthEstimate(password, max(whole.guesses, 1) + 1, [whole])
+        return state.result
+    sequence = []
+    k = n - 1
+    while k >= 0:
+        match = state.columns[k][0][length][2]
+        sequence.append(match)
+        k = match.i - 1
+        length -= 1
+    sequence.reverse()
+    state.result = StrengthEstimate(password, guesses, sequence)
+    return state.result
+
+
+def estimate(password):
+    """估计密码强度，返回 StrengthEstimate
+
+    只分析前 MAX_LENGTH 个字符。逐字符输入（或删除）时复用缓存的前缀状态，只计算新增的字符。
+    """
+    password = password[:MAX_LENGTH]
+    return _estimate_state(_prefix_state(password), password)
+
+
+def strength_score(password):
+    """密码强度评分 0..4（约 < 1e3、< 1e6、< 1e8、< 1e10 次猜测、更多）"""
+    return estimate(password).score
+
+
+def read_word_lists(sources):
+    """读取词表：zxcvbn 的 frequency_lists.py（含多个词典），或每行一个词、按常见程度排列的文本文件"""
+    lists = {}
+    for source in sources:
+        with open(source, encoding='utf-8') as f:
+            text = f.read()
+        if source.endswith('.py'):
+            for name, words in re.findall(r'"(\w+)":\s*"([^"]*)"', text):
+                lists[name] = words.split(',')
+        else:
+            name = os.path.splitext(os.path.basename(source))[0]
+            lists[name] = [line.split()[0] for line in text.splitlines() if line.strip()]
+    return lists
+
+
+def build_words(sources, output=WORDS_FILE):
+    """把词表编译为前缀树文件，返回 (词数, 节点数)
+
+    每个词只保留最常见（排名最小）的词典中的排名；排名超过 u16 范围或含 BMP 以外字符的词被跳过。
+    """
+    lists = read_word_lists(sources)
+    lists['chinese'] = list(CHINESE_WORDS)
+    names = list(lists)
+    root = [{}, 0, 0]
+    words = 0
+    for dictionary, word_list in enumerate(lists.values()):
+        for rank, word in enumerate(word_list[:0xFFFF], 1):
+            word = word.lower()
+            if not word or any(ord(c) > 0xFFFF for c in word):
+                continue
+            node = root
+            for char in word:
+                node = node[0].setdefault(char, [{}, 0, 0])
+            if node[1] == 0:
+                words += 1
+            if node[1] == 0 or rank < node[1]:
+                node[1], node[2] = rank, dictionary
+    labels, counts, ranks, dicts = ['\0'], bytearray(), array('H'), bytearray()
+    queue = [root]
+    for node in queue:
+        children = sorted(node[0].items())
+        if len(children) > 0xFF:
+            raise ValueError("子节点过多")
+        counts.append(len(children))
+        ranks.append(node[1])
+        dicts.append(node[2])
+        for char, child in children:
+            labels.append(char)
+            queue.append(child)
+    if sys.byteorder != 'little':
+        ranks.byteswap()
+    payload = ''.join(labels).encode('utf-16-le') + bytes(counts) + ranks.tobytes() + bytes(dicts)
+    names_data = '\n'.join(names).encode('utf-8')
+    with open(output, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(names), len(queue), len(names_data)))
+        f.write(names_data)
+        f.write(zlib.compress(payload, 9))
+    return words, len(queue)
+
+
+def benchmark(passwords=("P@ssw0rd1234", "correcthorsebatterystaple",
+                         "Tr0ub4dor&3-qazwsx-1991.05.17-woaini1314", "x" * 16 + "9f$Kq2!zLm" * 5)):
+    """逐字符输入各密码，统计每次按键的估计耗时（使用前缀缓存，与从头计算对比）"""
+    import time
+    started = time.perf_counter()
+    _load_trie()
+    print(f"读入词典: {(time.perf_counter() - started) * 1000:.1f} ms")
+    for password in passwords:
+        password = password[:MAX_LENGTH]
+        _prefixes.clear()
+        _base_guesses.cache_clear()
+        started = time.perf_counter()
+        for length in range(1, len(password) + 1):
+            estimate(password[:length])
+        typed = (time.perf_counter() - started) / len(password)
+        started = time.perf_counter()
+        for length in range(1, len(password) + 1):
+            _base_guesses.cache_clear()
+            _estimate_state(_prefix_state(password[:length], None), password[:length])
+        cold = (time.perf_counter() - started) / len(password)
+        result = estimate(password)
+        print(f"{len(password):3} 字符  每次按键 {typed * 1000:.3f} ms（从头计算 {cold * 1000:.3f} ms）"
+              f"  猜测次数 {result.guesses:.3g}  评分 {result.score}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2 and sys.argv[1] == '--benchmark':
+        benchmark()
+    elif len(sys.argv) >= 2:
+        words, nodes = build_words(sys.argv[1:])
+        print(f"已生成密码词典（{words} 个词，{nodes} 个节点）: {WORDS_FILE}")
+    else:
+        print("用法: python -m auth.strength zxcvbn/frequency_lists.py [更多词表.txt ...]\n"
+              "      python -m auth.strength --benchmark")
+        sys.exit(1)
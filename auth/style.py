@@ -0,0 +1,456 @@
+# auth/style.py
+# 全局样式表：所有界面样式集中在一张应用级样式表中
+#
+# 控件通过 objectName 选择样式（如 "formInput"、"pageTitle"），按钮通过动态属性
+# variant（颜色）和 buttonSize（尺寸）组合样式。状态变化（输入框错误边框、密码强度、
+# 登录状态、提示文字颜色）只修改动态属性并重新应用该控件的样式，不再重新解析样式表。
+
+from PySide6 import QtWidgets
+
+APP_STYLESHEET = """
+/* ---------- 窗口 ---------- */
+WelcomeWindow, WelcomeWindow QWidget, RegisterWindow, RegisterWindow QWidget {
+    background-color: #f9fafb;
+    font-family: "Microsoft YaHei";
+}
+WelcomeWindow QLabel, RegisterWindow QLabel {
+    color: #374151;
+    font-size: 14px;
+}
+RegisterWindow QLineEdit {
+    border: 2px solid #d1d5db;
+    border-radius: 10px;
+    padding: 6px 10px;
+    background-color: white;
+    font-size: 14px;
+}
+RegisterWindow QLineEdit:focus {
+    border: 2px solid #3b82f6;
+}
+RegisterWindow QComboBox {
+    border: 2px solid #d1d5db;
+    border-radius: 10px;
+    padding: 4px 10px;
+    background-color: white;
+}
+
+/* ---------- 文字 ---------- */
+QLabel#pageTitle {
+    font-size: 24px;
+    font-weight: bold;
+    color: #111827;
+}
+QLabel#stageTitle, QLabel#viewTitle {
+    font-size: 20px;
+    font-weight: bold;
+    color: #111827;
+}
+QLabel#viewTitle {
+    margin-bottom: 20px;
+}
+QWidget#moreView QLabel#viewTitle {
+    margin-bottom: 30px;
+}
+QLabel#sectionTitle {
+    font-size: 18px;
+    font-weight: bold;
+    color: #111827;
+}
+QLabel#dialogHeading {
+    font-size: 16px;
+    font-weight: bold;
+}
+QLabel#dialogSubheading {
+    font-size: 14px;
+    font-weight: bold;
+}
+QLabel#bodyText {
+    font-size: 14px;
+    color: #374151;
+}
+QLabel#fieldLabel {
+    font-size: 14px;
+}
+QLabel#mutedText {
+    font-size: 14px;
+    color: #6b7280;
+}
+QLabel#dialogHint {
+    font-size: 14px;
+    color: #6b7280;
+    margin: 10px 0;
+}
+QLabel#hintLabel {
+    color: #6b7280;
+    font-size: 12px;
+}
+QLabel#link {
+    color: #3b82f6;
+    text-decoration: underline;
+}
+QLabel#error_label {
+    color: #ef4444;
+    font-size: 12px;
+}
+QLabel#errorMessage {
+    font-size: 16px;
+    color: #ef4444;
+}
+QLabel#finishLabel {
+    font-size: 18px;
+    color: #2563eb;
+    font-weight: bold;
+}
+QLabel#statusLabel {
+    font-size: 12px;
+    color: #6b7280;
+}
+QLabel#statusLabel[state="success"] {
+    color: #10b981;
+}
+QLabel#statusLabel[state="error"] {
+    color: #ef4444;
+}
+
+/* ---------- 输入框 ---------- */
+QLineEdit#formInput {
+    border: 2px solid #d1d5db;
+    border-radius: 10px;
+    padding: 6px 10px;
+    background-color: white;
+    font-size: 14px;
+}
+QLineEdit#formInput:focus {
+    border: 2px solid #3b82f6;
+}
+QLineEdit#formInput[state="error"], QLineEdit#formInput[state="error"]:focus {
+    border: 2px solid #ef4444;
+}
+QLineEdit#formInput[state="ok"], QLineEdit#formInput[state="ok"]:focus {
+    border: 2px solid #10b981;
+}
+QLineEdit#field {
+    border: 2px solid #d1d5db;
+    border-radius: 10px;
+    padding: 8px 12px;
+    font-size: 14px;
+}
+QComboBox#field {
+    border: 2px solid #d1d5db;
+    border-radius: 10px;
+    padding: 6px 10px;
+    background-color: white;
+    font-size: 14px;
+}
+QTextEdit#field {
+    border: 2px solid #d1d5db;
+    border-radius: 10px;
+    padding: 8px;
+    font-size: 14px;
+}
+QLineEdit#field:focus, QComboBox#field:focus, QTextEdit#field:focus {
+    border: 2px solid #3b82f6;
+}
+QLineEdit#field[state="error"], QLineEdit#field[state="error"]:focus {
+    border: 2px solid #ef4444;
+}
+QLineEdit#pathInput {
+    border: 1px solid #d1d5db;
+    border-radius: 8px;
+    padding: 8px 12px;
+    font-size: 14px;
+}
+QCheckBox#checkBox {
+    color: #374151;
+    font-size: 14px;
+}
+QCheckBox#checkBox::indicator {
+    width: 18px;
+    height: 18px;
+    border-radius: 4px;
+    border: 2px solid #d1d5db;
+    background-color: white;
+}
+QCheckBox#checkBox::indicator:checked {
+    background-color: #3b82f6;
+    border-color: #3b82f6;
+}
+QCheckBox#checkBox::indicator:checked:hover {
+    background-color: #2563eb;
+}
+
+/* ---------- 指示器 ---------- */
+QWidget#stepBar {
+    background-color: #e5e7eb;
+    border-radius: 3px;
+}
+QWidget#stepBar[done="true"] {
+    background-color: #10b981;
+}
+QWidget#strengthBar {
+    background-color: #e5e7eb;
+    border-radius: 2px;
+}
+QWidget#strengthBar[level="1"] { background-color: #ef4444; }
+QWidget#strengthBar[level="2"] { background-color: #f59e0b; }
+QWidget#strengthBar[level="3"] { background-color: #eab308; }
+QWidget#strengthBar[level="4"] { background-color: #84cc16; }
+QWidget#strengthBar[level="5"] { background-color: #10b981; }
+QLabel#loginStatus {
+    color: #111827;
+    background-color: #f59e0b;
+    font-size: 12px;
+    font-weight: bold;
+    padding: 4px 8px;
+    border-radius: 12px;
+}
+QLabel#loginStatus[remembered="true"] {
+    color: white;
+    background-color: #10b981;
+}
+
+/* ---------- Toast ---------- */
+QWidget#toast {
+    background-color: #fef3c7;
+    border: 1px solid #fbbf24;
+    border-radius: 8px;
+}
+QLabel#toastMessage {
+    color: #92400e;
+    font-size: 14px;
+    font-weight: bold;
+}
+QPushButton#toastClose {
+    border: none;
+    background-color: transparent;
+    color: #92400e;
+    font-size: 16px;
+    font-weight: bold;
+}
+QPushButton#toastClose:hover {
+    background-color: rgba(0,0,0,0.1);
+    border-radius: 10px;
+}
+
+/* ---------- 按钮 ---------- */
+QPushButton#glowButton {
+    border: none;
+    border-radius: 12px;
+    color: white;
+    background-color: #3b82f6;
+    font-size: 15px;
+    padding: 6px 18px;
+}
+QPushButton#glowButton:pressed {
+    background-color: #2563eb;
+}
+QPushButton#iconButton, QPushButton#squareButton {
+    border: 1px solid #d1d5db;
+    border-radius: 8px;
+    background-color: white;
+    min-width: 30px;
+    min-height: 30px;
+    max-width: 30px;
+    max-height: 30px;
+}
+QPushButton#iconButton {
+    color: #6b7280;
+    font-weight: bold;
+}
+QPushButton#iconButton:hover, QPushButton#squareButton:hover, QPushButton#toolbarButton:hover {
+    background-color: #f3f4f6;
+}
+QPushButton#iconButton:hover, QPushButton#toolbarButton:hover {
+    color: #3b82f6;
+}
+QPushButton#toolbarButton {
+    border: 1px solid #d1d5db;
+    border-radius: 8px;
+    background-color: white;
+    min-width: 80px;
+    min-height: 30px;
+    color: #6b7280;
+    font-size: 12px;
+    font-weight: bold;
+}
+VersionButton#toolbarButton {
+    min-width: 100px;
+}
+QPushButton#backButton {
+    background-color: #3b82f6;
+    color: white;
+    border: none;
+    padding: 8px 20px;
+    border-radius: 6px;
+    font-weight: bold;
+}
+QPushButton#backButton:hover {
+    background-color: #2563eb;
+}
+QPushButton#avatarButton {
+    border: 2px solid #d1d5db;
+    border-radius: 22px;
+    background-color: #f9fafb;
+    padding: 0px;
+}
+QPushButton#avatarButton:hover {
+    border-color: #3b82f6;
+    background-color: #f0f9ff;
+}
+
+/* 填充按钮：variant 决定颜色，buttonSize 决定尺寸 */
+QPushButton[variant] {
+    color: white;
+    border: none;
+    border-radius: 8px;
+    font-size: 14px;
+}
+QPushButton[variant="primary"] { background-color: #3b82f6; }
+QPushButton[variant="primary"]:hover { background-color: #2563eb; }
+QPushButton[variant="success"] { background-color: #10b981; }
+QPushButton[variant="success"]:hover { background-color: #059669; }
+QPushButton[variant="secondary"] { background-color: #6b7280; }
+QPushButton[variant="secondary"]:hover { background-color: #4b5563; }
+QPushButton[variant="danger"] { background-color: #ef4444; }
+QPushButton[variant="danger"]:hover { background-color: #dc2626; }
+QPushButton[variant="warning"] { background-color: #f59e0b; }
+QPushButton[variant="warning"]:hover { background-color: #d97706; }
+QPushButton[variant="outline"] {
+    background-color: white;
+    color: #6b7280;
+    border: 1px solid #d1d5db;
+}
+QPushButton[variant="outline"]:hover { background-color: #f3f4f6; }
+QPushButton[buttonSize="small"] { padding: 8px 16px; }
+QPushButton[buttonSize="medium"] { padding: 10px 20px; }
+QPushButton[buttonSize="large"] { padding: 12px 20px; }
+QPushButton[buttonSize="form"] {
+    border-radius: 10px;
+    padding: 12px 24px;
+    font-size: 16px;
+    font-weight: bold;
+}
+QPushButton#moreButton {
+    font-weight: 500;
+    min-width: 120px;
+}
+QPushButton#versionButton {
+    font-weight: 500;
+    min-width: 140px;
+}
+QPushButton#logoutButton {
+    font-size: 16px;
+    font-weight: bold;
+}
+QPushButton#closeButton {
+    padding: 10px 40px;
+}
+
+/* ---------- 主窗口 ---------- */
+QListWidget#recordList {
+    border: 2px solid #e5e7eb;
+    border-radius: 10px;
+    background-color: white;
+    font-size: 14px;
+}
+QListWidget#recordList::item {
+    padding: 12px;
+    border-bottom: 1px solid #f3f4f6;
+}
+QListWidget#recordList::item:selected {
+    background-color: #dbeafe;
+    color: #1e40af;
+}
+
+/* ---------- 对话框 ---------- */
+QWidget#dropArea {
+    border: 2px dashed #d1d5db;
+    border-radius: 10px;
+    background-color: #f9fafb;
+    min-height: 200px;
+}
+QWidget#dropArea:hover {
+    border-color: #3b82f6;
+    background-color: #eff6ff;
+}
+QLabel#dropIcon {
+    font-size: 48px;
+}
+QLabel#profileAvatar {
+    border: 3px solid #d1d5db;
+    border-radius: 60px;
+    background-color: #f9fafb;
+}
+QLabel#profileName {
+    font-size: 16px;
+    font-weight: bold;
+    color: #374151;
+}
+QLabel#versionTitle {
+    font-size: 24px;
+    font-weight: bold;
+    color: #3b82f6;
+    margin-bottom: 20px;
+}
+QLabel#versionIntro {
+    font-size: 14px;
+    margin-bottom: 20px;
+}
+QLabel#versionHeading {
+    font-size: 16px;
+    font-weight: bold;
+    margin-bottom: 10px;
+}
+QLabel#versionHeading[spaced="true"] {
+    margin-top: 30px;
+}
+QLabel#versionSubheading {
+    font-size: 14px;
+    font-weight: bold;
+    margin-bottom: 5px;
+}
+QLabel#versionFeature {
+    font-size: 14px;
+    margin-bottom: 5px;
+}
+QLabel#versionStep {
+    font-size: 14px;
+    margin-bottom: 3px;
+    margin-left: 20px;
+}
+QLabel#supportHeading {
+    font-size: 16px;
+    font-weight: bold;
+}
+QLabel#clickHint {
+    color: #6b7280;
+    font-style: italic;
+    font-size: 12px;
+    margin-top: 5px;
+}
+"""
+
+
+def apply_app_style():
+    """为应用安装全局样式表（只安装一次）"""
+    app = QtWidgets.QApplication.instance()
+    if app is not None and not app.property("securepass_style"):
+        app.setStyleSheet(APP_STYLESHEET)
+        app.setProperty("securepass_style", True)
+
+
+def set_state(widget, name, value):
+    """修改控件的动态样式属性，只重新应用该控件的样式；值未变化时不做任何处理"""
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    widget.update()
+
+
+def set_button_style(button, variant, size="small"):
+    """设置填充按钮的颜色和尺寸"""
+    button.setProperty("variant", variant)
+    button.setProperty("buttonSize", size)
@@ -0,0 +1,134 @@
+# auth/undo.py
+# 撤销与重做：每次修改记录为一个命令，只保存被修改的记录的修改前后版本（差量），撤销时执行反向操作
+#
+# 记录为不可变的 Record，修改时整体替换，因此修改前后的两个记录列表逐个比较对象是否相同即可得到差量，
+# 命令中保存的是与密码库共享的记录对象本身，不复制、不保存整个密码库的快照：编辑一条记录只占一条
+# 差量，清空 N 条记录也只是 N 个引用。撤销即执行命令的反向命令（新增与删除互换，替换的前后版本互换），
+# 由 Vault.apply_changes 在当前记录上执行，结果随正常的保存流程写入磁盘并记入修改历史。
+
+from .history import REASON_REDO, REASON_UNDO
+
+# 撤销栈保留的命令数和记录版本数（超出时丢弃最早的命令）
+UNDO_LIMIT = 100
+UNDO_MAX_CHANGES = 200000
+
+
+class UndoConflictError(Exception):
+    """要撤销（重做）的记录已被其他窗口修改，当前版本与命令中的不一致"""
+
+
+def diff_records(old_records, new_records):
+    """两个记录列表之间的差量：[(记录ID, 下标, 修改前, 修改后)]
+
+    修改前为 None 表示新增（下标为在新列表中的位置），修改后为 None 表示删除（下标为在旧列表中的位置），
+    其余为替换。记录不可变，只比较是否为同一个对象；首尾相同的部分直接跳过，只比较中间变化的一段。
+    """
+    start = 0
+    limit = min(len(old_records), len(new_records))
+    while start < limit and old_records[start] is new_records[start]:
+        start += 1
+    old_end, new_end = len(old_records), len(new_records)
+    while old_end > start and new_end > start and old_records[old_end - 1] is new_records[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+
+    old_by_id = {record.get('id'): (index, record)
+                 for index, record in enumerate(old_records[start:old_end], start)}
+    changes = []
+    seen = set()
+    for index, record in enumerate(new_records[start:new_end], start):
+        record_id = record.get('id')
+        seen.add(record_id)
+        found = old_by_id.get(record_id)
+        if found is None:
+            changes.append((record_id, index, None, record))
+        elif found[1] is not record:
+            changes.append((record_id, index, found[1], record))
+    if len(seen) < len(old_by_id):
+        for record_id, (index, record) in old_by_id.items():
+            if record_id not in seen:
+                changes.append((record_id, index, record, None))
+    return changes
+
+
+class EditCommand:
+    """一次可撤销的修改：text 为显示名称（如 "删除 3 条记录"），changes 为 diff_records 给出的差量"""
+
+    def __init__(self, text, changes):
+        self.text = text
+        self.changes = changes
+
+    @classmethod
+    def from_records(cls, text, old_records, new_records):
+        """由修改前后的记录列表得到命令"""
+        return cls(text, diff_records(old_records, new_records))
+
+    def inverse(self):
+        """反向命令：新增与删除互换，替换的前后版本互换"""
+        return EditCommand(self.text, [(record_id, index, after, before)
+                                       for record_id, index, before, after in self.changes])
+
+    def apply(self, vault, reason):
+        """在密码库的当前记录上执行（见 Vault.apply_changes），不一致时抛出 UndoConflictError"""
+        vault.apply_changes(self.changes, reason)
+
+
+class UndoStack:
+    """撤销栈与重做栈（只在界面线程中使用）
+
+    新的修改入栈时清空重做栈；撤销或重做时遇到冲突（记录已被其他窗口修改）则清空两个栈，
+    更早的命令建立在冲突的版本之上，也无法再正确执行。
+    """
+
+    def __init__(self, limit=UNDO_LIMIT, max_changes=UNDO_MAX_CHANGES):
+        self.limit = limit
+        self.max_changes = max_changes
+        self._undo = []
+        self._redo = []
+
+    def push(self, command):
+        """记录一次修改（没有变化的命令忽略）"""
+        if not command.changes:
+            return
+        self._undo.append(command)
+        self._redo.clear()
+        held = sum(len(entry.changes) for entry in self._undo)
+        while len(self._undo) > 1 and (len(self._undo) > self.limit or held > self.max_changes):
+            held -= len(self._undo.pop(0).changes)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo_text(self):
+        return self._undo[-1].text if self._undo else ""
+
+    def redo_text(self):
+        return self._redo[-1].text if self._redo else ""
+
+    def undo(self, vault):
+        """撤销最近一次修改，返回被撤销的命令"""
+        command = self._undo[-1]
+        self._run(command.inverse(), vault, REASON_UNDO)
+        self._redo.append(self._undo.pop())
+        return command
+
+    def redo(self, vault):
+        """重做最近一次撤销的修改，返回该命令"""
+        command = self._redo[-1]
+        self._run(command, vault, REASON_REDO)
+        self._undo.append(self._redo.pop())
+        return command
+
+    def _run(self, command, vault, reason):
+        try:
+            command.apply(vault, reason)
+        except UndoConflictError:
+            self.clear()
+            raise
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
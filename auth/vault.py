@@ -0,0 +1,431 @@
+# auth/vault.py
+# 用户密码库：记录的加载、保存与多进程合并
+
+import json
+import time
+import uuid
+import hashlib
+import threading
+
+from . import binformat
+from .generator import GeneratorPolicyError, PasswordPolicy
+from .history import REASON_EDIT, REASON_ROTATION, HistoryLog, field_changes, history_path, make_entry
+from .record import Record
+from .reuse import PasswordReuseIndex
+from .storage import (StorageCorruptedError, atomic_write_json, load_json, open_json_stream,
+                      read_version, file_lock, merge_mappings)
+from .undo import UndoConflictError
+
+
+def new_record_id():
+    """生成新记录ID"""
+    return uuid.uuid4().hex
+
+
+def _legacy_record_id(index, record):
+    """为旧版本无ID的记录生成确定性ID，保证多个进程加载同一文件得到相同结果"""
+    raw = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(f"{index}:{raw}".encode('utf-8')).hexdigest()[:32]
+
+
+def ensure_record_ids(records, start=0):
+    """为缺少ID的记录补充ID（start 为这批记录在整个列表中的起始下标）"""
+    for index, record in enumerate(records, start):
+        if not record.get('id'):
+            record['id'] = _legacy_record_id(index, record)
+    return records
+
+
+def compact_records(records, start=0):
+    """补充ID并转换为紧凑记录（start 为这批记录在整个列表中的起始下标）"""
+    return [Record.from_dict(record) for record in ensure_record_ids(records, start)]
+
+
+def merge_records(base, ours, theirs):
+    """按记录ID三方合并记录列表"""
+    merged = merge_mappings(
+        {r['id']: r for r in base},
+        {r['id']: r for r in ours},
+        {r['id']: r for r in theirs},
+    )
+    return list(merged.values())
+
+
+class Vault:
+    """用户密码库
+
+    records 只在界面线程中修改，其中的记录为紧凑的 Record，只整体替换、不原地修改；
+    单条记录的增删改通过 put_record / delete_records 等方法进行，以便增量维护重复密码索引，
+    撤销、重做时由 apply_changes 执行反向的差量；
+    commit 在后台保存线程中调用，通过版本号检测其他进程的写入并按记录合并；
+    记录的修改历史（变化字段的旧值）先暂存在内存中，由 commit 在写入记录之前追加到历史文件，
+    加载密码库时不读取历史文件，查看某条记录的历史时才读取。
+    _lock 只保护版本号、合并基准等状态，_history_lock 只保护暂存的历史，都只在交接时短暂持有；
+    commit 的读写文件在文件锁内进行，不持有这两个锁，界面线程修改记录时不会等待写入完成。
+    路径以 .spv 结尾时使用二进制格式存储，否则使用 JSON。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.binary = path.endswith(binformat.BINARY_SUFFIX)
+        self.records = []
+        self.version = 0
+        self._base = []
+        self._merge_seq = 0
+        self._merge_pending = False
+        self._lock = threading.Lock()
+        self._history_lock = threading.Lock()
+        self._search_index = None
+        self._reuse = PasswordReuseIndex()
+        self.history = HistoryLog(history_path(path))
+        self._pending_history = []
+
+    def _read(self):
+        if self.binary:
+            return binformat.load_records(self.path, [])
+        return load_json(self.path, [])
+
+    def _write(self, records, version):
+        if self.binary:
+            binformat.atomic_write_records(self.path, records, version)
+        else:
+            atomic_write_json(self.path, records, version)
+
+    def _disk_version(self):
+        if self.binary:
+            return binformat.read_version(self.path)
+        return read_version(self.path)
+
+    def load(self):
+        """从磁盘加载记录"""
+        with file_lock(self.path):
+            records, version = self._read()
+        records = compact_records(records)
+        with self._lock:
+            self.records = records
+            self.version = version
+            self._base = list(records)
+            self._merge_pending = False
+        self._reuse.sync(records)
+        return records
+
+    def open_stream(self):
+        """后台线程：读取文件，返回 (版本号, 逐条解码的记录迭代器)，用于渐进式加载"""
+        with file_lock(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                content = None
+        if content is not None:
+            try:
+                if self.binary:
+                    return binformat.open_record_stream(content)
+                return open_json_stream(content)
+            except StorageCorruptedError:
+                pass
+        # 文件缺失或损坏：走完整加载流程（自动从上一代文件恢复）
+        with file_lock(self.path):
+            records, version = self._read()
+        return version, iter(records)
+
+    def begin_load(self):
+        """界面线程：开始渐进式加载，清空当前记录"""
+        with self._lock:
+            self.records = []
+        self._reuse.clear()
+
+    def add_records(self, records):
+        """界面线程：追加一批记录（渐进式加载）"""
+        self.records.extend(records)
+        for record in records:
+            self._reuse.add(record)
+
+    def finish_load(self, version):
+        """界面线程：渐进式加载完成，记录作为后续合并的基准"""
+        with self._lock:
+            self.version = version
+            self._base = list(self.records)
+            self._merge_pending = False
+
+    def snapshot(self):
+        """当前记录的快照（供后台线程写入）"""
+        return list(self.records)
+
+    def find_index(self, record_id):
+        """按ID查找记录下标，找不到返回 None"""
+        for index, record in enumerate(self.records):
+            if record.get('id') == record_id:
+                return index
+        return None
+
+    def put_record(self, record, reason=REASON_EDIT):
+        """界面线程：保存一条记录（ID已存在时替换，否则追加），返回其下标
+
+        替换时变化字段的旧值记入修改历史（原因为 reason）。
+        """
+        index = self.find_index(record.get('id'))
+        if index is None:
+            index = len(self.records)
+            self.records.append(record)
+        else:
+            old = self.records[index]
+            self.records[index] = record
+            changes = field_changes(old, record)
+            if changes:
+                with self._history_lock:
+                    self._pending_history.append(
+                        make_entry(record.get('id'), changes, reason, int(time.time())))
+        self._reuse.add(record)
+        return index
+
+    def delete_records(self, record_ids):
+        """界面线程：删除给定ID的记录"""
+        record_ids = set(record_ids)
+        self.records[:] = [record for record in self.records if record.get('id') not in record_ids]
+        for record_id in record_ids:
+            self._reuse.remove(record_id)
+
+    def clear_records(self):
+        """界面线程：删除所有记录"""
+        self.records.clear()
+        self._reuse.clear()
+
+    def apply_changes(self, changes, reason):
+        """界面线程：执行一组差量（撤销、重做），changes 为 [(记录ID, 下标, 修改前, 修改后)]（见 undo.py）
+
+        修改前为 None 的记录插入到给定下标处，修改后为 None 的删除，其余按ID替换，替换的变化字段记入修改历史。
+        每条记录的当前版本必须与 修改前 一致，否则抛出 UndoConflictError，记录不变。
+        """
+        current = {record.get('id'): record for record in self.records}
+        for record_id, _, before, _ in changes:
+            record = current.get(record_id)
+            if (record is None) != (before is None) or (record is not None and record != before):
+                raise UndoConflictError("记录已被其他窗口修改")
+
+        replaced = {}
+        removed = set()
+        inserted = []
+        for record_id, index, before, after in changes:
+            if after is None:
+                removed.add(record_id)
+            elif before is None:
+                inserted.append((index, after))
+            else:
+                replaced[record_id] = after
+        inserted.sort(key=lambda item: item[0])
+
+        kept = [replaced.get(record.get('id'), record) for record in self.records
+                if record.get('id') not in removed]
+        records = []
+        position = 0
+        for index, record in inserted:
+            take = max(index - len(records), 0)
+            records.extend(kept[position:position + take])
+            position += take
+            records.append(record)
+        records.extend(kept[position:])
+        self.records[:] = records
+
+        for record_id in removed:
+            self._reuse.remove(record_id)
+        for _, record in inserted:
+            self._reuse.add(record)
+        now = int(time.time())
+        entries = []
+        for record_id, record in replaced.items():
+            self._reuse.add(record)
+            changes = field_changes(current[record_id], record)
+            if changes:
+                entries.append(make_entry(record_id, changes, reason, now))
+        with self._history_lock:
+            self._pending_history.extend(entries)
+
+    def password_reuse_groups(self):
+        """使用同一密码的记录分组（记录多的分组在前），由增量维护的索引直接给出"""
+        return self._reuse.groups()
+
+    def password_holders(self, password):
+        """使用该密码的记录ID集合"""
+        return self._reuse.holders(password)
+
+    def generate_passwords(self, count, policy=None, attempts=10):
+        """批量生成 count 个互不相同、也未被现有记录使用的密码（默认 16 位随机字符）
+
+        规则能生成的密码太少、多次重取仍凑不齐时抛出 GeneratorPolicyError。
+        """
+        policy = policy or PasswordPolicy()
+        passwords = []
+        seen = set()
+        for _ in range(attempts):
+            for password in policy.generate_many(count - len(passwords)):
+                if password not in seen and not self._reuse.holders(password):
+                    seen.add(password)
+                    passwords.append(password)
+            if len(passwords) == count:
+                return passwords
+        raise GeneratorPolicyError("按该规则无法生成足够多互不相同的密码")
+
+    def generate_password(self, policy=None):
+        """生成一个未被现有记录使用的密码"""
+        return self.generate_passwords(1, policy)[0]
+
+    def rotation_candidates(self, record_ids=None):
+        """批量更换密码的对象：record_ids 中（为 None 时为全部记录）有密码的记录，按记录顺序"""
+        records = list(self.records)
+        if record_ids is not None:
+            record_ids = set(record_ids)
+            records = [record for record in records if record.get('id') in record_ids]
+        return [record for record in records if record.get('password')]
+
+    def rotate_passwords(self, record_ids=None, policy=None):
+        """界面线程：批量更换密码（一个事务），返回更换后的记录列表
+
+        record_ids 为调用方已经确定的记录（如搜索结果），不在这里重新搜索，见 rotation_candidates；
+        一次生成互不相同、也未被使用的新密码，全部生成成功后才一次性替换记录，
+        旧密码记入修改历史，随下一次 commit 一起写入。规则无法生成足够的密码（GeneratorPolicyError）时记录不变。
+        """
+        targets = self.rotation_candidates(record_ids)
+        if not targets:
+            return []
+        passwords = self.generate_passwords(len(targets), policy)
+        now = int(time.time())
+        stamp = binformat.format_timestamp(now)
+        rotated = {}
+        entries = []
+        for record, password in zip(targets, passwords):
+            data = record.to_dict()
+            data['password'] = password
+            data['timestamp'] = stamp
+            record_id = record.get('id')
+            rotated[record_id] = Record.from_dict(data)
+            entries.append(make_entry(record_id, {'password': record.get('password')}, REASON_ROTATION, now))
+        self.records[:] = [rotated.get(record.get('id'), record) for record in self.records]
+        for record in rotated.values():
+            self._reuse.add(record)
+        with self._history_lock:
+            self._pending_history.extend(entries)
+        return list(rotated.values())
+
+    def record_history(self, record_id):
+        """记录的修改历史（包括尚未写入文件的），最近的在前；每条为 {'time', 'reason', 'old': {字段: 旧值}}
+
+        第一次调用时才读取历史文件（见 history.py），数量和时长按保留范围限制。
+        """
+        with self._history_lock:
+            pending = [entry for entry in self._pending_history if entry['id'] == record_id]
+        entries = self.history.bounded(self.history.read(record_id) + pending)
+        entries.reverse()
+        return entries
+
+    def password_history(self, record_id):
+        """记录用过的密码：[(时间戳, 旧密码, 原因)]，最近的在前"""
+        return [(entry['time'], entry['old']['password'], entry['reason'])
+                for entry in self.record_history(record_id) if 'password' in entry.get('old', {})]
+
+    def search(self, text, limit=None):
+        """按查询语句搜索当前记录（语法见 query.py），返回匹配的记录列表
+
+        有自由文本时按得分从高到低排列，否则保持记录顺序；查询语句有误时抛出 QuerySyntaxError。
+        """
+        from .query import search_records
+        return search_records(list(self.records), text, limit, self.search_index)
+
+    def records_for_site(self, website):
+        """与网址属于同一网站的记录（按规范域名比较，如 "https://www.github.com/login" 与 "github.com"）"""
+        records = list(self.records)
+        ids = self.search_index.records_for_site(records, website)
+        return [record for record in records if record.get('id') in ids]
+
+    def duplicate_sites(self):
+        """同一网站有多条记录的分组：规范域名 -> 记录列表"""
+        records = list(self.records)
+        by_id = {record.get('id'): record for record in records}
+        groups = self.search_index.site_groups(records)
+        return {domain: [by_id[record_id] for record_id in ids] for domain, ids in groups.items()}
+
+    @property
+    def search_index(self):
+        """密码库的搜索索引（SearchIndex），界面的后台搜索与 search 等方法共用这一个，按需增量更新"""
+        if self._search_index is None:
+            from .search import SearchIndex
+            self._search_index = SearchIndex()
+        return self._search_index
+
+    def commit(self, snapshot):
+        """写入快照；若文件已被其他进程修改则按记录合并后写入
+
+        发生合并时返回 (快照, 合并结果, 合并序号)，供界面线程调用 apply_merge；否则返回 None。
+        """
+        with file_lock(self.path):
+            with self._lock:
+                version, base, merge_pending = self.version, self._base, self._merge_pending
+            disk_version = self._disk_version()
+            merged = None
+            if disk_version != version or merge_pending:
+                disk_records, disk_version = self._read()
+                merged = merge_records(base, snapshot, compact_records(disk_records))
+
+            # 先写历史：即使随后写入记录失败，多出的历史也只是当前值，不会丢失旧值
+            with self._history_lock:
+                history, self._pending_history = self._pending_history, []
+            try:
+                self.history.append(history)
+            except OSError:
+                with self._history_lock:
+                    self._pending_history[:0] = history
+                raise
+
+            version = max(disk_version, version) + 1
+            written = snapshot if merged is None else merged
+            self._write(written, version)
+            with self._lock:
+                self.version = version
+                self._base = snapshot
+                if merged is not None:
+                    self._merge_seq += 1
+                    self._merge_pending = True
+                    seq = self._merge_seq
+
+            try:
+                # 已删除记录的历史随之丢弃
+                self.history.compact({record.get('id') for record in written})
+            except OSError as e:
+                # 重写失败不影响记录的保存，下次保存时再试
+                print(f"整理修改历史错误: {e}")
+
+        if merged is None:
+            return None
+        return snapshot, merged, seq
+
+    def reload_if_changed(self):
+        """界面线程：文件被其他进程修改时重新读取，并与本地记录按ID合并
+
+        文件未变化（或是本进程自己写入的）返回 None；
+        否则返回本地是否还有需要写回的修改。调用前应确保没有待写入的快照。
+        """
+        # 与 commit 相同，先取文件锁再取 _lock
+        with file_lock(self.path):
+            with self._lock:
+                version = self.version
+            if self._disk_version() == version:
+                return None
+            disk_records, disk_version = self._read()
+            disk_records = compact_records(disk_records)
+            with self._lock:
+                self.records = merge_records(self._base, self.records, disk_records)
+                self.version = disk_version
+                self._base = disk_records
+                self._merge_pending = False
+        self._reuse.sync(self.records)
+        return self.records != disk_records
+
+    def apply_merge(self, snapshot, merged, seq):
+        """界面线程：把后台合并结果并入当前记录（保留快照之后的本地修改）"""
+        with self._lock:
+            self.records = merge_records(snapshot, self.records, merged)
+            if seq == self._merge_seq:
+                self._base = merged
+                self._merge_pending = False
+        self._reuse.sync(self.records)
+        return self.records
@@ -0,0 +1,37 @@
+# tests/conftest.py
+# 公共夹具：在临时目录中打开主窗口（无显示环境下使用 offscreen 平台）
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture
+def qapp():
+    QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def window(qapp, tmp_path, monkeypatch):
+    """已加载完成的主窗口；用户数据写在临时目录中，确认对话框一律回答"是\""""
+    from PySide6 import QtWidgets
+    from auth.main_window import PasswordManagerWindow
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(QtWidgets.QMessageBox, "question",
+                        lambda *args: QtWidgets.QMessageBox.StandardButton.Yes)
+    monkeypatch.setattr(QtWidgets.QMessageBox, "information", lambda *args: None)
+    win = PasswordManagerWindow("tester")
+    win.show()
+    while win.is_loading():
+        qapp.processEvents()
+    yield win
+    win.close()
+    win.deleteLater()
+    qapp.processEvents()
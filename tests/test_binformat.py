@@ -0,0 +1,116 @@
+# tests/test_binformat.py
+# 二进制密码库格式（.spv）：编码解码往返一致，截断或被改动的文件抛出 StorageCorruptedError
+
+import hashlib
+
+import pytest
+
+from auth import binformat
+from auth.binformat import (BinaryVaultReader, decode_records, encode_records, iter_records,
+                            json_to_binary, binary_to_json, read_version)
+from auth.storage import StorageCorruptedError, atomic_write_json, read_json_checked
+
+RECORDS = [
+    {
+        'id': 'r1', 'website': 'https://github.com/login', 'site_name': 'GitHub',
+        'name': {'type': '单一用户名', 'username': 'octocat'}, 'password': 'p@ss word',
+        'email': 'octo@example.com', 'verification': '二次验证', 'registration_type': '普通注册',
+        'notes': '第一行\n第二行', 'timestamp': '2025-01-02 03:04:05',
+    },
+    {
+        # 空字段与缺失的字段
+        'id': 'r2', 'website': '', 'site_name': '', 'name': {'type': '分开的姓名', 'first_name': '', 'last_name': ''},
+        'password': '', 'email': '',
+    },
+    {
+        # 非 ASCII 文本、表情符号、无法紧凑存储的值和未知字段（放入扩展字段原样保存）
+        'id': 'r3', 'website': 'https://例子.测试/登录', 'site_name': '微博 🐦',
+        'name': {'type': '分开的姓名', 'first_name': '张', 'last_name': '伟'}, 'password': 'парольé́',
+        'verification': '自定义验证', 'timestamp': 'not a time', 'tags': ['a', 'b'], 'pinned': True,
+    },
+]
+
+
+def test_round_trip():
+    content = encode_records(RECORDS, 42)
+    assert decode_records(content) == (RECORDS, 42)
+    assert list(iter_records(content)) == RECORDS
+
+
+def test_round_trip_empty():
+    assert decode_records(encode_records([])) == ([], 0)
+
+
+def test_shared_strings_are_stored_once():
+    records = [dict(RECORDS[0], id=str(i)) for i in range(100)]
+    single = len(encode_records(records[:1]))
+    assert len(encode_records(records)) < single * 100 // 2
+
+
+def test_file_round_trip_and_random_access(tmp_path):
+    path = str(tmp_path / 'passwords.spv')
+    binformat.atomic_write_records(path, RECORDS, 5)
+    assert read_version(path) == 5
+    assert binformat.load_records(path, []) == (RECORDS, 5)
+    with BinaryVaultReader(path, verify=True) as reader:
+        assert len(reader) == len(RECORDS)
+        assert reader[2] == RECORDS[2]
+        assert reader[-1] == RECORDS[-1]
+        with pytest.raises(IndexError):
+            reader[len(RECORDS)]
+
+
+def test_json_conversion_keeps_records_and_version(tmp_path):
+    json_path = str(tmp_path / 'passwords.json')
+    binary_path = str(tmp_path / 'passwords.spv')
+    atomic_write_json(json_path, RECORDS, 9)
+    assert json_to_binary(json_path, binary_path) == len(RECORDS)
+    back = str(tmp_path / 'back.json')
+    binary_to_json(binary_path, back)
+    assert read_json_checked(back) == (RECORDS, 9)
+
+
+@pytest.mark.parametrize('length', [0, 3, binformat.HEADER.size, binformat.HEADER.size + binformat.FOOTER.size - 1])
+def test_short_content_is_rejected(length):
+    content = encode_records(RECORDS)
+    with pytest.raises(StorageCorruptedError):
+        decode_records(content[:length])
+
+
+@pytest.mark.parametrize('cut', [1, 10, binformat.FOOTER.size, binformat.FOOTER.size + 1])
+def test_truncated_content_is_rejected(cut):
+    content = encode_records(RECORDS)
+    with pytest.raises(StorageCorruptedError):
+        decode_records(content[:-cut])
+
+
+def test_every_bit_flip_is_rejected():
+    content = encode_records(RECORDS[:2], 3)
+    for position in range(len(content)):
+        for bit in (0x01, 0x80):
+            damaged = bytearray(content)
+            damaged[position] ^= bit
+            with pytest.raises(StorageCorruptedError):
+                decode_records(bytes(damaged))
+
+
+def test_corrupted_file_falls_back_to_previous_generation(tmp_path):
+    path = str(tmp_path / 'passwords.spv')
+    binformat.atomic_write_records(path, RECORDS[:1], 1)
+    binformat.atomic_write_records(path, RECORDS, 2)
+    with open(path, 'r+b') as f:
+        f.seek(binformat.HEADER.size + 2)
+        byte = f.read(1)
+        f.seek(-1, 1)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    assert binformat.load_records(path, []) == (RECORDS[:1], 1)
+
+
+def test_format_version_1_files_are_still_readable():
+    # 版本 1：校验和只包括文件尾之前的内容
+    content = bytearray(encode_records(RECORDS, 4))
+    binformat.HEADER.pack_into(content, 0, binformat.MAGIC, 1, 0)
+    body = len(content) - binformat.FOOTER.size
+    digest_at = body + binformat.FOOTER_FIELDS.size
+    content[digest_at:digest_at + 32] = hashlib.sha256(content[:body]).digest()
+    assert decode_records(bytes(content)) == (RECORDS, 4)
@@ -0,0 +1,82 @@
+# tests/test_domain.py
+# 网址规范化：多级公共后缀（co.uk、com.cn）、通配与例外规则、IP 地址、国际化域名
+
+import pytest
+
+from auth.domain import canonical_domain, domain_label, public_suffix, same_site
+
+
+@pytest.mark.parametrize('website, domain', [
+    ('https://www.github.com/login', 'github.com'),
+    ('GitHub.com:443', 'github.com'),
+    ('https://user:pw@Sub.Example.COM.:8080/a?b#c', 'example.com'),
+    ('ＧｉｔＨｕｂ．ｃｏｍ', 'github.com'),
+    # 多级公共后缀
+    ('https://www.bbc.co.uk/news', 'bbc.co.uk'),
+    ('bbc.co.uk', 'bbc.co.uk'),
+    ('a.b.example.com.cn', 'example.com.cn'),
+    # 主机名本身是公共后缀
+    ('co.uk', 'co.uk'),
+    ('foo.github.io', 'foo.github.io'),
+    # 通配规则 *.kawasaki.jp 与例外规则 !city.kawasaki.jp
+    ('a.b.kawasaki.jp', 'a.b.kawasaki.jp'),
+    ('www.city.kawasaki.jp', 'city.kawasaki.jp'),
+    # 单级主机名
+    ('localhost', 'localhost'),
+    ('GitHub', 'github'),
+])
+def test_canonical_domain(website, domain):
+    assert canonical_domain(website) == domain
+
+
+@pytest.mark.parametrize('website, address', [
+    ('http://192.168.1.1:8080/admin', '192.168.1.1'),
+    ('10.0.0.1', '10.0.0.1'),
+    ('[::1]:443', '::1'),
+    ('http://[2001:DB8:0::1]/', '2001:db8::1'),
+])
+def test_ip_addresses_are_kept_whole(website, address):
+    assert canonical_domain(website) == address
+
+
+def test_numeric_labels_in_host_names():
+    assert canonical_domain('10.0.0.1.example.com') == 'example.com'
+    assert canonical_domain('999.1.1.1') == '1.1'
+
+
+@pytest.mark.parametrize('website', [
+    'https://例子.中国/登录',
+    '例子。中国',
+    'https://XN--FSQU00A.xn--fiqs8s/',
+    '例子.xn--fiqs8s',
+    'www.例子.中国',
+])
+def test_internationalized_domains(website):
+    assert canonical_domain(website) == '例子.中国'
+
+
+def test_idn_punycode_and_unicode_are_the_same_site():
+    assert canonical_domain('xn--bcher-kva.de') == canonical_domain('Bücher.de') == 'bücher.de'
+    # 无效的 punycode 原样保留
+    assert canonical_domain('xn--zz.com') == 'xn--zz.com'
+
+
+@pytest.mark.parametrize('website', ['', '   ', 'not a url', 'http://', 'http://exa mple.com', 'a_b!.com'])
+def test_unrecognised_websites(website):
+    assert canonical_domain(website) is None
+
+
+def test_public_suffix_and_label():
+    assert public_suffix('www.example.com.cn') == 'com.cn'
+    assert public_suffix('bbc.co.uk') == 'co.uk'
+    assert domain_label('bbc.co.uk') == 'bbc'
+    assert domain_label('例子.中国') == '例子'
+
+
+def test_same_site():
+    assert same_site('github.com', 'github.com')
+    assert same_site('github', 'github.com')
+    assert same_site('bbc.co.uk', 'bbc')
+    assert not same_site('github.com', 'gitlab.com')
+    assert not same_site('bbc.co.uk', 'bbc.com')
+    assert not same_site(None, 'github.com')
@@ -0,0 +1,135 @@
+# tests/test_generator.py
+# 密码生成规则：长度、各类字符至少出现一次、排除的字符不出现、规则无法满足时报错，以及界面的错误提示
+
+from collections import Counter
+from itertools import cycle, islice
+
+import pytest
+
+from auth.generator import (AMBIGUOUS, CONSONANTS, DIGITS, LOWERCASE, SYMBOLS, UPPERCASE, VOWELS,
+                            GeneratorPolicyError, PasswordPolicy, RandomSource, load_wordlist)
+
+COUNT = 500
+
+
+@pytest.mark.parametrize('length', [4, 8, 16, 64])
+def test_random_length_and_every_class_present(length):
+    for password in PasswordPolicy(length=length).generate_many(COUNT):
+        assert len(password) == length
+        for characters in (LOWERCASE, UPPERCASE, DIGITS, SYMBOLS):
+            assert set(password) & set(characters)
+
+
+def test_disabled_classes_are_absent():
+    policy = PasswordPolicy(length=20, uppercase=False, symbols=False)
+    allowed = set(LOWERCASE + DIGITS)
+    for password in policy.generate_many(COUNT):
+        assert set(password) <= allowed
+        assert set(password) & set(DIGITS)
+
+
+def test_excluded_characters_never_appear():
+    excluded = "aeiouAEIOU0123!@#"
+    policy = PasswordPolicy(length=32, exclude=excluded, exclude_ambiguous=True)
+    used = set()
+    for password in policy.generate_many(COUNT):
+        assert not set(password) & set(excluded + AMBIGUOUS)
+        used.update(password)
+    # 其余字符都会用到
+    assert used == set(LOWERCASE + UPPERCASE + DIGITS + SYMBOLS) - set(excluded + AMBIGUOUS)
+
+
+@pytest.mark.parametrize('policy, message', [
+    (PasswordPolicy(lowercase=False, uppercase=False, digits=False, symbols=False), "至少需要选择一类字符"),
+    (PasswordPolicy(exclude=DIGITS), "数字已被全部排除"),
+    (PasswordPolicy(length=3), "长度至少为 4"),
+    (PasswordPolicy(PasswordPolicy.PRONOUNCEABLE, exclude=VOWELS), "辅音或元音已被全部排除"),
+    (PasswordPolicy(PasswordPolicy.PRONOUNCEABLE, length=4), "长度太短"),
+    (PasswordPolicy(PasswordPolicy.PASSPHRASE, words=0), "单词数至少为 1"),
+])
+def test_unsatisfiable_policies_raise(policy, message):
+    with pytest.raises(GeneratorPolicyError, match=message):
+        policy.generate()
+
+
+def test_pronounceable_layout():
+    policy = PasswordPolicy(PasswordPolicy.PRONOUNCEABLE, length=12)
+    for password in policy.generate_many(COUNT):
+        assert len(password) == 12
+        letters, digits, symbol = password[:9], password[9:11], password[11]
+        assert letters[0].lower() in CONSONANTS and letters[0].isupper()
+        assert all(c in CONSONANTS for c in letters[2::2])
+        assert all(c in VOWELS for c in letters[1::2])
+        assert set(digits) <= set(DIGITS) and symbol in SYMBOLS
+
+
+def test_pronounceable_without_digits_and_symbols():
+    policy = PasswordPolicy(PasswordPolicy.PRONOUNCEABLE, length=8, uppercase=False, digits=False, symbols=False)
+    for password in policy.generate_many(COUNT):
+        assert len(password) == 8 and password.isalpha() and password.islower()
+
+
+def test_passphrase_words_and_separator():
+    words = set(load_wordlist())
+    policy = PasswordPolicy(PasswordPolicy.PASSPHRASE, words=5, separator=" ")
+    for phrase in policy.generate_many(COUNT):
+        parts = phrase.split(" ")
+        assert len(parts) == 5 and set(parts) <= words
+
+
+def test_passphrase_custom_wordlist(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("# 注释\n11111 alpha\n11112 beta\nbeta\n", encoding='utf-8')
+    policy = PasswordPolicy(PasswordPolicy.PASSPHRASE, words=3, capitalize=True, wordlist=str(path))
+    for phrase in policy.generate_many(50):
+        assert set(phrase.split("-")) <= {"Alpha", "Beta"}
+    assert policy.entropy() == pytest.approx(3.0)
+
+
+def test_entropy():
+    assert PasswordPolicy(length=16, uppercase=False, digits=False, symbols=False).entropy() == \
+        pytest.approx(16 * 4.70044, rel=1e-4)
+    # 要求每类至少出现一次后略少于不加限制时的 16 * log2(87)
+    assert 100 < PasswordPolicy(length=16).entropy() < 16 * 6.4429
+    assert PasswordPolicy(PasswordPolicy.PASSPHRASE, words=6).entropy() == pytest.approx(6 * 12.925, rel=1e-4)
+
+
+def test_random_source_is_uniform_without_modulo_bias():
+    # 依次给出全部 256 个字节值：3 个字符中每个恰好对应 85 个值，255 被丢弃
+    source = RandomSource(token_bytes=lambda size: bytes(islice(cycle(range(256)), size)))
+    counts = Counter(source.choices("abc", 85 * 3 * 40))
+    assert counts == {'a': 85 * 40, 'b': 85 * 40, 'c': 85 * 40}
+
+    values = Counter(RandomSource(token_bytes=lambda size: bytes(islice(cycle(range(256)), size)))
+                     .indices(6, 252 * 10))
+    assert set(values.values()) == {420}
+
+
+def test_vault_generates_unused_distinct_passwords(tmp_path):
+    from auth.record import Record
+    from auth.vault import Vault
+
+    vault = Vault(str(tmp_path / "passwords.json"))
+    vault.load()
+    # 只有 10 种可能的密码，其中 3 种已被使用
+    policy = PasswordPolicy(length=1, lowercase=False, uppercase=False, symbols=False)
+    for i, password in enumerate("012"):
+        vault.put_record(Record.from_dict({'id': str(i), 'website': 'x.com', 'password': password}))
+    assert sorted(vault.generate_passwords(7, policy, attempts=1000)) == list("3456789")
+    with pytest.raises(GeneratorPolicyError):
+        vault.generate_passwords(8, policy)
+
+
+def test_window_shows_generator_errors(window, monkeypatch):
+    from PySide6 import QtWidgets
+
+    warnings = []
+    monkeypatch.setattr(QtWidgets.QMessageBox, "warning", lambda parent, title, text: warnings.append((title, text)))
+    kind = window.generator_combo.currentText()
+    monkeypatch.setitem(window.GENERATOR_POLICIES, kind, PasswordPolicy(exclude=LOWERCASE))
+    window.password_input.setText("unchanged")
+
+    window.generate_password()
+
+    assert warnings == [("生成密码失败", "小写字母已被全部排除")]
+    assert window.password_input.text() == "unchanged"
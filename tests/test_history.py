@@ -0,0 +1,143 @@
+# tests/test_history.py
+# 修改历史：追加与读取、每条记录的条数和时长上限、按计划重写时丢弃已删除记录的历史、不留下 .bak
+
+import os
+import time
+
+import pytest
+
+from auth import history as history_module
+from auth.history import (REASON_EDIT, REASON_ROTATION, HistoryLog, field_changes, history_path,
+                          make_entry)
+from auth.record import Record
+from auth.storage import backup_path
+from auth.vault import Vault
+
+NOW = int(time.time())
+
+
+def entry(record_id, password, when=NOW, reason=REASON_EDIT):
+    return make_entry(record_id, {'password': password}, reason, when)
+
+
+@pytest.fixture
+def log(tmp_path):
+    return HistoryLog(str(tmp_path / "passwords.json.history"), max_entries=3, max_age=1000)
+
+
+def passwords(entries):
+    return [item['old']['password'] for item in entries]
+
+
+def test_field_changes_records_old_values_only():
+    old = {'id': '1', 'password': 'a', 'email': 'x', 'timestamp': 't1'}
+    new = {'id': '1', 'password': 'b', 'notes': 'n', 'timestamp': 't2'}
+    assert field_changes(old, new) == {'password': 'a', 'email': 'x', 'notes': None}
+
+
+def test_append_and_read(log):
+    assert log.read('a') == []
+    log.append([entry('a', 'p1', NOW - 2), entry('b', 'q1', NOW - 1)])
+    log.append([entry('a', 'p2', NOW)])
+    assert passwords(log.read('a')) == ['p1', 'p2']
+    assert passwords(log.read('b')) == ['q1']
+    # 读取后再追加：只为新增的部分补充索引
+    log.append([entry('a', 'p3', NOW)])
+    assert passwords(log.read('a')) == ['p1', 'p2', 'p3']
+    assert len(log.read_all()) == 4
+
+
+def test_incomplete_last_line_is_skipped(log):
+    log.append([entry('a', 'p1')])
+    with open(log.path, 'ab') as f:
+        f.write(b'{"id": "a", "time": 1, "reas')
+    assert passwords(log.read('a')) == ['p1']
+
+
+def test_read_is_bounded_by_count_and_age(log):
+    log.append([entry('a', f'p{i}', NOW - 10 + i) for i in range(5)])
+    log.append([entry('b', 'old', NOW - 5000), entry('b', 'new', NOW)])
+    assert passwords(log.read('a')) == ['p2', 'p3', 'p4']
+    assert passwords(log.read('b')) == ['new']
+
+
+def test_first_commit_does_not_compact(log):
+    log.append([entry('a', f'p{i}') for i in range(10)])
+    assert not log.needs_compact({'b'})
+    assert not log.compact({'b'})
+    assert len(log.read_all()) == 10
+
+
+def test_compaction_after_the_interval_applies_the_bounds(log):
+    log.append([entry('a', f'p{i}', NOW - 10 + i) for i in range(5)])
+    log.append([entry('deleted', 'secret'), entry('b', 'ancient', NOW - 5000), entry('b', 'new')])
+    later = time.time() + history_module.COMPACT_INTERVAL
+    assert log.needs_compact({'a', 'b'}, later)
+
+    log._compacted_at -= history_module.COMPACT_INTERVAL
+    assert log.compact({'a', 'b'})
+    assert passwords(log.read_all()) == ['p2', 'p3', 'p4', 'new']
+    with open(log.path, 'rb') as f:
+        assert b'secret' not in f.read()
+    # 刚重写过，文件内容已知且在范围内
+    assert not log.needs_compact({'a', 'b'}, later)
+    log.append([entry('a', 'p5')])
+    assert not log.needs_compact({'a', 'b'}, later)
+    # 记录被删除后，到时间时才重写
+    assert not log.needs_compact({'b'})
+    assert log.needs_compact({'b'}, later + history_module.COMPACT_INTERVAL)
+
+
+def test_growth_triggers_compaction(log, monkeypatch):
+    monkeypatch.setattr(history_module, "COMPACT_SIZE", 1000)
+    log.append([entry('a', 'x' * 100)])
+    size = os.path.getsize(log.path)
+    assert not log.needs_compact({'a'})
+    log.append([entry('a', 'x' * 100) for _ in range(1000 // size + 1)])
+    assert log.needs_compact({'a'})
+    assert log.compact({'a'})
+    assert len(log.read_all()) == 3
+
+
+def test_compaction_removes_backup(log):
+    log.append([entry('deleted', 'secret'), entry('a', 'p1')])
+    with open(backup_path(log.path), 'wb') as f:
+        f.write(b'{"id": "deleted", "time": 1, "reason": "edit", "old": {"password": "secret"}}\n')
+    assert log.compact({'a'}, force=True)
+    assert not os.path.exists(backup_path(log.path))
+    assert not os.path.exists(log.path + ".tmp")
+    assert passwords(log.read('a')) == ['p1']
+    assert log.read('deleted') == []
+
+
+def test_read_after_the_file_is_replaced(log):
+    log.append([entry('a', 'p1'), entry('b', 'q1')])
+    assert passwords(log.read('b')) == ['q1']
+    log.compact({'b'}, force=True)
+    log.append([entry('b', 'q2')])
+    assert log.read('a') == []
+    assert passwords(log.read('b')) == ['q1', 'q2']
+
+
+def record(record_id, password):
+    return Record.from_dict({'id': record_id, 'website': 'example.com', 'password': password})
+
+
+def test_vault_history_is_written_with_the_commit(tmp_path):
+    path = str(tmp_path / "passwords.json")
+    vault = Vault(path)
+    vault.load()
+    vault.put_record(record('1', 'first'))
+    vault.put_record(record('1', 'second'))
+    # 尚未写入时也能看到，最近的在前
+    assert [old for _, old, _ in vault.password_history('1')] == ['first']
+    assert not os.path.exists(history_path(path))
+
+    vault.commit(vault.snapshot())
+    vault.rotate_passwords(['1'])
+    vault.commit(vault.snapshot())
+
+    reopened = Vault(path)
+    reopened.load()
+    assert [(old, reason) for _, old, reason in reopened.password_history('1')] == [
+        ('second', REASON_ROTATION), ('first', REASON_EDIT)]
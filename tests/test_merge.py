@@ -0,0 +1,189 @@
+# tests/test_merge.py
+# 并发写入：按键三方合并（merge_mappings）、文件版本号与文件锁，以及两个密码库实例同时修改同一文件时的合并
+
+import threading
+
+import pytest
+
+from auth.record import Record
+from auth.storage import atomic_write_json, file_lock, merge_mappings, read_version
+from auth.vault import Vault, merge_records
+
+
+BASE = {'a': 1, 'b': 2, 'c': 3}
+
+
+def test_concurrent_edits_of_different_keys_are_both_kept():
+    ours = {**BASE, 'a': 10}
+    theirs = {**BASE, 'b': 20}
+    assert merge_mappings(BASE, ours, theirs) == {'a': 10, 'b': 20, 'c': 3}
+
+
+def test_both_sides_edit_the_same_key_ours_wins():
+    assert merge_mappings(BASE, {**BASE, 'a': 10}, {**BASE, 'a': 11})['a'] == 10
+
+
+def test_unchanged_side_takes_the_other_sides_edit():
+    assert merge_mappings(BASE, dict(BASE), {**BASE, 'a': 11})['a'] == 11
+
+
+def test_additions_from_both_sides_are_kept():
+    merged = merge_mappings(BASE, {**BASE, 'x': 1}, {**BASE, 'y': 2})
+    assert merged == {**BASE, 'x': 1, 'y': 2}
+
+
+def test_delete_of_an_untouched_key_wins():
+    ours = {'a': 1, 'c': 3}
+    theirs = {'a': 1, 'b': 2}
+    assert merge_mappings(BASE, ours, theirs) == {'a': 1}
+
+
+@pytest.mark.parametrize('editor', ['ours', 'theirs'])
+def test_edit_wins_over_delete(editor):
+    edited = {**BASE, 'b': 20}
+    deleted = {'a': 1, 'c': 3}
+    if editor == 'ours':
+        merged = merge_mappings(BASE, edited, deleted)
+    else:
+        merged = merge_mappings(BASE, deleted, edited)
+    assert merged['b'] == 20
+
+
+def test_merge_keeps_the_other_sides_order():
+    theirs = {'c': 3, 'a': 1, 'b': 2}
+    assert list(merge_mappings(BASE, dict(BASE), theirs)) == ['c', 'a', 'b']
+
+
+def test_merge_records_by_id():
+    base = [{'id': '1', 'password': 'p1'}, {'id': '2', 'password': 'p2'}]
+    ours = [{'id': '1', 'password': 'mine'}, {'id': '2', 'password': 'p2'}]
+    theirs = [{'id': '2', 'password': 'p2'}, {'id': '3', 'password': 'new'}]
+    # 对方删除了本方修改过的 1：保留本方的修改
+    assert merge_records(base, ours, theirs) == [
+        {'id': '2', 'password': 'p2'}, {'id': '3', 'password': 'new'}, {'id': '1', 'password': 'mine'}]
+
+
+def test_json_version_stamp(tmp_path):
+    path = str(tmp_path / 'users.json')
+    assert read_version(path) == 0
+    atomic_write_json(path, {'u': 1}, 7)
+    assert read_version(path) == 7
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    path = str(tmp_path / 'passwords.json')
+    held = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with file_lock(path):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    try:
+        assert held.wait(5)
+        with pytest.raises(TimeoutError):
+            with file_lock(path, timeout=0.1):
+                pass
+    finally:
+        release.set()
+        thread.join()
+    with file_lock(path, timeout=0.1):
+        pass
+
+
+def record(record_id, password, site='example.com'):
+    return Record.from_dict({'id': record_id, 'website': site, 'password': password})
+
+
+@pytest.fixture(params=['passwords.json', 'passwords.spv'])
+def two_vaults(request, tmp_path):
+    """同一文件上的两个密码库（相当于两个窗口），都从 1、2 两条记录开始"""
+    path = str(tmp_path / request.param)
+    first = Vault(path)
+    first.load()
+    first.put_record(record('1', 'p1'))
+    first.put_record(record('2', 'p2'))
+    first.commit(first.snapshot())
+    second = Vault(path)
+    second.load()
+    return path, first, second
+
+
+def reload(path):
+    vault = Vault(path)
+    vault.load()
+    return {item['id']: item['password'] for item in vault.records}
+
+
+def test_commit_bumps_the_version(two_vaults):
+    path, first, _ = two_vaults
+    version = first.version
+    first.put_record(record('1', 'again'))
+    first.commit(first.snapshot())
+    assert first.version == version + 1
+    assert first._disk_version() == first.version
+
+
+def test_concurrent_edits_are_merged(two_vaults):
+    path, first, second = two_vaults
+    first.put_record(record('1', 'first'))
+    second.put_record(record('2', 'second'))
+    assert first.commit(first.snapshot()) is None
+
+    snapshot = second.snapshot()
+    result = second.commit(snapshot)
+    assert result is not None
+    second.apply_merge(*result)
+
+    assert reload(path) == {'1': 'first', '2': 'second'}
+    assert {item['id']: item['password'] for item in second.records} == {'1': 'first', '2': 'second'}
+
+
+def test_delete_vs_edit_keeps_the_edit(two_vaults):
+    path, first, second = two_vaults
+    first.delete_records(['2'])
+    second.put_record(record('2', 'edited'))
+    first.commit(first.snapshot())
+    second.commit(second.snapshot())
+    assert reload(path) == {'1': 'p1', '2': 'edited'}
+
+
+def test_delete_of_an_unchanged_record_is_kept(two_vaults):
+    path, first, second = two_vaults
+    first.delete_records(['2'])
+    second.put_record(record('1', 'edited'))
+    first.commit(first.snapshot())
+    second.commit(second.snapshot())
+    assert reload(path) == {'1': 'edited'}
+
+
+def test_conflicting_edits_resolve_to_the_later_writer(two_vaults):
+    path, first, second = two_vaults
+    first.put_record(record('1', 'first'))
+    second.put_record(record('1', 'second'))
+    first.commit(first.snapshot())
+    second.commit(second.snapshot())
+    assert reload(path)['1'] == 'second'
+
+    # 先写入的一方重新读取后得到合并结果，之后的修改不再与之冲突
+    assert first.reload_if_changed() is False
+    assert first.records[0]['password'] == 'second'
+    first.put_record(record('2', 'later'))
+    assert first.commit(first.snapshot()) is None
+    assert reload(path) == {'1': 'second', '2': 'later'}
+
+
+def test_edits_after_the_snapshot_survive_the_merge(two_vaults):
+    path, first, second = two_vaults
+    first.put_record(record('1', 'first'))
+    first.commit(first.snapshot())
+
+    second.put_record(record('2', 'saved'))
+    snapshot = second.snapshot()
+    # 保存线程写入期间界面线程又修改了记录
+    second.put_record(record('2', 'newer'))
+    second.apply_merge(*second.commit(snapshot))
+    assert {item['id']: item['password'] for item in second.records} == {'1': 'first', '2': 'newer'}
@@ -0,0 +1,119 @@
+# tests/test_query.py
+# 查询语句：字段前缀与别名、引号、排除条件、修改时间比较，以及输入不完整或有误时的处理
+
+import time
+
+import pytest
+
+from auth.query import QuerySyntaxError, TextFilter, TimeFilter, parse_query, search_records
+
+
+def conditions(text):
+    query = parse_query(text)
+    return [(f.field.name, f.value, f.negate) for f in query.filters], query.text
+
+
+def local(*fields):
+    return int(time.mktime(fields + (1, 1, 0, 0, 0)[len(fields) - 1:] + (0, 0, -1)))
+
+
+def test_free_text_only():
+    assert conditions('GitHub  Login') == ([], 'github login')
+
+
+@pytest.mark.parametrize('text, field', [
+    ('site:github', 'site'), ('网站:github', 'site'), ('SITE:GitHub', 'site'),
+    ('url:github', 'website'), ('user:github', 'name'), ('mail:github', 'email'),
+    ('备注:github', 'notes'), ('域名:github', 'domain'), ('reg:github', 'registration_type'),
+])
+def test_field_prefixes_and_aliases(text, field):
+    assert conditions(text) == ([(field, 'github', False)], '')
+
+
+def test_filters_and_free_text_mix():
+    assert conditions('支付 site:alipay email:@corp.com 账号') == (
+        [('site', 'alipay', False), ('email', '@corp.com', False)], '支付 账号')
+
+
+def test_quoted_values():
+    assert conditions('notes:"two words" rest') == ([('notes', 'two words', False)], 'rest')
+    assert conditions('-site:"a b"') == ([('site', 'a b', True)], '')
+    # 还没输入结束引号
+    assert conditions('notes:"half typed') == ([('notes', 'half typed', False)], '')
+
+
+def test_negation():
+    assert conditions('-email:@corp.com github') == ([('email', '@corp.com', True)], 'github')
+    # 没有字段名的减号属于自由文本
+    assert conditions('-word') == ([], '-word')
+
+
+@pytest.mark.parametrize('text', ['https://github.com/login', 'a:b:c', 'foo:bar'])
+def test_unknown_fields_are_free_text(text):
+    assert conditions(text) == ([], text)
+
+
+@pytest.mark.parametrize('text', ['site:', 'site:""', '-notes:', '"', '-', '::'])
+def test_incomplete_input_is_tolerated(text):
+    query = parse_query(text)
+    assert query.filters == []
+
+
+@pytest.mark.parametrize('text, start, end', [
+    ('updated:2025', local(2025), local(2026)),
+    ('updated:2025-12', local(2025, 12), local(2026, 1)),
+    ('updated:=2025-02-03', local(2025, 2, 3), local(2025, 2, 4)),
+    ('updated:<2025-01-01', None, local(2025)),
+    ('updated:<=2025-01-01', None, local(2025, 1, 2)),
+    ('updated:>2025-01-01', local(2025, 1, 2), None),
+    ('updated:>=2025-01-01', local(2025), None),
+    ('time:>="2025-02-03 04:05"', local(2025, 2, 3, 4, 5), None),
+    ('updated:">=2025-02-03 04:05:06"', local(2025, 2, 3, 4, 5, 6), None),
+])
+def test_time_comparisons(text, start, end):
+    (condition,) = parse_query(text).filters
+    assert isinstance(condition, TimeFilter)
+    assert (condition.start, condition.end) == (start, end)
+
+
+@pytest.mark.parametrize('text', [
+    'updated:abc', 'updated:<', 'updated:2025-13', 'updated:2025-02-32', 'updated:"2025-01-01 25:00"',
+    'updated:>=20250101',
+])
+def test_malformed_dates_raise(text):
+    with pytest.raises(QuerySyntaxError):
+        parse_query(text)
+
+
+RECORDS = [
+    {'id': '1', 'site_name': 'GitHub', 'website': 'https://github.com', 'email': 'me@corp.com',
+     'notes': 'two words here', 'timestamp': '2024-06-01 12:00:00'},
+    {'id': '2', 'site_name': 'GitLab', 'website': 'gitlab.com', 'email': 'me@home.net',
+     'notes': 'words two', 'timestamp': '2025-03-01 12:00:00'},
+    {'id': '3', 'site_name': 'Alipay', 'website': 'www.alipay.com/login', 'email': 'me@corp.com',
+     'timestamp': ''},
+]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('email:@corp.com', ['1', '3']),
+    ('-email:@corp.com', ['2']),
+    ('notes:"two words"', ['1']),
+    ('domain:alipay.com', ['3']),
+    ('domain:https://www.github.com/login', ['1']),
+    ('updated:<2025', ['1']),
+    ('-updated:<2025', ['2', '3']),
+    ('email:@corp.com -site:alipay', ['1']),
+    ('site:', ['1', '2', '3']),
+])
+def test_filters_select_records(text, expected):
+    assert [record['id'] for record in search_records(RECORDS, text)] == expected
+
+
+def test_text_filter_matches_agree_with_index():
+    for text in ('email:@corp.com', '-site:git', 'notes:two', 'domain:github.com'):
+        query = parse_query(text)
+        (condition,) = query.filters
+        assert isinstance(condition, TextFilter)
+        by_index = {record['id'] for record in search_records(RECORDS, text)}
+        assert {record['id'] for record in RECORDS if query.matches(record)} == by_index
@@ -0,0 +1,145 @@
+# tests/test_record_list.py
+# 记录列表的增量更新：保存、删除、清空、撤销之后保留搜索条件、隐藏的条目和滚动位置
+
+from auth.record import Record
+from auth.vault import new_record_id
+
+
+def add_records(window, sites):
+    old_records = list(window.records)
+    for site in sites:
+        window.vault.put_record(Record.from_dict({
+            'id': new_record_id(), 'website': f'{site}.com', 'site_name': site, 'password': f'pw-{site}'}))
+    window.sync_record_list(old_records, window.records)
+
+
+def wait_for_search(window, qapp):
+    window.finish_search()
+    while window.search_threads or window.search_ranked_generation != window.search_generation:
+        qapp.processEvents()
+
+
+def visible_sites(window):
+    ids = set(window.visible_record_ids())
+    return sorted(record['site_name'] for record in window.records if record['id'] in ids)
+
+
+def test_save_keeps_the_filter(window, qapp):
+    add_records(window, ['github', 'gitlab', 'alipay'])
+    window.search_input.setText('site:git')
+    wait_for_search(window, qapp)
+    assert visible_sites(window) == ['github', 'gitlab']
+
+    window.new_record()
+    window.website_input.setText('gitee.com')
+    window.site_name_input.setText('gitee')
+    window.save_record()
+    wait_for_search(window, qapp)
+    assert window.search_input.text() == 'site:git'
+    assert visible_sites(window) == ['gitee', 'github', 'gitlab']
+
+    window.new_record()
+    window.website_input.setText('taobao.com')
+    window.site_name_input.setText('taobao')
+    window.save_record()
+    wait_for_search(window, qapp)
+    assert visible_sites(window) == ['gitee', 'github', 'gitlab']
+
+
+def test_delete_and_undo_keep_the_filter(window, qapp):
+    add_records(window, ['github', 'gitlab', 'alipay'])
+    window.search_input.setText('site:git')
+    wait_for_search(window, qapp)
+
+    window.record_list.setCurrentRow(window.vault.find_index(window.visible_record_ids()[0]))
+    window.delete_selected()
+    wait_for_search(window, qapp)
+    assert window.search_input.text() == 'site:git'
+    assert len(window.visible_record_ids()) == 1
+    assert len(window.records) == 2
+
+    window.undo()
+    wait_for_search(window, qapp)
+    assert visible_sites(window) == ['github', 'gitlab']
+
+
+def test_clear_all_and_undo_keep_the_filter(window, qapp):
+    add_records(window, ['github', 'gitlab', 'alipay'])
+    window.search_input.setText('site:git')
+    wait_for_search(window, qapp)
+
+    window.clear_all()
+    assert window.record_list.count() == 0
+    window.undo()
+    wait_for_search(window, qapp)
+    assert window.search_input.text() == 'site:git'
+    assert visible_sites(window) == ['github', 'gitlab']
+
+
+def test_save_keeps_the_scroll_position(window, qapp):
+    add_records(window, [f'site{i:03}' for i in range(300)])
+    qapp.processEvents()
+    scroll_bar = window.record_list.verticalScrollBar()
+    scroll_bar.setValue(scroll_bar.maximum() // 2)
+    position = scroll_bar.value()
+    assert position > 0
+
+    window.record_list.setCurrentRow(window.record_list.indexAt(window.record_list.viewport().rect().center()).row())
+    window.password_input.setText('changed')
+    window.save_record()
+    qapp.processEvents()
+    assert scroll_bar.value() == position
+
+
+def list_ids(window):
+    from PySide6 import QtCore
+    role = QtCore.Qt.ItemDataRole.UserRole
+    return [window.record_list.item(row).data(role) for row in range(window.record_list.count())]
+
+
+def test_matches_are_shown_in_score_order(window, qapp):
+    add_records(window, ['Zapier', 'Git Hub Enterprise', 'My GitHub mirror', 'GitHub'])
+    record_order = list_ids(window)
+    by_site = {record['site_name']: record['id'] for record in window.records}
+
+    window.search_input.setText('github')
+    wait_for_search(window, qapp)
+    assert window.visible_record_ids() == [by_site['GitHub'], by_site['My GitHub mirror'],
+                                           by_site['Git Hub Enterprise']]
+    assert window.record_list.currentRow() == window.record_row(by_site['GitHub'])
+
+    # 按行选择时显示的是该行的记录
+    window.record_list.setCurrentRow(window.record_row(by_site['My GitHub mirror']))
+    assert window.site_name_input.text() == 'My GitHub mirror'
+    window.select_record(by_site['Git Hub Enterprise'])
+    assert window.site_name_input.text() == 'Git Hub Enterprise'
+
+    window.search_input.setText('')
+    wait_for_search(window, qapp)
+    assert list_ids(window) == record_order
+
+
+def test_edits_while_ranked_keep_list_and_records_aligned(window, qapp):
+    add_records(window, ['Zapier', 'Git Hub Enterprise', 'My GitHub mirror', 'GitHub', 'gitlab'])
+    window.search_input.setText('github')
+    wait_for_search(window, qapp)
+
+    # 删除排在最前的记录，再保存一条新的匹配记录
+    first = window.visible_record_ids()[0]
+    window.record_list.setCurrentRow(window.record_row(first))
+    window.delete_selected()
+    assert window.vault.find_index(first) is None
+    window.new_record()
+    window.website_input.setText('github.io')
+    window.site_name_input.setText('GitHub Pages')
+    window.save_record()
+    wait_for_search(window, qapp)
+    sites = {record['id']: record['site_name'] for record in window.records}
+    assert [sites[record_id] for record_id in window.visible_record_ids()][0] == 'GitHub Pages'
+    assert sorted(list_ids(window)) == sorted(sites)
+
+    window.search_input.setText('')
+    wait_for_search(window, qapp)
+    assert list_ids(window) == [record['id'] for record in window.records]
+    for row, record in enumerate(window.records):
+        assert window.record_list.item(row).text() == window.record_item_text(record)
@@ -0,0 +1,44 @@
+# tests/test_rotation.py
+# 批量换密码：更换的记录正是列表中显示的搜索结果，不会多出列表中没有显示的模糊匹配
+
+from auth.record import Record
+from auth.vault import new_record_id
+
+
+def add_records(window, sites):
+    old_records = list(window.records)
+    for site in sites:
+        window.vault.put_record(Record.from_dict({
+            'id': new_record_id(), 'website': f'{site}.com', 'site_name': site,
+            'name': {'type': '单一用户名', 'username': 'user'}, 'password': f'pw-{site}',
+        }))
+    window.sync_record_list(old_records, window.records)
+
+
+def test_rotation_touches_exactly_the_visible_matches(window):
+    # 60 条精确匹配时不再进行拼写容错，"amazan" 不在列表中显示
+    add_records(window, ['amazon'] * 60 + ['amazan', 'github'])
+    window.search_input.setText('amazon')
+    window.finish_search()
+    visible = set(window.visible_record_ids())
+    assert len(visible) == 60
+    before = {record['id']: record['password'] for record in window.records}
+
+    window.rotate_passwords()
+
+    changed = {record['id'] for record in window.records if record['password'] != before[record['id']]}
+    assert changed == visible
+    assert window.saver.flush()
+
+
+def test_rotation_applies_a_pending_search_first(window):
+    add_records(window, ['amazon', 'github', 'gitlab'])
+    # 输入后尚未等到搜索执行就点击批量换密码
+    window.search_input.setText('site:github')
+    assert window.search_timer.isActive()
+    before = {record['id']: record['password'] for record in window.records}
+
+    window.rotate_passwords()
+
+    changed = {record['site_name'] for record in window.records if record['password'] != before[record['id']]}
+    assert changed == {'github'}
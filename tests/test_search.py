@@ -0,0 +1,57 @@
+# tests/test_search.py
+# 搜索键：只由实际填写的网站名称、网址、用户名、邮箱生成，显示用的占位名称不参与搜索
+
+import pytest
+
+from auth.search import SearchIndex, display_name, record_search_keys
+
+
+def record(record_id, name):
+    return {'id': record_id, 'website': f'{record_id}.example', 'site_name': '', 'name': name}
+
+
+PLACEHOLDERS = [
+    record('no-username', {'type': '单一用户名'}),
+    record('anonymous', {'type': '匿名'}),
+    record('empty-name', {'type': '分开的姓名'}),
+]
+
+
+@pytest.mark.parametrize('item', PLACEHOLDERS, ids=lambda item: item['id'])
+def test_placeholder_names_are_not_search_keys(item):
+    assert display_name(item) in ('未知用户', '匿名用户', '')
+    keys = record_search_keys(item)
+    assert not any('用户' in key for key in keys)
+    assert keys[2] == ''
+
+
+@pytest.mark.parametrize('text', ['gh', 'hu', 'ong', 'yonghu', '用户'])
+def test_placeholder_pinyin_does_not_match(text):
+    matched, _ = SearchIndex().search(PLACEHOLDERS, text)
+    assert matched == set()
+
+
+def test_real_names_and_their_pinyin_are_searchable():
+    records = [
+        record('single', {'type': '单一用户名', 'username': '张伟'}),
+        record('split', {'type': '分开的姓名', 'first_name': 'Ada', 'last_name': 'Lovelace'}),
+    ] + PLACEHOLDERS
+    index = SearchIndex()
+    assert index.search(records, 'zhangwei')[0] == {'single'}
+    assert index.search(records, 'lovelace')[0] == {'split'}
+
+
+RANKED = [
+    {'id': '0', 'site_name': 'Zapier', 'website': 'zapier.com'},
+    {'id': '1', 'site_name': 'Git Hub Enterprise', 'website': 'ghe.corp'},
+    {'id': '2', 'site_name': 'My GitHub mirror', 'website': 'mirror.example'},
+    {'id': '3', 'site_name': 'GitHub', 'website': 'github.com'},
+]
+
+
+def test_hits_are_ranked_by_score():
+    matched, ranked = SearchIndex().search(RANKED, 'github')
+    assert matched == {'1', '2', '3'}
+    # 完全相同的名称最先，其次是包含整个词的，最后是分散匹配的
+    assert ranked == ['3', '2', '1']
+    assert SearchIndex().search(RANKED, 'github', limit=2)[1] == ['3', '2']
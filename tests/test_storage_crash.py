@@ -0,0 +1,105 @@
+# tests/test_storage_crash.py
+# 故障注入：在子进程中执行 atomic_write_json，在写临时文件、fsync、替换文件的途中强制结束进程，
+# 检查 load_json 读到的仍是完整的上一代数据（正文或 .bak），不会读到写了一半的内容
+
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from auth.storage import atomic_write_json, backup_path, load_json  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="需要 SIGKILL")
+
+# 子进程：按 stage 在对应步骤打印 "READY" 后挂起，等待被结束
+WRITER = textwrap.dedent('''
+    import os, sys, time
+    sys.path.insert(0, sys.argv[1])
+    from auth import storage
+
+    path, stage = sys.argv[2], sys.argv[3]
+
+    def hang():
+        print("READY", flush=True)
+        time.sleep(60)
+
+    if stage == "write":
+        real_fdopen = os.fdopen
+
+        class HalfWriter:
+            def __init__(self, f):
+                self.f = f
+            def __enter__(self):
+                return self
+            def __exit__(self, *exc):
+                return self.f.__exit__(*exc)
+            def write(self, content):
+                self.f.write(content[:len(content) // 2])
+                self.f.flush()
+                hang()
+            def __getattr__(self, name):
+                return getattr(self.f, name)
+
+        os.fdopen = lambda fd, mode: HalfWriter(real_fdopen(fd, mode))
+    elif stage == "fsync":
+        real_fsync = os.fsync
+        def fsync(fd):
+            real_fsync(fd)
+            hang()
+        os.fsync = fsync
+    elif stage == "replace":
+        # 上一代文件已改名为 .bak，新文件尚未改名为正文
+        real_replace = os.replace
+        def replace(src, dst):
+            real_replace(src, dst)
+            if dst.endswith(".bak"):
+                hang()
+        os.replace = replace
+
+    records = [{"id": str(i), "website": "new.example", "password": "x" * 64} for i in range(5000)]
+    storage.atomic_write_json(path, records, 2)
+''')
+
+
+def old_records():
+    return [{"id": str(i), "website": "old.example", "password": "p"} for i in range(100)]
+
+
+def kill_writer(path, stage):
+    process = subprocess.Popen([sys.executable, "-c", WRITER, ROOT, path, stage],
+                               stdout=subprocess.PIPE, text=True)
+    try:
+        assert process.stdout.readline().strip() == "READY"
+    finally:
+        process.send_signal(signal.SIGKILL)
+        process.wait()
+        process.stdout.close()
+
+
+@pytest.mark.parametrize("stage", ["write", "fsync", "replace"])
+def test_killed_writer_keeps_previous_generation(tmp_path, stage):
+    path = str(tmp_path / "passwords.json")
+    atomic_write_json(path, [{"id": "0", "website": "older.example"}], 0)
+    atomic_write_json(path, old_records(), 1)
+
+    kill_writer(path, stage)
+
+    assert load_json(path, None) == (old_records(), 1)
+    # 正文缺失时已从 .bak 恢复，再次加载直接读取正文
+    assert os.path.exists(path)
+    assert load_json(path, None) == (old_records(), 1)
+
+
+def test_killed_writer_without_previous_file(tmp_path):
+    path = str(tmp_path / "passwords.json")
+
+    kill_writer(path, "fsync")
+
+    assert load_json(path, []) == ([], 0)
+    assert not os.path.exists(backup_path(path))
@@ -0,0 +1,174 @@
+# tests/test_undo.py
+# 撤销与重做：编辑、删除、批量换密码之后的撤销，新修改使重做失效，冲突时清空，以及修改历史中的撤销、重做原因
+
+import pytest
+
+from auth.history import REASON_EDIT, REASON_REDO, REASON_ROTATION, REASON_UNDO
+from auth.record import Record
+from auth.undo import EditCommand, UndoConflictError, UndoStack, diff_records
+from auth.vault import Vault
+
+
+def record(record_id, password, site='example.com'):
+    return Record.from_dict({'id': record_id, 'website': site, 'password': password})
+
+
+@pytest.fixture
+def vault(tmp_path):
+    vault = Vault(str(tmp_path / "passwords.json"))
+    vault.load()
+    for i in range(5):
+        vault.put_record(record(str(i), f'p{i}'))
+    vault.commit(vault.snapshot())
+    return vault
+
+
+class Editor:
+    """按界面的方式记录修改：先取修改前的记录列表，修改后把差量压入撤销栈"""
+
+    def __init__(self, vault):
+        self.vault = vault
+        self.stack = UndoStack()
+
+    def edit(self, text, change):
+        old_records = list(self.vault.records)
+        change()
+        self.stack.push(EditCommand.from_records(text, old_records, self.vault.records))
+
+
+def state(vault):
+    return [(item['id'], item['password']) for item in vault.records]
+
+
+def test_diff_records():
+    a, b, c = record('a', '1'), record('b', '2'), record('c', '3')
+    b2, d = record('b', '2x'), record('d', '4')
+    assert diff_records([a, b, c], [a, b, c]) == []
+    assert diff_records([a, b, c], [a, b2, c, d]) == [('b', 1, b, b2), ('d', 3, None, d)]
+    assert diff_records([a, b, c], [a, c]) == [('b', 1, b, None)]
+
+
+def test_undo_and_redo_an_edit(vault):
+    editor = Editor(vault)
+    before = state(vault)
+    editor.edit("编辑记录", lambda: vault.put_record(record('2', 'changed')))
+    after = state(vault)
+
+    assert editor.stack.undo_text() == "编辑记录"
+    editor.stack.undo(vault)
+    assert state(vault) == before
+    assert editor.stack.redo_text() == "编辑记录" and not editor.stack.can_undo()
+    editor.stack.redo(vault)
+    assert state(vault) == after
+
+
+def test_undo_delete_restores_records_in_place(vault):
+    editor = Editor(vault)
+    before = state(vault)
+    editor.edit("删除 2 条记录", lambda: vault.delete_records(['1', '3']))
+    assert [record_id for record_id, _ in state(vault)] == ['0', '2', '4']
+    editor.stack.undo(vault)
+    assert state(vault) == before
+    editor.stack.redo(vault)
+    assert [record_id for record_id, _ in state(vault)] == ['0', '2', '4']
+
+
+def test_undo_clear_all(vault):
+    editor = Editor(vault)
+    before = state(vault)
+    editor.edit("清空所有记录", vault.clear_records)
+    editor.stack.undo(vault)
+    assert state(vault) == before
+
+
+def test_undo_rotation(vault):
+    editor = Editor(vault)
+    before = state(vault)
+    editor.edit("批量换密码", lambda: vault.rotate_passwords(['1', '2']))
+    rotated = state(vault)
+    assert [pair for pair in rotated if pair not in before] == rotated[1:3]
+    editor.stack.undo(vault)
+    assert state(vault) == before
+    # 撤销后恢复的旧密码仍可再次用于重复密码检查
+    assert vault.password_holders('p1') == {'1'}
+    editor.stack.redo(vault)
+    assert state(vault) == rotated
+
+
+def test_new_edit_invalidates_redo(vault):
+    editor = Editor(vault)
+    editor.edit("编辑记录", lambda: vault.put_record(record('0', 'a')))
+    editor.stack.undo(vault)
+    assert editor.stack.can_redo()
+    editor.edit("新建记录", lambda: vault.put_record(record('new', 'n')))
+    assert not editor.stack.can_redo()
+    assert editor.stack.undo_text() == "新建记录"
+
+
+def test_empty_commands_are_ignored(vault):
+    editor = Editor(vault)
+    editor.edit("没有变化", lambda: None)
+    assert not editor.stack.can_undo()
+
+
+def test_conflict_clears_both_stacks(vault):
+    editor = Editor(vault)
+    editor.edit("编辑记录", lambda: vault.put_record(record('0', 'a')))
+    editor.edit("编辑记录", lambda: vault.put_record(record('1', 'b')))
+    editor.stack.undo(vault)
+    # 其他窗口修改了要撤销的记录（合并进当前记录）
+    vault.put_record(record('0', 'elsewhere'))
+    before = state(vault)
+    with pytest.raises(UndoConflictError):
+        editor.stack.undo(vault)
+    assert state(vault) == before
+    assert not editor.stack.can_undo() and not editor.stack.can_redo()
+
+
+def test_stack_limits_drop_the_oldest_commands(vault):
+    stack = UndoStack(limit=3, max_changes=4)
+    for i in range(5):
+        stack.push(EditCommand(f"命令 {i}", [(str(i), 0, None, record(str(i), 'x'))]))
+    assert len(stack._undo) == 3 and stack._undo[0].text == "命令 2"
+    stack.push(EditCommand("大命令", [(str(i), i, None, record(str(i), 'x')) for i in range(10)]))
+    # 单个命令超过上限时也至少保留它本身
+    assert [command.text for command in stack._undo] == ["大命令"]
+
+
+def test_undo_and_redo_are_recorded_in_history(vault):
+    editor = Editor(vault)
+    editor.edit("编辑记录", lambda: vault.put_record(record('0', 'edited')))
+    editor.stack.undo(vault)
+    editor.stack.redo(vault)
+    editor.edit("批量换密码", lambda: vault.rotate_passwords(['0']))
+    editor.stack.undo(vault)
+    vault.commit(vault.snapshot())
+
+    reopened = Vault(vault.path)
+    reopened.load()
+    history = [(old, reason) for _, old, reason in reopened.password_history('0')]
+    rotated = history[0][0]
+    assert rotated not in ('p0', 'edited')
+    assert history == [
+        (rotated, REASON_UNDO), ('edited', REASON_ROTATION), ('p0', REASON_REDO),
+        ('edited', REASON_UNDO), ('p0', REASON_EDIT)]
+
+
+def test_window_undo_keeps_the_list_in_sync(window):
+    window.new_record()
+    window.website_input.setText('a.com')
+    window.password_input.setText('first')
+    window.save_record()
+    window.record_list.setCurrentRow(0)
+    window.website_input.setText('b.com')
+    window.save_record()
+    assert window.record_list.count() == 1 and window.records[0]['website'] == 'b.com'
+
+    window.undo()
+    assert window.records[0]['website'] == 'a.com'
+    assert 'a.com' in window.record_list.item(0).text()
+    window.undo()
+    assert window.records == [] and window.record_list.count() == 0
+    window.redo()
+    assert window.record_list.count() == 1
+    assert window.saver.flush()